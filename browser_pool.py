@@ -0,0 +1,328 @@
+
+import os
+import sys
+import time
+import atexit
+import threading
+import urllib.parse
+from contextlib import contextmanager
+from playwright.sync_api import sync_playwright
+
+USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+VIEWPORT = {"width": 1280, "height": 720}
+
+def launch_options(headless=True):
+    """Chromium launch arguments shared by every entry point."""
+    launch_args = {
+        "headless": headless,
+        "args": ["--no-sandbox", "--disable-blink-features=AutomationControlled"]
+    }
+    # Check for explicit executable path (useful for frozen app)
+    exec_path = os.environ.get("PLAYWRIGHT_CHROMIUM_EXECUTABLE_PATH")
+    if exec_path and os.path.exists(exec_path):
+        launch_args["executable_path"] = exec_path
+    return launch_args
+
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font"}
+BLOCKED_DOMAINS = [
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net",
+    "googlesyndication.com", "facebook.net", "facebook.com", "hotjar.com",
+    "nr-data.net", "newrelic.com", "pendo.io", "fullstory.com", "mouseflow.com",
+    "linkedin.com", "ads.linkedin.com", "bing.com", "clarity.ms", "hubspot.com",
+    "segment.io", "segment.com", "optimizely.com", "qualtrics.com"
+]
+
+class ResourceBlocker:
+    """
+    Aborts requests the scrapers never need (images, media, fonts and known
+    analytics/ads domains) via context.route, and counts what it blocked.
+    Other requests fall back to routes installed before it (e.g. a replay
+    router), or go to the network if there are none.
+
+    Args:
+        resource_types: Playwright resource types to block.
+        domains: Host suffixes to block.
+        allow: Resource types or host suffixes that are never blocked,
+            overriding the two lists above.
+    """
+
+    def __init__(self, resource_types=None, domains=None, allow=None):
+        self.resource_types = set(BLOCKED_RESOURCE_TYPES if resource_types is None else resource_types)
+        self.domains = list(BLOCKED_DOMAINS if domains is None else domains)
+        self.allow = set(allow or [])
+        self.blocked_requests = 0
+        self.blocked_by_reason = {}
+        self.allowed_requests = 0
+        self.allowed_bytes = 0
+
+    @classmethod
+    def from_env(cls):
+        """Builds a blocker from JCR_BLOCK_RESOURCES / JCR_ALLOW_RESOURCES, or None if disabled."""
+        if os.environ.get("JCR_BLOCK_RESOURCES", "1").lower() in ("0", "false", "no", "off"):
+            return None
+        allow = [a.strip().lower() for a in os.environ.get("JCR_ALLOW_RESOURCES", "").split(",") if a.strip()]
+        return cls(allow=allow)
+
+    def _block_reason(self, request):
+        rtype = request.resource_type
+        if rtype in self.allow:
+            return None
+        host = urllib.parse.urlparse(request.url).hostname or ""
+        if any(host == a or host.endswith("." + a) for a in self.allow):
+            return None
+        if rtype in self.resource_types:
+            return rtype
+        for d in self.domains:
+            if host == d or host.endswith("." + d):
+                return d
+        return None
+
+    def _decide(self, request):
+        """Counts the request and returns the block reason, or None to let it through."""
+        reason = None
+        try:
+            reason = self._block_reason(request)
+        except Exception:
+            pass
+        if reason:
+            self.blocked_requests += 1
+            self.blocked_by_reason[reason] = self.blocked_by_reason.get(reason, 0) + 1
+        else:
+            self.allowed_requests += 1
+        return reason
+
+    def _route(self, route):
+        if self._decide(route.request):
+            route.abort("blockedbyclient")
+        else:
+            route.fallback()
+
+    async def _route_async(self, route):
+        if self._decide(route.request):
+            await route.abort("blockedbyclient")
+        else:
+            await route.fallback()
+
+    def _on_response(self, response):
+        try:
+            self.allowed_bytes += int(response.headers.get("content-length", 0))
+        except Exception:
+            pass
+
+    def install(self, context):
+        context.route("**/*", self._route)
+        context.on("response", self._on_response)
+
+    async def install_async(self, context):
+        """install() for a playwright.async_api context."""
+        await context.route("**/*", self._route_async)
+        context.on("response", self._on_response)
+
+    def stats(self):
+        """
+        Counters since creation. Blocked requests are never fetched, so their
+        size is unknown; allowed_bytes sums Content-Length of what was loaded.
+        """
+        return {
+            "blocked_requests": self.blocked_requests,
+            "blocked_by_reason": dict(self.blocked_by_reason),
+            "allowed_requests": self.allowed_requests,
+            "allowed_bytes": self.allowed_bytes
+        }
+
+class BrowserPool:
+    """
+    Keeps one Chromium process and a small set of warm browser contexts
+    alive so consecutive lookups don't pay a browser cold start each.
+
+    Playwright's sync API is bound to the thread that started it, so a pool
+    must only be used from the thread that created it. Use get_default_pool()
+    to get the pool belonging to the current thread.
+
+    Args:
+        size: Maximum number of idle contexts kept for reuse.
+        idle_timeout: Seconds without activity after which the browser is
+            considered stale. The pool has no timer of its own (it may only
+            be touched from its thread): acquire() recycles a stale browser,
+            and a thread that keeps a pool while waiting for work should
+            call reap_idle() from its wait loop to actually free it (as
+            jcr_session does). Workers that exit when their queue is empty
+            close their pool instead.
+        headless: Launch Chromium headless.
+        blocker: ResourceBlocker installed on every context. Defaults to
+            ResourceBlocker.from_env(); pass False to load everything.
+        on_new_context: Called with every new context before the blocker is
+            installed (e.g. to add routes or listeners). Playwright runs the
+            newest route first, so the blocker sees each request before any
+            route added here.
+    """
+
+    def __init__(self, size=2, idle_timeout=300, headless=True, blocker=None, on_new_context=None):
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self.headless = headless
+        self.blocker = ResourceBlocker.from_env() if blocker is None else (blocker or None)
+        self.on_new_context = on_new_context
+        self.playwright = None
+        self.browser = None
+        self._idle = []
+        self._in_use = set()
+        self._last_used = time.monotonic()
+        self._owner = threading.get_ident()
+
+    def _check_thread(self):
+        if threading.get_ident() != self._owner:
+            raise RuntimeError("BrowserPool used from a thread other than the one that created it.")
+
+    def _launch(self):
+        if not self.playwright:
+            self.playwright = sync_playwright().start()
+        print("Launching pooled Chromium...", file=sys.stderr)
+        self.browser = self.playwright.chromium.launch(**launch_options(self.headless))
+
+    def _new_context(self):
+        # Service workers would bypass context.route, so keep them off
+        context = self.browser.new_context(user_agent=USER_AGENT, viewport=VIEWPORT, service_workers="block")
+        if self.on_new_context:
+            self.on_new_context(context)
+        if self.blocker:
+            self.blocker.install(context)
+        return context
+
+    def is_healthy(self):
+        """True if the browser process is running and still connected."""
+        try:
+            return bool(self.browser) and self.browser.is_connected()
+        except Exception:
+            return False
+
+    def _context_healthy(self, context):
+        try:
+            # Any call into a closed context raises
+            context.cookies()
+            return True
+        except Exception:
+            return False
+
+    def _shutdown_browser(self):
+        for ctx in self._idle:
+            try:
+                ctx.close()
+            except Exception:
+                pass
+        self._idle = []
+        self._in_use = set()
+        if self.browser:
+            try:
+                self.browser.close()
+            except Exception:
+                pass
+        self.browser = None
+
+    def reap_idle(self):
+        """
+        Shuts the browser down if it has been idle longer than idle_timeout.
+        Call it from the owning thread; the next acquire() relaunches it.
+        """
+        self._check_thread()
+        if self.browser and not self._in_use and time.monotonic() - self._last_used > self.idle_timeout:
+            print("Browser pool idle timeout reached, closing Chromium.", file=sys.stderr)
+            self._shutdown_browser()
+
+    def acquire(self):
+        """Returns a healthy browser context, launching Chromium if needed."""
+        self._check_thread()
+        self.reap_idle()
+        if not self.is_healthy():
+            self._shutdown_browser()
+            self._launch()
+
+        context = None
+        while self._idle:
+            candidate = self._idle.pop()
+            if self._context_healthy(candidate):
+                context = candidate
+                break
+        if context is None:
+            context = self._new_context()
+
+        self._in_use.add(context)
+        self._last_used = time.monotonic()
+        return context
+
+    def release(self, context):
+        """Returns a context to the pool, closing any pages left open on it."""
+        self._check_thread()
+        self._in_use.discard(context)
+        self._last_used = time.monotonic()
+        try:
+            for pg in list(context.pages):
+                pg.close()
+        except Exception:
+            pass
+
+        if self.is_healthy() and len(self._idle) < self.size and self._context_healthy(context):
+            self._idle.append(context)
+        else:
+            try:
+                context.close()
+            except Exception:
+                pass
+
+    @contextmanager
+    def context(self):
+        ctx = self.acquire()
+        try:
+            yield ctx
+        finally:
+            self.release(ctx)
+
+    @contextmanager
+    def page(self):
+        """Borrows a fresh page on a pooled context."""
+        with self.context() as ctx:
+            yield ctx.new_page()
+
+    def close(self):
+        if self.blocker and self.blocker.blocked_requests:
+            print(f"Resource blocking: {self.blocker.stats()}", file=sys.stderr)
+        self._shutdown_browser()
+        if self.playwright:
+            try:
+                self.playwright.stop()
+            except Exception:
+                pass
+        self.playwright = None
+
+_local = threading.local()
+_all_pools = []
+
+def get_default_pool():
+    """Returns the BrowserPool belonging to the calling thread, creating it on first use."""
+    pool = getattr(_local, "pool", None)
+    if pool is None:
+        pool = BrowserPool(
+            size=int(os.environ.get("JCR_POOL_SIZE", "2")),
+            idle_timeout=float(os.environ.get("JCR_POOL_IDLE_TIMEOUT", "300"))
+        )
+        _local.pool = pool
+        _all_pools.append(pool)
+    return pool
+
+def close_default_pool():
+    """Closes the calling thread's default pool (e.g. before a worker thread exits)."""
+    pool = getattr(_local, "pool", None)
+    if pool is not None:
+        pool.close()
+        _local.pool = None
+        if pool in _all_pools:
+            _all_pools.remove(pool)
+
+@atexit.register
+def _close_pools_at_exit():
+    for pool in list(_all_pools):
+        if pool._owner == threading.get_ident():
+            try:
+                pool.close()
+            except Exception:
+                pass
@@ -1,64 +1,531 @@
 
+import os
 import sys
 import json
 import time
-import re
+import datetime
 import urllib.parse
-from playwright.sync_api import sync_playwright
+from contextlib import contextmanager
+import jcr_cancel
+import jcr_instrument
+from browser_pool import get_default_pool
+from jcr_cache import get_year_cache, get_profile_cache
+from jcr_capture import ProfileCapture, sorted_history
+from jcr_html import parse_jci_text, parse_history_rows
 from journal_shortname_resolver import get_journal_shortname
 
-def get_jcr_data(journal_name, target_year=None):
-    print(f"DEBUG: get_jcr_data called with year={target_year}", file=sys.stderr)
-    with sync_playwright() as p:
-        launch_args = {
-            "headless": True,
-            "args": ["--no-sandbox", "--disable-blink-features=AutomationControlled"]
+CONTENT_SELECTOR = ".jif-section, p.title, .metric-value"
+COOKIE_SELECTOR = "button#onetrust-accept-btn-handler, button:has-text('Accept All'), button:has-text('Allow all')"
+FIRST_JCR_YEAR = 1997
+YEAR_LIST_KEYS = {"years", "jcryears", "availableyears", "yearlist", "jcryearlist"}
+
+# Year selector options plus the currently selected year, if rendered. Only
+# option lists (a <select>, or a mat-select's overlay panel) whose every
+# entry is a year count, so other dropdowns on the page are ignored.
+YEAR_DOM_JS = r"""() => {
+    const text = (n) => (n.innerText || n.textContent || "").trim();
+    const isYear = (t) => /^(19|20)\d{2}$/.test(t);
+    const out = new Set();
+    const lists = [];
+    for (const sel of document.querySelectorAll("select")) {
+        lists.push(Array.from(sel.options, text));
+    }
+    for (const panel of document.querySelectorAll(".mat-select-panel, .mat-mdc-select-panel, [role='listbox']")) {
+        lists.push(Array.from(panel.querySelectorAll("mat-option, [role='option']"), text));
+    }
+    for (const list of lists) {
+        if (list.length && list.every(isYear)) list.forEach(t => out.add(parseInt(t, 10)));
+    }
+    // Selected value of a year mat-select, or a year selector's label ("JCR Year 2024")
+    for (const n of document.querySelectorAll("mat-select .mat-select-value-text, mat-select .mat-mdc-select-value-text, [class*='year-select'], [class*='year-dropdown']")) {
+        const m = text(n).match(/\b(19|20)\d{2}\b/g);
+        if (m && m.length === 1) out.add(parseInt(m[0], 10));
+    }
+    return Array.from(out);
+}"""
+
+# Cell texts of the "Key Indicators" table rows, for jcr_html.parse_history_rows
+KEY_INDICATORS_JS = r"""() => {
+    const byText = (t) => document.evaluate(
+        "//*[contains(text(), " + JSON.stringify(t) + ")]", document, null,
+        XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    for (const t of ["Key Indicators", "Journal Impact Factor"]) {
+        const el = byText(t);
+        if (!el) continue;
+        let table = ["TH", "TD", "TR", "THEAD"].includes(el.tagName) ? el.closest("table") : null;
+        if (!table) {
+            table = document.evaluate("following::table", el, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
         }
-        # Check for explicit executable path (useful for frozen app)
-        import os
-        exec_path = os.environ.get("PLAYWRIGHT_CHROMIUM_EXECUTABLE_PATH")
-        if exec_path and os.path.exists(exec_path):
-            launch_args["executable_path"] = exec_path
-            
-        browser = p.chromium.launch(**launch_args)
-        context = browser.new_context(
-            user_agent="Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            viewport={"width": 1280, "height": 720}
-        )
-        page = context.new_page()
+        if (!table) continue;
+        return Array.from(table.querySelectorAll("tbody tr"),
+                          tr => Array.from(tr.querySelectorAll("td"), td => td.innerText.trim()));
+    }
+    return [];
+}"""
+
+def profile_url(journal_name, year=None):
+    url = f"https://jcr.clarivate.com/jcr-jp/journal-profile?journal={urllib.parse.quote(journal_name)}"
+    if year:
+        url += f"&year={year}"
+    return url + "&fromPage=%2Fjcr%2Fhome"
+
+def _accept_cookies(page):
+    try:
+        cookie_btn = page.locator(COOKIE_SELECTOR).first
+        if cookie_btn.is_visible(timeout=5000):
+            cookie_btn.click()
+            # Banner fades out; done as soon as it is gone
+            cookie_btn.wait_for(state="hidden", timeout=2000)
+    except:
+        pass
+
+# Polled by wait_for_function: true once the ranking-table row count has
+# not changed for `quiet` ms. State lives on window under a per-call key.
+ROWS_STABLE_JS = """({key, quiet}) => {
+    const n = document.querySelectorAll("div.scroll-it tr").length;
+    const now = performance.now();
+    const s = window[key] || (window[key] = {n: -1, t: now});
+    if (s.n !== n) { s.n = n; s.t = now; return false; }
+    return now - s.t >= quiet;
+}"""
+
+CATEGORIES_CHANGED_JS = """(previous) => {
+    const now = Array.from(document.querySelectorAll(".category-value")).map(e => e.innerText.trim()).join("\\n");
+    return now !== previous;
+}"""
+
+# Walks the ranking section between the header and the stopper in one pass.
+# action "extract" returns {all: [category names on page], categories:
+# [{name, jciText, rows: [{year, rank, quartile, percentile}]}]} for the
+# categories inside the section; action "expand" clicks the "Rank by X
+# before..." link following each category in `names` and returns the count.
+SECTION_JS = r"""async ({action, sectionTitle, stopperTitle, metric, names}) => {
+    const byText = (t) => document.evaluate(
+        "//*[contains(text(), " + JSON.stringify(t) + ")]", document, null,
+        XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    const follows = (a, b) => (a.compareDocumentPosition(b) & Node.DOCUMENT_POSITION_FOLLOWING) !== 0;
+    const header = byText(sectionTitle);
+    if (!header) return null;
+    const stopper = stopperTitle ? byText(stopperTitle) : null;
+
+    const cats = Array.from(document.querySelectorAll(".category-value"));
+    const all = cats.map(c => c.innerText.trim());
+    const inSection = [];
+    cats.forEach((el, idx) => {
+        if (!all[idx] || !follows(header, el)) return;
+        if (stopper && follows(stopper, el)) return;
+        inSection.push(idx);
+    });
+
+    if (action === "expand") {
+        const label = "Rank by " + metric + " before";
+        const links = Array.from(document.querySelectorAll("strong, a")).filter(n => n.textContent.includes(label));
+        let clicked = 0;
+        for (const idx of inSection) {
+            if (!names.includes(all[idx])) continue;
+            const after = links.filter(n => follows(cats[idx], n));
+            const link = after.find(n => n.tagName === "STRONG" && n.offsetParent !== null)
+                      || after.find(n => n.tagName === "A" && n.offsetParent !== null);
+            if (link) { link.click(); clicked++; }
+        }
+        return clicked;
+    }
+
+    const tables = Array.from(document.querySelectorAll("div[class*='scroll-it']"));
+    const out = [];
+    for (const idx of inSection) {
+        const el = cats[idx];
+        const next = idx < cats.length - 1 ? cats[idx + 1] : null;
+        const entry = {name: all[idx], jciText: "", rows: [], tables: []};
+        if (metric === "JCI") {
+            let sib = el.nextElementSibling;
+            for (let k = 0; k < 3 && sib; k++, sib = sib.nextElementSibling) {
+                const t = sib.innerText || "";
+                if (t.includes("JCR YEAR") || t.includes("JCI PERCENTILE")) { entry.jciText = t; break; }
+            }
+        }
+        for (const tbl of tables.filter(t => follows(el, t)).slice(0, 5)) {
+            if (stopper && follows(stopper, tbl)) break;
+            if (next && follows(next, tbl)) break;
+            tbl.scrollTo(0, 10000);
+            entry.tables.push(tbl);
+        }
+        out.push(entry);
+    }
+
+    // Let virtualised tables render the rows revealed by scrolling
+    await new Promise(r => requestAnimationFrame(() => r()));
+
+    for (const entry of out) {
+        for (const tbl of entry.tables) {
+            for (const tr of tbl.querySelectorAll("tr")) {
+                const tds = tr.querySelectorAll("td");
+                if (tds.length < 4) continue;
+                const year = tds[0].textContent.trim();
+                if (!/^\d{4}$/.test(year)) continue;
+                entry.rows.push({
+                    year: parseInt(year, 10),
+                    rank: tds[1].textContent.trim(),
+                    quartile: tds[2].textContent.trim(),
+                    percentile: tds[3].textContent.trim()
+                });
+            }
+        }
+        delete entry.tables;
+    }
+    return {all: all, categories: out};
+}"""
+
+class WaitBudget:
+    """
+    Caps the total time one scrape may spend in condition waits and logs
+    how long each step actually waited.
+    """
+
+    def __init__(self, max_wait=90.0):
+        self.max_wait = max_wait
+        self.remaining = max_wait
+        self.timings = []
+
+    def timeout_ms(self, step_max):
+        """Timeout for the next wait: step_max seconds, or less if the budget is nearly spent."""
+        # Never 0: Playwright treats a zero timeout as "wait forever"
+        return jcr_cancel.timeout_ms(max(1, int(min(step_max, self.remaining) * 1000)))
+
+    @contextmanager
+    def step(self, name):
+        jcr_cancel.check()
+        started = time.monotonic()
+        try:
+            with jcr_instrument.span(f"wait:{name}"):
+                yield
+        finally:
+            elapsed = time.monotonic() - started
+            self.remaining -= elapsed
+            self.timings.append((name, round(elapsed, 3)))
+            print(f"DEBUG: wait '{name}' took {elapsed:.2f}s ({max(self.remaining, 0):.1f}s budget left)", file=sys.stderr)
+
+class XhrTracker:
+    """Counts in-flight XHR/fetch requests on a page so waits can end when the data has arrived."""
+
+    def __init__(self, page):
+        self.inflight = 0
+        self.last_change = time.monotonic()
+        page.on("request", self._on_request)
+        page.on("requestfinished", self._on_done)
+        page.on("requestfailed", self._on_done)
+
+    def _is_xhr(self, request):
+        try:
+            return request.resource_type in ("xhr", "fetch")
+        except:
+            return False
+
+    def _on_request(self, request):
+        if self._is_xhr(request):
+            self.inflight += 1
+            self.last_change = time.monotonic()
+
+    def _on_done(self, request):
+        if self._is_xhr(request):
+            self.inflight = max(0, self.inflight - 1)
+            self.last_change = time.monotonic()
+
+    def wait_idle(self, page, timeout_ms, quiet=0.25):
+        """Returns True once no XHR has been in flight for `quiet` seconds."""
+        deadline = time.monotonic() + timeout_ms / 1000.0
+        while time.monotonic() < deadline:
+            jcr_cancel.check()
+            if self.inflight == 0 and time.monotonic() - self.last_change >= quiet:
+                return True
+            # Short poll that keeps Playwright's event loop pumping
+            page.wait_for_timeout(50)
+        return False
+
+def _wait_rows_stable(page, budget, name, step_max=3.0, quiet=300):
+    with budget.step(name):
+        try:
+            key = f"__jcrRows{time.monotonic_ns()}"
+            page.wait_for_function(ROWS_STABLE_JS, arg={"key": key, "quiet": quiet},
+                                   timeout=budget.timeout_ms(step_max), polling=100)
+        except:
+            pass
+
+def _wait_network_idle(page, tracker, budget, name, step_max=3.0):
+    with budget.step(name):
+        return tracker.wait_idle(page, budget.timeout_ms(step_max))
+
+def _wait_categories_changed(page, previous_texts, budget, step_max=4.0):
+    with budget.step("carousel next"):
+        try:
+            page.wait_for_function(CATEGORIES_CHANGED_JS, arg="\n".join(previous_texts),
+                                   timeout=budget.timeout_ms(step_max), polling="mutation")
+            return True
+        except:
+            return False
+
+def _open_profile(page, journal_name, year=None):
+    """Loads a journal-profile page. Returns True once profile content has rendered."""
+    url = profile_url(journal_name, year)
+    try:
+        print(f"Navigating to {url}...", file=sys.stderr)
+        with jcr_instrument.span("navigate", year=year):
+            page.goto(url, wait_until="networkidle", timeout=jcr_cancel.timeout_ms(45000))
+    except Exception as e:
+        print(f"Navigation failed for {year}: {e}", file=sys.stderr)
+        jcr_instrument.count("navigation_failures")
+        jcr_cancel.check()
+        return False
+    with jcr_instrument.span("cookies"):
+        _accept_cookies(page)
+    try:
+        with jcr_instrument.span("content"):
+            page.wait_for_selector(CONTENT_SELECTOR, timeout=jcr_cancel.timeout_ms(15000))
+        return True
+    except:
+        print(f"Timeout waiting for content on {year}", file=sys.stderr)
+        jcr_instrument.count("content_timeouts")
+        jcr_cancel.check()
+        return False
+
+def _valid_year(value):
+    try:
+        y = int(value)
+    except (TypeError, ValueError):
+        return None
+    if FIRST_JCR_YEAR <= y <= datetime.date.today().year:
+        return y
+    return None
+
+def years_from_payload(payload):
+    """Collects JCR years from any year-list field in a JSON payload, newest first."""
+    found = set()
+
+    def walk(node, depth):
+        if depth > 8:
+            return
+        if isinstance(node, dict):
+            for k, v in node.items():
+                if isinstance(k, str) and k.lower() in YEAR_LIST_KEYS and isinstance(v, list):
+                    for item in v:
+                        if isinstance(item, dict):
+                            item = item.get("year") or item.get("jcrYear") or item.get("value")
+                        y = _valid_year(item)
+                        if y:
+                            found.add(y)
+                else:
+                    walk(v, depth + 1)
+        elif isinstance(node, list):
+            for item in node:
+                walk(item, depth + 1)
+
+    walk(payload, 0)
+    return sorted(found, reverse=True)
+
+def year_from_url(url):
+    """The year= parameter of a profile URL, if it is a valid JCR year."""
+    params = urllib.parse.parse_qs(urllib.parse.urlparse(url).query)
+    return _valid_year(params.get("year", [None])[0])
+
+def collect_years(payload_years, dom_values, loaded_url=None):
+    """
+    Combines what a default-year profile load revealed: years from its
+    JSON, YEAR_DOM_JS values and, if the page loaded, the URL it settled on.
+
+    Returns:
+        (years, loaded_year) as discover_years does.
+    """
+    years = set(payload_years)
+    years.update(y for y in (_valid_year(v) for v in dom_values or []) if y)
+    loaded_year = year_from_url(loaded_url) if loaded_url else None
+    if loaded_year:
+        years.add(loaded_year)
+    return sorted(years, reverse=True), loaded_year
+
+def probe_years():
+    """Years to try one at a time when discovery finds none, newest first."""
+    return list(range(datetime.date.today().year, 2019, -1))
+
+def probed_year_list(latest_year, dom_values, url=None):
+    """
+    Year list to cache after probing found latest_year: it plus the older
+    years the page's year selector offers (newer ones failed the probe).
+    """
+    years, _ = collect_years([], dom_values, url)
+    return sorted({y for y in years if y <= latest_year} | {latest_year}, reverse=True)
+
+def remember_years(journal_name, years, year_cache=None):
+    """
+    Stores a year list in the year cache if it is usable: non-empty and
+    only 4-digit years. Returns True if it was stored.
+    """
+    if not years or not all(isinstance(y, int) and 1000 <= y <= 9999 for y in years):
+        print(f"Not caching year list {years!r} for '{journal_name}'.", file=sys.stderr)
+        return False
+    (year_cache or get_year_cache()).put(journal_name, sorted(set(years), reverse=True))
+    return True
+
+def discover_years(page, journal_name):
+    """
+    Learns which JCR years exist for a journal with a single page load.
+
+    Loads the profile without a year so the SPA picks its default, and
+    collects years from the JSON it fetches, the year selector and the
+    URL it settles on.
+
+    Returns:
+        (years, loaded_year): years newest first (empty if nothing was
+        found) and the year the page ended up showing, if known.
+    """
+    payload_years = set()
+
+    def on_response(response):
+        try:
+            if "json" in response.headers.get("content-type", "").lower():
+                payload_years.update(years_from_payload(response.json()))
+        except:
+            pass
+
+    page.on("response", on_response)
+    try:
+        loaded = _open_profile(page, journal_name)
+    finally:
+        page.remove_listener("response", on_response)
+
+    try:
+        dom_values = page.evaluate(YEAR_DOM_JS)
+    except:
+        dom_values = []
+    return collect_years(payload_years, dom_values, page.url if loaded else None)
+
+def get_jcr_data(journal_name, target_year=None, pool=None, mode="auto", max_wait=90.0, js_extract=True,
+                 known_data=None, on_event=None, instrument=None, cancel=None, timeout=None, on_page=None):
+    """
+    Scrapes the JCR journal profile for the latest available year.
+
+    Args:
+        journal_name: JCR short name (e.g. "BIOETHICS").
+        target_year: If given, also fetch the JIF for that specific year.
+        pool: BrowserPool to borrow a context from (default: this thread's).
+        mode: "auto" builds the result from the JSON the profile page
+            fetches and falls back to DOM scraping for any section the
+            JSON didn't cover (or, when history is wanted, covered only the
+            latest year); "network" uses captured JSON only; "dom"
+            scrapes the rendered page only.
+        max_wait: Total seconds the ranking extraction may spend waiting
+            for the page to settle (carousel paging, history expansion).
+        js_extract: Read each ranking carousel page with a single in-page
+            script; False uses the per-element Playwright path (also the
+            automatic fallback if the script fails).
+        known_data: Previously stored result (from load_csv or the cache).
+            If its history already covers every year but the latest, the
+            history expansion is skipped and the fresh latest-year rows are
+            merged into it (incremental refresh).
+        on_event: Called with each piece of the result as soon as it is
+            extracted: {"type": "category", "journal", "metric", "category",
+            "rows"} per ranking category, then {"type": "history", ...} and
+            finally {"type": "metrics", ...}. With known_data the events
+            describe the merged result and are sent once it is complete.
+        instrument: jcr_instrument.Instrumentation that collects per-phase
+            timings and counters (navigations, evaluate calls, sleeps,
+            retries, bytes received) for this scrape; read them with its
+            record(). Without one, get_jcr_data creates its own and, if the
+            JCR_INSTRUMENT_JSONL environment variable is set, appends its
+            record to that file; a caller passing an instrument exports it.
+        cancel: jcr_cancel.CancelToken; cancelling it (from any thread)
+            stops the scrape at the next wait or loop step.
+        timeout: Deadline in seconds for the whole scrape. Every wait is
+            shortened so none outlives it.
+        on_page: Called as on_page(page, metrics) once the latest-year
+            profile has been extracted, before any target-year navigation
+            (e.g. jcr_replay saving its DOM).
+
+    Returns:
+        {"metrics", "rankings", "jci_rankings"} or None if no profile was found.
+
+    Raises:
+        jcr_cancel.Cancelled: The token was cancelled
+            (jcr_cancel.DeadlineExceeded once the timeout has passed). The
+            page is closed as the pooled context is released.
+    """
+    print(f"DEBUG: get_jcr_data called with year={target_year}", file=sys.stderr)
+    if pool is None:
+        pool = get_default_pool()
+    # Only instrumentation created here is exported here; callers export their own
+    export_path = os.environ.get("JCR_INSTRUMENT_JSONL") if instrument is None else None
+    if instrument is None:
+        instrument = jcr_instrument.Instrumentation(journal_name)
+    try:
+        with instrument.activate(), jcr_cancel.scope(cancel, timeout):
+            return _get_jcr_data(journal_name, target_year, pool, mode, max_wait, js_extract,
+                                 known_data, on_event, instrument, on_page)
+    finally:
+        record = instrument.record()
+        print(f"DEBUG: phases {record['phases']} counters {record['counters']}", file=sys.stderr)
+        if export_path:
+            jcr_instrument.export_jsonl(record, export_path)
+
+def _get_jcr_data(journal_name, target_year, pool, mode, max_wait, js_extract, known_data, on_event, instrument,
+                  on_page):
+    def phase(name):
+        jcr_cancel.check()
+        instrument.phase(name)
+
+    with pool.context() as context:
+        phase("open_page")
+        page = instrument.attach(context.new_page())
+        capture = ProfileCapture(page).attach() if mode != "dom" else None
+        xhr_tracker = XhrTracker(page)
+        wait_budget = WaitBudget(max_wait)
+
+        def open_profile(year=None):
+            # Only the page that ends up being the profile may feed the capture
+            if capture:
+                capture.reset()
+            return _open_profile(page, journal_name, year)
         
-        current_year = 2025
         latest_year = None
         
+        phase("year_discovery")
         print(f"Checking for latest available year for '{journal_name}'...", file=sys.stderr)
-        encoded_name = urllib.parse.quote(journal_name)
-        
-        for year in range(current_year, 2019, -1):
-            url = f"https://jcr.clarivate.com/jcr-jp/journal-profile?journal={encoded_name}&year={year}&fromPage=%2Fjcr%2Fhome"
-            try:
-                print(f"Navigating to {url}...", file=sys.stderr)
-                page.goto(url, wait_until="networkidle", timeout=45000)
-                try:
-                    cookie_btn = page.locator("button#onetrust-accept-btn-handler, button:has-text('Accept All'), button:has-text('Allow all')").first
-                    if cookie_btn.is_visible(timeout=5000):
-                        cookie_btn.click()
-                        time.sleep(2)
-                except:
-                    pass
+        year_cache = get_year_cache()
+        years = year_cache.get(journal_name)
+        if years:
+            print(f"Year cache hit: latest year {years[0]}", file=sys.stderr)
+            if open_profile(years[0]):
+                latest_year = years[0]
+            else:
+                year_cache.invalidate(journal_name)
 
-                try:
-                    page.wait_for_selector(".jif-section, p.title, .metric-value", timeout=15000)
+        if not latest_year:
+            if capture:
+                capture.reset()
+            years, loaded_year = discover_years(page, journal_name)
+            if years:
+                print(f"Discovered years: {years}", file=sys.stderr)
+                # Cached only once the newest year has actually opened
+                if loaded_year == years[0] or open_profile(years[0]):
+                    latest_year = years[0]
+                    remember_years(journal_name, years, year_cache)
+
+        if not latest_year:
+            # Discovery failed; fall back to probing year by year
+            for year in probe_years():
+                jcr_cancel.check()
+                instrument.count("year_probes")
+                if open_profile(year):
                     latest_year = year
                     break
+            if latest_year:
+                # Cache the probe's answer so the next run doesn't probe again
+                try:
+                    dom_values = page.evaluate(YEAR_DOM_JS)
                 except:
-                    print(f"Timeout waiting for content on {year}", file=sys.stderr)
-                    continue
-            except:
-                 pass
+                    dom_values = []
+                remember_years(journal_name, probed_year_list(latest_year, dom_values, page.url), year_cache)
         
         if not latest_year:
             print("Could not find any valid data.", file=sys.stderr)
-            browser.close()
             return None
 
         metrics = {
@@ -69,18 +536,144 @@ def get_jcr_data(journal_name, target_year=None):
             "jif_percentile": "N/A"
         }
 
-        try:
-            jif_val_el = page.locator("div.jif-values p.value").first
-            if jif_val_el.is_visible():
-                 metrics["jif"] = jif_val_el.inner_text().strip()
+        captured = None
+        if capture:
+            phase("capture")
+            capture.load_lazy_sections()
+            capture.detach()
+            captured = capture.build(journal_name, latest_year)
+            for key in ("jif", "five_year_jif"):
+                metrics[key] = captured["metrics"][key]
+
+        if mode != "network" and "N/A" in (metrics["jif"], metrics["five_year_jif"]):
+            phase("metrics_dom")
+            try:
+                jif_val_el = page.locator("div.jif-values p.value").first
+                if metrics["jif"] == "N/A" and jif_val_el.is_visible():
+                     metrics["jif"] = jif_val_el.inner_text().strip()
+
+                five_year_el = page.locator("p.five-yr-impact-factor-value").first
+                if metrics["five_year_jif"] == "N/A" and five_year_el.is_visible():
+                     metrics["five_year_jif"] = five_year_el.inner_text().strip()
+            except Exception as e:
+                print(f"Error metrics: {e}", file=sys.stderr)
+
+        # Live events only when nothing is merged in afterwards; an
+        # incremental run reports the merged result once it is complete
+        live_events = on_event if not known_data else None
+
+        def emit_category(metric_name, category, rows):
+            if live_events:
+                live_events({"type": "category", "journal": journal_name, "metric": metric_name,
+                             "category": category, "rows": rows})
+
+        def extract_carousel_data_js(section_title, stopper_title, expand_history, metric_name):
+            """
+            Same result as the per-element extractor, but each carousel page is
+            read with one page.evaluate. Returns None if the in-page pass fails.
+            """
+            rankings_data = {}
+            args = {"action": "extract", "sectionTitle": section_title, "stopperTitle": stopper_title,
+                    "metric": metric_name, "names": []}
+
+            print(f"Extracting data for section: '{section_title}' (in-page)", file=sys.stderr)
 
-            five_year_el = page.locator("p.five-yr-impact-factor-value").first
-            if five_year_el.is_visible():
-                 metrics["five_year_jif"] = five_year_el.inner_text().strip()
-        except Exception as e:
-            print(f"Error metrics: {e}", file=sys.stderr)
+            header = page.locator(f"xpath=//*[contains(text(), '{section_title}')]").first
+            if not header.is_visible():
+                print(f"Header '{section_title}' not found.", file=sys.stderr)
+                return {}
+            header.scroll_into_view_if_needed()
+
+            with wait_budget.step("categories rendered"):
+                try:
+                    page.wait_for_selector(".category-value", timeout=wait_budget.timeout_ms(5))
+                except:
+                    pass
+
+            def snapshot():
+                try:
+                    return page.evaluate(SECTION_JS, args)
+                except Exception as e:
+                    print(f"In-page extraction failed: {e}", file=sys.stderr)
+                    return None
+
+            expanded = set()
+            for i in range(15):
+                jcr_cancel.check()
+                snap = snapshot()
+                if snap is None:
+                    return None
+                cat_texts = snap["all"]
+                print(f"Iteration {i}: found {len(cat_texts)} cats.", file=sys.stderr)
+
+                found_new_data = False
+                if metric_name == "JCI":
+                    for entry in snap["categories"]:
+                        if entry["name"] in rankings_data:
+                            continue
+                        c_rows = parse_jci_text(entry["jciText"])
+                        if c_rows:
+                            rankings_data[entry["name"]] = sorted_history(c_rows)
+                            emit_category(metric_name, entry["name"], rankings_data[entry["name"]])
+                            found_new_data = True
+                            print(f"  Extracted {len(rankings_data[entry['name']])} years (Sibling Text) for {entry['name']}", file=sys.stderr)
+
+                pending = [e for e in snap["categories"] if e["name"] not in rankings_data]
+                if pending and (metric_name == "JIF" or not found_new_data):
+                    to_expand = [e["name"] for e in pending if e["name"] not in expanded]
+                    if expand_history and to_expand:
+                        expanded.update(to_expand)
+                        try:
+                            clicked = page.evaluate(SECTION_JS, dict(args, action="expand", names=to_expand))
+                        except Exception as e:
+                            print(f"History expansion failed: {e}", file=sys.stderr)
+                            clicked = 0
+                        if clicked:
+                            _wait_network_idle(page, xhr_tracker, wait_budget, "expand history")
+                            _wait_rows_stable(page, wait_budget, "history rows")
+                            snap = snapshot()
+                            if snap is None:
+                                return None
+                            pending = [e for e in snap["categories"] if e["name"] not in rankings_data]
+
+                    for entry in pending:
+                        if entry["rows"]:
+                            rankings_data[entry["name"]] = sorted_history(entry["rows"])
+                            emit_category(metric_name, entry["name"], rankings_data[entry["name"]])
+                            found_new_data = True
+                            print(f"  Extracted {len(rankings_data[entry['name']])} years for {entry['name']}", file=sys.stderr)
+
+                next_btn = header.locator("xpath=following::*[contains(@class, 'next') or @title='Next button']").first
+                if next_btn and next_btn.is_visible():
+                    try:
+                        next_btn.evaluate("el => el.click()")
+                        if not _wait_categories_changed(page, cat_texts, wait_budget):
+                            break
+                        _wait_network_idle(page, xhr_tracker, wait_budget, "carousel data")
+                    except:
+                        pass
+                else:
+                    break
+
+                if not found_new_data and i > 2:
+                     break
+
+                if wait_budget.remaining <= 0:
+                    print(f"Wait budget of {wait_budget.max_wait:.0f}s exhausted, stopping carousel.", file=sys.stderr)
+                    break
+
+            return rankings_data
 
         def extract_carousel_data(section_title, stopper_title=None, expand_history=True, metric_name="JIF"):
+            if js_extract:
+                result = extract_carousel_data_js(section_title, stopper_title, expand_history, metric_name)
+                if result is not None:
+                    return result
+                print("Falling back to per-element extraction.", file=sys.stderr)
+                instrument.count("js_fallbacks")
+            return extract_carousel_data_per_element(section_title, stopper_title, expand_history, metric_name)
+
+        def extract_carousel_data_per_element(section_title, stopper_title=None, expand_history=True, metric_name="JIF"):
             rankings_data = {}
             processed_cats = set()
             
@@ -92,17 +685,17 @@ def get_jcr_data(journal_name, target_year=None):
                 return {}
             
             header.scroll_into_view_if_needed()
-            time.sleep(2)
             
             header_handle = header.element_handle()
             if not header_handle:
                  print("Error: Could not get header handle", file=sys.stderr)
                  return {}
             
-            try:
-                page.wait_for_selector(".category-value", timeout=5000)
-            except:
-                pass
+            with wait_budget.step("categories rendered"):
+                try:
+                    page.wait_for_selector(".category-value", timeout=wait_budget.timeout_ms(5))
+                except:
+                    pass
 
             stopper_exists = False
             stopper_handle = None
@@ -113,6 +706,7 @@ def get_jcr_data(journal_name, target_year=None):
                     stopper_handle = s_locator.element_handle()
             
             for i in range(15):
+                jcr_cancel.check()
                 cat_els = page.locator(".category-value").all()
                 cat_texts = [c.inner_text().strip() for c in cat_els]
                 print(f"Iteration {i}: found {len(cat_texts)} cats.", file=sys.stderr)
@@ -151,6 +745,7 @@ def get_jcr_data(journal_name, target_year=None):
                 # Check for JCI sibling data parsing first
                 if metric_name == "JCI":
                     for idx in relevant_indices:
+                        jcr_cancel.check()
                         cat_name = cat_texts[idx]
                         if cat_name in processed_cats: continue
                         
@@ -167,25 +762,14 @@ def get_jcr_data(journal_name, target_year=None):
                                     break
                             except: pass
                         
-                        if jci_text:
-                            # Parse with RegEx
-                            matches = re.findall(r"(\d{4})\s+(\S+)\s+(\S+)\s+(\S+)", jci_text)
-                            if matches:
-                                c_rows = []
-                                for m in matches:
-                                    c_rows.append({
-                                        "year": int(m[0]),
-                                        "rank": m[1],
-                                        "quartile": m[2],
-                                        "percentile": m[3]
-                                    })
-                                
-                                unique_history = {h['year']: h for h in c_rows}
-                                sorted_hist = sorted(unique_history.values(), key=lambda x: x['year'], reverse=True)
-                                rankings_data[cat_name] = sorted_hist
-                                processed_cats.add(cat_name)
-                                found_new_data = True
-                                print(f"  Extracted {len(sorted_hist)} years (Sibling Text) for {cat_name}", file=sys.stderr)
+                        c_rows = parse_jci_text(jci_text)
+                        if c_rows:
+                            sorted_hist = sorted_history(c_rows)
+                            rankings_data[cat_name] = sorted_hist
+                            emit_category(metric_name, cat_name, sorted_hist)
+                            processed_cats.add(cat_name)
+                            found_new_data = True
+                            print(f"  Extracted {len(sorted_hist)} years (Sibling Text) for {cat_name}", file=sys.stderr)
                     
                     if found_new_data:
                          pass
@@ -201,7 +785,7 @@ def get_jcr_data(journal_name, target_year=None):
                             if expand_link.is_visible():
                                 try:
                                     expand_link.click(force=True)
-                                    time.sleep(2.0)
+                                    _wait_network_idle(page, xhr_tracker, wait_budget, f"expand {cat_texts[idx]}")
                                 except:
                                     pass
                             else:
@@ -209,12 +793,13 @@ def get_jcr_data(journal_name, target_year=None):
                                 if expand_link_a.is_visible():
                                     try:
                                         expand_link_a.click(force=True)
-                                        time.sleep(2.0)
+                                        _wait_network_idle(page, xhr_tracker, wait_budget, f"expand {cat_texts[idx]}")
                                     except:
                                         pass
-                        time.sleep(2)
+                        _wait_rows_stable(page, wait_budget, "history rows")
 
                     for idx in relevant_indices:
+                        jcr_cancel.check()
                         cat_name = cat_texts[idx]
                         if cat_name in processed_cats: continue
                         
@@ -251,7 +836,7 @@ def get_jcr_data(journal_name, target_year=None):
                         for tbl in my_tables:
                              try:
                                 tbl.evaluate("el => el.scrollTo(0, 10000)")
-                                time.sleep(0.1)
+                                jcr_instrument.sleep(0.1)
                              except: pass
                              rows = tbl.locator("tr").all()
                              for row in rows:
@@ -269,6 +854,7 @@ def get_jcr_data(journal_name, target_year=None):
                             unique_history = {h['year']: h for h in c_rows}
                             sorted_hist = sorted(unique_history.values(), key=lambda x: x['year'], reverse=True)
                             rankings_data[cat_name] = sorted_hist
+                            emit_category(metric_name, cat_name, sorted_hist)
                             processed_cats.add(cat_name)
                             found_new_data = True
                             print(f"  Extracted {len(sorted_hist)} years for {cat_name}", file=sys.stderr)
@@ -277,7 +863,8 @@ def get_jcr_data(journal_name, target_year=None):
                 if next_btn and next_btn.is_visible():
                     try:
                         next_btn.evaluate("el => el.click()")
-                        time.sleep(3)
+                        if _wait_categories_changed(page, cat_texts, wait_budget):
+                            _wait_network_idle(page, xhr_tracker, wait_budget, "carousel data")
                         new_cat_els = page.locator(".category-value").all()
                         new_texts = [c.inner_text().strip() for c in new_cat_els]
                         if set(new_texts) == set(cat_texts): 
@@ -289,75 +876,58 @@ def get_jcr_data(journal_name, target_year=None):
                 
                 if not found_new_data and i > 2:
                      break
+
+                if wait_budget.remaining <= 0:
+                    print(f"Wait budget of {wait_budget.max_wait:.0f}s exhausted, stopping carousel.", file=sys.stderr)
+                    break
             
             return rankings_data
 
-        jif_rankings = extract_carousel_data("Rank by Journal Impact Factor", stopper_title="Rank by Journal Citation Indicator (JCI)", expand_history=True, metric_name="JIF")
-        jci_rankings = extract_carousel_data("Rank by Journal Citation Indicator (JCI)", stopper_title="Contributions by Organization", expand_history=True, metric_name="JCI")
-        
+        # Captured JSON first; DOM scraping only for sections it didn't cover
+        # Incremental runs skip the "Rank by ... before" expansion when the
+        # stored history already reaches the year before the latest one
+        expand = not (known_data and history_complete(known_data, latest_year))
+        if not expand:
+            print(f"Stored history is complete through {latest_year - 1}; fetching latest year only.", file=sys.stderr)
+        # Captured rows that only cover the latest year (the JSON didn't carry
+        # the history) still go through the DOM when history is wanted
+        def use_captured(label, rows):
+            if not rows:
+                return False
+            if mode == "network" or not expand or _reaches_before(rows, latest_year):
+                return True
+            print(f"Captured {label} has no years before {latest_year}; reading the page instead.", file=sys.stderr)
+            instrument.count("capture_fallbacks")
+            return False
+
+        def section_rankings(metric_name, key, section_title, stopper_title):
+            captured_rankings = captured[key] if captured else {}
+            if not use_captured(f"{metric_name} rankings", [r for rows in captured_rankings.values() for r in rows]):
+                if mode != "network":
+                    phase(f"carousel_{metric_name.lower()}")
+                    rankings_data = extract_carousel_data(section_title, stopper_title=stopper_title, expand_history=expand, metric_name=metric_name)
+                    if rankings_data:
+                        return rankings_data
+            for cat, rows in captured_rankings.items():
+                emit_category(metric_name, cat, rows)
+            return captured_rankings
+
+        jif_rankings = section_rankings("JIF", "rankings", "Rank by Journal Impact Factor", "Rank by Journal Citation Indicator (JCI)")
+        jci_rankings = section_rankings("JCI", "jci_rankings", "Rank by Journal Citation Indicator (JCI)", "Contributions by Organization")
+
         # New: Scrape history of JIF values
-        jif_history = []
-        try:
-             # Strategy 1: Look for "Key Indicators"
-             # Strategy 2: Look for "Journal Impact Factor" text which should be a column header
-             print("DEBUG: Searching for JIF history table...", file=sys.stderr)
-             
-             targets = ["Key Indicators", "Journal Impact Factor"]
-             found_table = None
-             
-             for t in targets:
-                 try:
-                     el = page.locator(f"xpath=//*[contains(text(), '{t}')]").first
-                     if el.is_visible():
-                         print(f"DEBUG: Found text '{t}'. Looking for parent table...", file=sys.stderr)
-                         # It might be IN a table (th) or ABOVE a table
-                         # Check if it IS a TH/TD
-                         tag = el.evaluate("el => el.tagName")
-                         if tag in ["TH", "TD", "TR", "THEAD"]:
-                              found_table = el.locator("xpath=ancestor::table").first
-                         else:
-                              found_table = el.locator("xpath=following::table").first
-                         
-                         if found_table.is_visible():
-                             break
-                 except:
-                     pass
-            
-             if found_table:
-                  rows = found_table.locator("tbody tr").all()
-                  print(f"DEBUG: Found table with {len(rows)} rows.", file=sys.stderr)
-                  for row in rows:
-                       cells = row.locator("td").all()
-                       if len(cells) > 1:
-                            y_text = cells[0].inner_text().strip()
-                            
-                            # Heuristic: Find JIF column
-                            # Usually col 2 (index 1) or 3 (index 2)
-                            # Let's iterate cells to find the matching decimal/number
-                            # Or just grab index 2 as per previous
-                            
-                            jif_val = "N/A"
-                            if len(cells) >= 3:
-                                 # strict
-                                 jif_val = cells[2].inner_text().strip()
-                            
-                            # If that failed or is not a number, try other cells?
-                            # Let's stick to index 2 for now, or index 1?
-                            # Check header? Too complex for quick fix.
-                            # Just try to parse.
-                            
-                            if y_text.isdigit():
-                                 jif_history.append({
-                                      "year": int(y_text),
-                                      "jif": jif_val
-                                 })
-                                 print(f"DEBUG: Extracted {y_text}: {jif_val}", file=sys.stderr)
-             else:
-                  # Fallback: Print all visible text to debug?
-                  print("DEBUG: Could not locate JIF table.", file=sys.stderr)
-                  
-        except Exception as e:
-             print(f"Error extracting history: {e}", file=sys.stderr)
+        captured_history = list(captured["metrics"].get("history", [])) if captured else []
+        jif_history = captured_history if use_captured("JIF history", captured_history) else []
+        if not jif_history and mode != "network":
+            phase("jif_history")
+            print("DEBUG: Searching for JIF history table...", file=sys.stderr)
+            try:
+                jif_history = parse_history_rows(page.evaluate(KEY_INDICATORS_JS))
+                print(f"DEBUG: Extracted {len(jif_history)} JIF history rows.", file=sys.stderr)
+            except Exception as e:
+                print(f"Error extracting history: {e}", file=sys.stderr)
+        if not jif_history:
+            jif_history = captured_history
 
         if metrics["jif_percentile"] == "N/A" and jif_rankings:
              first_cat = list(jif_rankings.keys())[0]
@@ -368,21 +938,36 @@ def get_jcr_data(journal_name, target_year=None):
 
         # Attach history
         metrics["history"] = jif_history
+        if live_events:
+            live_events({"type": "history", "journal": journal_name, "history": jif_history})
+
+        # Latest-year profile fully extracted; the target-year step may navigate away
+        if on_page:
+            on_page(page, metrics)
 
-        print("DEBUG: Approaching JIF navigation block...", file=sys.stderr)
-        # EXPLICIT NAVIGATION FOR TARGET YEAR JIF
+        # Answer the target-year JIF from data already fetched where possible:
+        # the latest-year headline, the JIF history (captured JSON or Key
+        # Indicators table), then stored data from an earlier run.
         if target_year:
-             print(f"DEBUG: Inside block. Navigating to specific year {target_year} to get JIF...", file=sys.stderr)
+            history_source = "capture" if captured_history and jif_history is captured_history else "history"
+            stored_history = known_data.get("metrics", {}).get("history", []) if known_data else None
+            if answer_target_year(metrics, target_year, jif_history, history_source, stored_history):
+                print(f"Target year {target_year} JIF {metrics['specific_year_jif']} from {metrics['specific_year_source']}, no navigation needed.", file=sys.stderr)
+
+        # EXPLICIT NAVIGATION FOR TARGET YEAR JIF (only if not answered above)
+        if target_year and metrics.get("specific_year") != target_year:
+             phase("target_year")
+             instrument.count("target_year_navigations")
+             print(f"DEBUG: Target year JIF not in fetched data. Navigating to specific year {target_year} to get JIF...", file=sys.stderr)
              try:
-                 encoded_name_yr = urllib.parse.quote(journal_name)
-                 url_yr = f"https://jcr.clarivate.com/jcr-jp/journal-profile?journal={encoded_name_yr}&year={target_year}&fromPage=%2Fjcr%2Fhome"
-                 page.goto(url_yr, wait_until="domcontentloaded", timeout=45000)
+                 url_yr = profile_url(journal_name, target_year)
+                 page.goto(url_yr, wait_until="domcontentloaded", timeout=jcr_cancel.timeout_ms(45000))
                  
                  found = False
 
                  # Wait for JIF value to actually populate (async loading)
                  try:
-                      page.wait_for_selector("text=JOURNAL IMPACT FACTOR", timeout=10000)
+                      page.wait_for_selector("text=JOURNAL IMPACT FACTOR", timeout=jcr_cancel.timeout_ms(10000))
                       # Spin loop for text in .value
                       for _ in range(20):
                            # Check .jif-values .value
@@ -393,10 +978,12 @@ def get_jcr_data(journal_name, target_year=None):
                                    print(f"Extracted specific JIF via poll for {target_year}: {txt}", file=sys.stderr)
                                    metrics["specific_year_jif"] = txt
                                    metrics["specific_year"] = target_year
+                                   metrics["specific_year_source"] = "navigation"
                                    found = True
                                    break
-                           time.sleep(0.5)
+                           jcr_instrument.sleep(0.5)
                  except: pass
+                 jcr_cancel.check()
                  
                  # Try 1: Look for the specific label and the next element via JS (Backup)
                  if not found:
@@ -439,6 +1026,7 @@ def get_jcr_data(journal_name, target_year=None):
                                   print(f"Extracted specific JIF via JS for {target_year}: {jif_val}", file=sys.stderr)
                                   metrics["specific_year_jif"] = jif_val
                                   metrics["specific_year"] = target_year
+                                  metrics["specific_year_source"] = "navigation"
                                   found = True
                      except Exception as e:
                          print(f"JS extraction error: {e}", file=sys.stderr)
@@ -451,41 +1039,279 @@ def get_jcr_data(journal_name, target_year=None):
                              print(f"Extracted specific JIF (fallback) for {target_year}: {val}", file=sys.stderr)
                              metrics["specific_year_jif"] = val
                              metrics["specific_year"] = target_year
+                             metrics["specific_year_source"] = "navigation"
                              found = True
                              
                  if not found:
+                     metrics["specific_year_source"] = "missing"
                      print(f"JIF value element not found for year {target_year}", file=sys.stderr)
              except Exception as e:
                  print(f"Failed to extract specific JIF: {e}", file=sys.stderr)
+                 metrics["specific_year_source"] = "missing"
 
-        browser.close()
-
-        return {
+        # Steps above swallow their own errors; don't return a partial result
+        # for a scrape that was cancelled along the way
+        jcr_cancel.check()
+        result = {
             "metrics": metrics,
             "rankings": jif_rankings,
             "jci_rankings": jci_rankings
         }
+        if known_data:
+            phase("merge")
+            result = merge_jcr_data(known_data, result)
+            if on_event:
+                for event in events_from_data(result):
+                    on_event(event)
+        elif on_event:
+            on_event({"type": "metrics", "journal": journal_name, "metrics": metrics})
+        return result
+
+def events_from_data(data):
+    """Yields the on_event events describing a finished result (e.g. a cache hit)."""
+    journal = data["metrics"]["journal"]
+    for metric, key in (("JIF", "rankings"), ("JCI", "jci_rankings")):
+        for cat, rows in data.get(key, {}).items():
+            yield {"type": "category", "journal": journal, "metric": metric, "category": cat, "rows": rows}
+    yield {"type": "history", "journal": journal, "history": data["metrics"].get("history", [])}
+    yield {"type": "metrics", "journal": journal, "metrics": data["metrics"]}
+
+def history_complete(stored, latest_year):
+    """
+    True if every stored JIF/JCI category already has rows up to
+    latest_year - 1, i.e. only the latest JCR year can be new.
+    """
+    if not stored.get("rankings"):
+        return False
+    for section in (stored.get("rankings", {}), stored.get("jci_rankings", {})):
+        for rows in section.values():
+            if not any(r["year"] >= latest_year - 1 for r in rows):
+                return False
+    return True
+
+def _reaches_before(rows, year):
+    """True if any row is for a year before `year`, i.e. the rows carry history."""
+    return any(isinstance(r.get("year"), int) and r["year"] < year for r in rows)
+
+def merge_jcr_data(stored, fresh):
+    """
+    Merges a fresh scrape into previously stored data. Fresh rows replace
+    stored rows for the same category and year; stored-only categories,
+    years and JIF history entries are kept. Metrics come from the fresh scrape.
+    """
+    merged = {"metrics": dict(fresh["metrics"])}
+    for key in ("rankings", "jci_rankings"):
+        section = {}
+        old = stored.get(key, {})
+        new = fresh.get(key, {})
+        for cat in list(old.keys()) + [c for c in new.keys() if c not in old]:
+            section[cat] = sorted_history(old.get(cat, []) + new.get(cat, []))
+        merged[key] = section
+
+    history = {h["year"]: h for h in stored.get("metrics", {}).get("history", [])}
+    history.update({h["year"]: h for h in fresh["metrics"].get("history", [])})
+    merged["metrics"]["history"] = sorted(history.values(), key=lambda h: h["year"], reverse=True)
+    return merged
+
+def load_csv(filename):
+    """
+    Reads a save_csv file back into the get_jcr_data shape (rankings only;
+    metrics carry just the journal and the newest year present).
+    Returns None if the file doesn't exist or holds no rows.
+    """
+    import csv
+    rankings = {"JIF": {}, "JCI": {}}
+    journal = None
+    try:
+        with open(filename, mode='r', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                metric = row.get("Metric Type")
+                if metric not in rankings:
+                    continue
+                try:
+                    year = int(row.get("Year", ""))
+                except ValueError:
+                    continue
+                journal = journal or row.get("Journal")
+                rankings[metric].setdefault(row.get("Category"), []).append({
+                    "year": year,
+                    "rank": row.get("Rank", ""),
+                    "quartile": row.get("Quartile", ""),
+                    "percentile": row.get("Percentile", "")
+                })
+    except FileNotFoundError:
+        return None
+    if not journal:
+        return None
+    years = [r["year"] for section in rankings.values() for rows in section.values() for r in rows]
+    return {
+        "metrics": {"journal": journal, "year": max(years), "history": []},
+        "rankings": {c: sorted_history(r) for c, r in rankings["JIF"].items()},
+        "jci_rankings": {c: sorted_history(r) for c, r in rankings["JCI"].items()}
+    }
+
+def _jif_from_history(history, year):
+    # Only a numeric JIF counts; anything else ("N/A", "<0.1", ...) falls back to navigation
+    for h in history or []:
+        if h.get("year") == year and str(h.get("jif", "")).strip().replace('.', '', 1).isdigit():
+            return str(h["jif"]).strip()
+    return None
+
+def _set_specific_jif(metrics, year, jif, source):
+    """Records the target-year JIF and which path produced it (latest/history/capture/stored/cache/navigation)."""
+    metrics["specific_year_jif"] = jif
+    metrics["specific_year"] = year
+    metrics["specific_year_source"] = source
+
+def answer_target_year(metrics, target_year, history, history_source="history", stored_history=None):
+    """
+    Sets the target-year JIF from data a scrape already has: the latest-year
+    headline, then its JIF history (tagged history_source), then stored
+    history from an earlier run. Returns False if navigation is needed.
+    """
+    if target_year == metrics.get("year") and metrics.get("jif", "N/A") != "N/A":
+        _set_specific_jif(metrics, target_year, metrics["jif"], "latest")
+        return True
+    for source, candidates in ((history_source, history), ("stored", stored_history)):
+        jif_val = _jif_from_history(candidates, target_year)
+        if jif_val:
+            _set_specific_jif(metrics, target_year, jif_val, source)
+            return True
+    return False
+
+def apply_target_year(data, target_year, source="cache"):
+    """
+    Makes sure data["metrics"] carries the specific-year JIF for target_year,
+    using the JIF history if needed. Returns False if it isn't available.
+    """
+    metrics = data["metrics"]
+    if not target_year or metrics.get("specific_year") == target_year:
+        return True
+    if target_year == metrics.get("year") and metrics.get("jif", "N/A") != "N/A":
+        _set_specific_jif(metrics, target_year, metrics["jif"], source)
+        return True
+    jif_val = _jif_from_history(metrics.get("history"), target_year)
+    if jif_val:
+        _set_specific_jif(metrics, target_year, jif_val, source)
+        return True
+    return False
+
+def latest_year(journal_name, pool=None):
+    """
+    Returns the newest JCR year for the journal, or None if it can't be found.
+
+    Uses the year cache; once that has expired, re-runs year discovery
+    (one page load on `pool`) and caches the answer.
+    """
+    years = get_year_cache().get(journal_name)
+    if years:
+        return years[0]
+    if pool is None:
+        pool = get_default_pool()
+    with pool.page() as page:
+        years, loaded_year = discover_years(page, journal_name)
+        if years and (loaded_year == years[0] or _open_profile(page, journal_name, years[0])):
+            remember_years(journal_name, years)
+            return years[0]
+    return None
+
+def get_jcr_data_cached(journal_name, target_year=None, pool=None, mode="auto", refresh=False, cache=None,
+                        incremental=False, known_data=None, on_event=None, instrument=None, cancel=None,
+                        timeout=None):
+    """
+    get_jcr_data behind the on-disk ProfileCache.
+
+    The newest cached profile for the journal is served if it is still
+    within the cache TTL, matches the latest year (see latest_year(); an
+    expired year list is re-discovered first) and can answer target_year.
+    Otherwise the journal is scraped and the cache updated. refresh=True
+    always scrapes.
+
+    With incremental=True a scrape only fetches the latest year and merges
+    it into known_data, or into the newest cached profile (even an expired
+    one) if known_data isn't given.
+
+    The returned dict has an extra "cache" entry: {"hit": bool, "fetched_at": epoch seconds}.
+    on_event receives the same events as from get_jcr_data; for a cache
+    hit they are replayed from the cached result. instrument is passed to
+    get_jcr_data; a cache hit only counts "cache_hits" on it. cancel and
+    timeout are passed to get_jcr_data.
+    """
+    if cache is None:
+        cache = get_profile_cache()
+
+    if not refresh:
+        years = get_year_cache().get(journal_name)
+        entry = cache.get(journal_name, years[0] if years else None)
+        if entry and not years:
+            # The year list expired; a newer year may have been released since
+            with jcr_cancel.scope(cancel, timeout):
+                year = latest_year(journal_name, pool)
+            if year != entry[0]["metrics"].get("year"):
+                print(f"Cached profile for '{journal_name}' is not the latest year ({year}), re-scraping.",
+                      file=sys.stderr)
+                entry = None
+        if entry:
+            data, fetched_at = entry
+            if apply_target_year(data, target_year):
+                print(f"Profile cache hit for '{journal_name}' ({data['metrics']['year']})", file=sys.stderr)
+                data["cache"] = {"hit": True, "fetched_at": fetched_at}
+                if instrument:
+                    instrument.count("cache_hits")
+                if on_event:
+                    for event in events_from_data(data):
+                        on_event(event)
+                return data
+            print(f"Cached profile for '{journal_name}' lacks year {target_year}, re-scraping.", file=sys.stderr)
+
+    if incremental and known_data is None:
+        entry = cache.get(journal_name, ignore_ttl=True)
+        if entry:
+            known_data = entry[0]
+            known_data.pop("cache", None)
+
+    data = get_jcr_data(journal_name, target_year=target_year, pool=pool, mode=mode, known_data=known_data,
+                        on_event=on_event, instrument=instrument, cancel=cancel, timeout=timeout)
+    if data:
+        cache.put(journal_name, data)
+        data["cache"] = {"hit": False, "fetched_at": time.time()}
+    return data
+
+CSV_HEADER = ["Journal", "Metric Type", "Category", "Year", "Rank", "Quartile", "Percentile"]
+
+def csv_rows(data):
+    """Yields the ranking rows of a get_jcr_data result in save_csv column order."""
+    journal = data["metrics"]["journal"]
+    for cat, rows in data.get("rankings", {}).items():
+        for row in rows:
+            yield [journal, "JIF", cat, row["year"], row["rank"], row["quartile"], row["percentile"]]
+    for cat, rows in data.get("jci_rankings", {}).items():
+        for row in rows:
+            yield [journal, "JCI", cat, row["year"], row["rank"], row["quartile"], row["percentile"]]
 
 def save_csv(data, filename):
     import csv
     with open(filename, 'w', newline='', encoding='utf-8') as f:
         writer = csv.writer(f)
-        writer.writerow(["Journal", "Metric Type", "Category", "Year", "Rank", "Quartile", "Percentile"])
-        journal = data["metrics"]["journal"]
-        for cat, rows in data.get("rankings", {}).items():
-            for row in rows:
-                writer.writerow([journal, "JIF", cat, row["year"], row["rank"], row["quartile"], row["percentile"]])
-        for cat, rows in data.get("jci_rankings", {}).items():
-            for row in rows:
-                writer.writerow([journal, "JCI", cat, row["year"], row["rank"], row["quartile"], row["percentile"]])
+        writer.writerow(CSV_HEADER)
+        writer.writerows(csv_rows(data))
     print(f"CSV saved to {filename}", file=sys.stderr)
 
 if __name__ == "__main__":
-    raw_target = sys.argv[1] if len(sys.argv) > 1 else "BIOETHICS"
+    if len(sys.argv) > 1 and sys.argv[1] == "--batch":
+        # e.g. python extract_jcr_data.py --batch journals.txt -w 4 -y 2024
+        from jcr_batch import main as batch_main
+        sys.exit(batch_main(sys.argv[2:]))
+
+    flags = {a for a in sys.argv[1:] if a in ("--refresh", "--incremental")}
+    args = [a for a in sys.argv[1:] if a not in flags]
+    refresh = "--refresh" in flags
+    incremental = "--incremental" in flags
+    raw_target = args[0] if len(args) > 0 else "BIOETHICS"
     target_yr = None
-    if len(sys.argv) > 2:
+    if len(args) > 1:
          try:
-             target_yr = int(sys.argv[2])
+             target_yr = int(args[1])
          except: pass
     
     # 1. Try to resolve the short name if it looks like a full title or has spaces
@@ -504,8 +1330,12 @@ if __name__ == "__main__":
         print(f"Falling back to original name: '{raw_target}'", file=sys.stderr)
         final_target = raw_target
 
-    data = get_jcr_data(final_target, target_year=target_yr)
+    csv_filename = f"{final_target}_jcr_data.csv"
+    known = load_csv(csv_filename) if incremental else None
+    data = get_jcr_data_cached(final_target, target_year=target_yr, refresh=refresh or incremental,
+                               incremental=incremental, known_data=known)
+    print(f"Profile cache: {get_profile_cache().stats()}", file=sys.stderr)
     if data:
         print(json.dumps(data, indent=2))
         # Save validation check: use final_target for filename
-        save_csv(data, f"{final_target}_jcr_data.csv")
+        save_csv(data, csv_filename)
@@ -66,6 +66,13 @@ def calculate_category_averages(file_path: str, start_year: int):
         print(f"Error reading file: {e}")
         return {}
 
+    return averages_from_percentiles(data, start_year)
+
+def averages_from_percentiles(data, start_year: int):
+    """
+    Averages data[metric][category][year] = percentile over start_year and
+    the 4 years before it, ignoring missing years.
+    """
     # Calculate Data
     results = {
         "JIF": {},
@@ -75,7 +82,7 @@ def calculate_category_averages(file_path: str, start_year: int):
     target_years = [start_year - i for i in range(5)] # [start, start-1, ..., start-4]
     
     for metric in ["JIF", "JCI"]:
-        for category, years_data in data[metric].items():
+        for category, years_data in data.get(metric, {}).items():
             values = []
             for y in target_years:
                 if y in years_data:
@@ -96,6 +103,30 @@ def calculate_category_averages(file_path: str, start_year: int):
                 
     return results
 
+def calculate_category_averages_from_store(journal: str, start_year: int, store=None):
+    """
+    calculate_category_averages for a journal in the rankings store
+    instead of its CSV file. Returns {} if the journal isn't stored.
+    """
+    from jcr_store import get_rankings_store
+    store = store or get_rankings_store()
+    years = [start_year - i for i in range(5)]
+    data = store.percentiles(journal, years=years).get(journal.upper())
+    if not data:
+        return {}
+    return averages_from_percentiles(data, start_year)
+
+def calculate_all_category_averages(start_year: int, store=None):
+    """
+    Category averages for every journal in the rankings store, read in one
+    query. Returns {journal: {"JIF": {...}, "JCI": {...}}}.
+    """
+    from jcr_store import get_rankings_store
+    store = store or get_rankings_store()
+    years = [start_year - i for i in range(5)]
+    return {journal: averages_from_percentiles(data, start_year)
+            for journal, data in store.percentiles(years=years).items()}
+
 if __name__ == "__main__":
     import sys
     
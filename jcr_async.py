@@ -0,0 +1,523 @@
+
+import os
+import sys
+import csv
+import time
+import asyncio
+import argparse
+import urllib.parse
+from playwright.async_api import async_playwright
+from browser_pool import launch_options, USER_AGENT, VIEWPORT, ResourceBlocker
+from jcr_cache import get_year_cache, get_profile_cache, get_resolution_index
+from jcr_capture import build_profile, sorted_history
+from jcr_cancel import CancelToken, Cancelled
+from jcr_instrument import Instrumentation, export_jsonl
+from jcr_html import parse_history_rows
+from extract_jcr_data import (
+    SECTION_JS, YEAR_DOM_JS, KEY_INDICATORS_JS, ROWS_STABLE_JS, CATEGORIES_CHANGED_JS, CONTENT_SELECTOR,
+    COOKIE_SELECTOR, profile_url, years_from_payload, collect_years, probe_years, probed_year_list,
+    remember_years, parse_jci_text, answer_target_year, apply_target_year, _set_specific_jif, _reaches_before, csv_rows, CSV_HEADER
+)
+
+JCR_HOME = "https://jcr.clarivate.com/jcr/home"
+SEARCH_INPUT = "input[placeholder*='journal'], input[placeholder*='Journal'], input[type='text'].mat-input-element"
+
+JIF_VALUE_JS = r"""() => {
+    const el = document.querySelector(".jif-values .value");
+    const t = el && el.innerText.trim();
+    return t && /^\d+(\.\d+)?$/.test(t) ? t : null;
+}"""
+
+SECTIONS = [
+    ("JIF", "Rank by Journal Impact Factor", "Rank by Journal Citation Indicator (JCI)"),
+    ("JCI", "Rank by Journal Citation Indicator (JCI)", "Contributions by Organization"),
+]
+
+class AsyncJCR:
+    """
+    asyncio implementation of the resolve + scrape pipeline: one Chromium
+    and one context on a single event loop, with up to `concurrency` journal
+    pages open at once.
+
+    It follows the same strategy as the sync path (resolution index,
+    year cache, captured JSON, then the in-page SECTION_JS extraction),
+    using the same year discovery, history and target-year helpers from
+    extract_jcr_data, and shares its caches, so results from either are
+    interchangeable.
+
+        async with AsyncJCR(concurrency=8) as jcr:
+            record = await jcr.fetch("Feminist Anthropology", target_year=2024)
+    """
+
+    def __init__(self, concurrency=8, headless=True, mode="auto", refresh=False, blocker=None):
+        self.concurrency = max(1, concurrency)
+        self.headless = headless
+        self.mode = mode
+        self.refresh = refresh
+        self.blocker = ResourceBlocker.from_env() if blocker is None else (blocker or None)
+        self.index = get_resolution_index()
+        self.year_cache = get_year_cache()
+        self.cache = get_profile_cache()
+        self._playwright = None
+        self.browser = None
+        self.context = None
+        self._sem = None
+
+    async def __aenter__(self):
+        self._sem = asyncio.Semaphore(self.concurrency)
+        self._playwright = await async_playwright().start()
+        self.browser = await self._playwright.chromium.launch(**launch_options(self.headless))
+        self.context = await self.browser.new_context(user_agent=USER_AGENT, viewport=VIEWPORT, service_workers="block")
+        if self.blocker:
+            await self.blocker.install_async(self.context)
+        return self
+
+    async def __aexit__(self, *exc):
+        if self.blocker and self.blocker.blocked_requests:
+            print(f"Resource blocking: {self.blocker.stats()}", file=sys.stderr)
+        try:
+            if self.browser:
+                await self.browser.close()
+        finally:
+            if self._playwright:
+                await self._playwright.stop()
+
+    async def _accept_cookies(self, page):
+        try:
+            btn = page.locator(COOKIE_SELECTOR).first
+            if await btn.is_visible():
+                await btn.click()
+                await btn.wait_for(state="hidden", timeout=2000)
+        except:
+            pass
+
+    async def _open_profile(self, page, journal_name, year, token):
+        url = profile_url(journal_name, year)
+        try:
+            print(f"Navigating to {url}...", file=sys.stderr)
+            await page.goto(url, wait_until="networkidle", timeout=token.timeout_ms(45000))
+        except Exception as e:
+            print(f"Navigation failed for {year}: {e}", file=sys.stderr)
+            token.check()
+            return False
+        await self._accept_cookies(page)
+        try:
+            await page.wait_for_selector(CONTENT_SELECTOR, timeout=token.timeout_ms(15000))
+            return True
+        except:
+            print(f"Timeout waiting for content on {year}", file=sys.stderr)
+            token.check()
+            return False
+
+    async def resolve(self, journal_name, token=None):
+        """
+        Returns the JCR short name for a title, from the resolution index or
+        the search API the home page calls while typing. Waits are clamped
+        to `token` (a CancelToken), which is checked between steps.
+
+        Raises:
+            AssertionError: If the journal can't be resolved.
+            jcr_cancel.Cancelled: The token was cancelled or its deadline passed.
+        """
+        token = token or CancelToken()
+        indexed = self.index.lookup(journal_name)
+        if indexed:
+            return indexed
+
+        found = {}
+
+        async def on_response(response):
+            try:
+                if "search" in response.url.lower() and "json" in response.headers.get("content-type", "").lower():
+                    for name, key in self.index.add_from_payload(await response.json()):
+                        found[name.lower()] = key
+            except:
+                pass
+
+        page = await self.context.new_page()
+        page.on("response", on_response)
+        try:
+            await page.goto(JCR_HOME, wait_until="domcontentloaded", timeout=token.timeout_ms(60000))
+            token.check()
+            await self._accept_cookies(page)
+            search_input = page.locator(SEARCH_INPUT).first
+            await search_input.wait_for(state="visible", timeout=token.timeout_ms(15000))
+            await search_input.fill(journal_name)
+
+            key = journal_name.strip().lower()
+            deadline = time.monotonic() + 10
+            while time.monotonic() < deadline:
+                if key in found:
+                    return found[key]
+                token.check()
+                await asyncio.sleep(0.1)
+
+            # Search API gave no exact title; click the suggestion instead
+            option = page.locator(".journal-title, mat-option span").get_by_text(journal_name, exact=True).first
+            await option.click(timeout=token.timeout_ms(5000))
+            await page.wait_for_url(lambda u: "journal-profile" in u, timeout=token.timeout_ms(30000))
+            params = urllib.parse.parse_qs(urllib.parse.urlparse(page.url).query)
+            if "journal" not in params:
+                raise AssertionError(f"Could not extract 'journal' parameter (short name) from URL: {page.url}")
+            short_name = params["journal"][0]
+            self.index.add(short_name, title=journal_name)
+            return short_name
+        except (AssertionError, Cancelled):
+            raise
+        except Exception as e:
+            # A timeout clamped by the token surfaces as Cancelled, not as a resolution failure
+            token.check()
+            raise AssertionError(f"Could not resolve '{journal_name}': {e}")
+        finally:
+            await page.close()
+
+    async def _extract_section(self, page, metric, section_title, stopper_title, token):
+        args = {"action": "extract", "sectionTitle": section_title, "stopperTitle": stopper_title,
+                "metric": metric, "names": []}
+        rankings = {}
+        header = page.locator(f"xpath=//*[contains(text(), '{section_title}')]").first
+        if not await header.is_visible():
+            return rankings
+        await header.scroll_into_view_if_needed()
+        try:
+            await page.wait_for_selector(".category-value", timeout=token.timeout_ms(5000))
+        except:
+            pass
+
+        expanded = set()
+        for i in range(15):
+            token.check()
+            snap = await page.evaluate(SECTION_JS, args)
+            if not snap:
+                break
+            found_new_data = False
+            if metric == "JCI":
+                for entry in snap["categories"]:
+                    c_rows = parse_jci_text(entry["jciText"])
+                    if entry["name"] not in rankings and c_rows:
+                        rankings[entry["name"]] = sorted_history(c_rows)
+                        found_new_data = True
+
+            pending = [e for e in snap["categories"] if e["name"] not in rankings]
+            if pending and (metric == "JIF" or not found_new_data):
+                to_expand = [e["name"] for e in pending if e["name"] not in expanded]
+                if to_expand:
+                    expanded.update(to_expand)
+                    if await page.evaluate(SECTION_JS, dict(args, action="expand", names=to_expand)):
+                        try:
+                            await page.wait_for_function(ROWS_STABLE_JS, arg={"key": f"__jcrRows{time.monotonic_ns()}", "quiet": 300},
+                                                         timeout=token.timeout_ms(3000), polling=100)
+                        except:
+                            pass
+                        snap = await page.evaluate(SECTION_JS, args) or snap
+                        pending = [e for e in snap["categories"] if e["name"] not in rankings]
+                for entry in pending:
+                    if entry["rows"]:
+                        rankings[entry["name"]] = sorted_history(entry["rows"])
+                        found_new_data = True
+
+            next_btn = header.locator("xpath=following::*[contains(@class, 'next') or @title='Next button']").first
+            if not await next_btn.is_visible():
+                break
+            try:
+                await next_btn.evaluate("el => el.click()")
+                await page.wait_for_function(CATEGORIES_CHANGED_JS, arg="\n".join(snap["all"]),
+                                             timeout=token.timeout_ms(4000), polling="mutation")
+            except:
+                break
+            if not found_new_data and i > 2:
+                break
+        return rankings
+
+    async def latest_year(self, journal_name, token):
+        """Async counterpart of extract_jcr_data.latest_year: the year cache, else a fresh discovery."""
+        years = self.year_cache.get(journal_name)
+        if years:
+            return years[0]
+        payload_years = set()
+
+        async def read(response):
+            try:
+                payload_years.update(years_from_payload(await response.json()))
+            except:
+                pass
+
+        def on_response(response):
+            if "json" in response.headers.get("content-type", "").lower():
+                reads.append(asyncio.ensure_future(read(response)))
+
+        reads = []
+        page = await self.context.new_page()
+        page.on("response", on_response)
+        try:
+            loaded = await self._open_profile(page, journal_name, None, token)
+            await asyncio.gather(*reads, return_exceptions=True)
+            try:
+                dom_values = await page.evaluate(YEAR_DOM_JS)
+            except:
+                dom_values = []
+            years, loaded_year = collect_years(payload_years, dom_values, page.url if loaded else None)
+            if years and (loaded_year == years[0] or await self._open_profile(page, journal_name, years[0], token)):
+                remember_years(journal_name, years, self.year_cache)
+                return years[0]
+            return None
+        finally:
+            for task in reads:
+                task.cancel()
+            await page.close()
+
+    async def scrape(self, journal_name, target_year=None, instrument=None, cancel=None):
+        """
+        Async counterpart of get_jcr_data. Returns the same dict, or None.
+
+        instrument and cancel work as in get_jcr_data (including the
+        JCR_INSTRUMENT_JSONL export of instrumentation created here), except
+        that they are passed down rather than activated: every scrape on the
+        loop shares one thread.
+
+        Raises:
+            jcr_cancel.Cancelled: The token was cancelled or its deadline passed.
+        """
+        export_path = os.environ.get("JCR_INSTRUMENT_JSONL") if instrument is None else None
+        if instrument is None:
+            instrument = Instrumentation(journal_name)
+        token = cancel or CancelToken()
+        payloads = []
+        pending_reads = []
+        # Bumped on each navigation so late reads from an earlier page are dropped
+        navigation = [0]
+
+        def phase(name):
+            token.check()
+            instrument.phase(name)
+
+        async def read(response, generation):
+            try:
+                payload = await response.json()
+            except:
+                return
+            if generation == navigation[0]:
+                payloads.append((response.url, payload))
+
+        def on_response(response):
+            if self.mode == "dom":
+                return
+            if "clarivate" in response.url and "json" in response.headers.get("content-type", "").lower():
+                pending_reads.append(asyncio.ensure_future(read(response, navigation[0])))
+
+        async def open_profile(year):
+            # Only the page that ends up being the profile may feed the capture
+            navigation[0] += 1
+            payloads.clear()
+            return await self._open_profile(page, journal_name, year, token)
+
+        phase("open_page")
+        page = instrument.attach(await self.context.new_page())
+        page.on("response", on_response)
+        try:
+            phase("year_discovery")
+            latest_year = None
+            years = self.year_cache.get(journal_name)
+            if years:
+                if await open_profile(years[0]):
+                    latest_year = years[0]
+                else:
+                    self.year_cache.invalidate(journal_name)
+            if not latest_year:
+                loaded = await open_profile(None)
+                await asyncio.gather(*pending_reads, return_exceptions=True)
+                payload_years = set()
+                for _, payload in payloads:
+                    payload_years.update(years_from_payload(payload))
+                try:
+                    dom_values = await page.evaluate(YEAR_DOM_JS)
+                except:
+                    dom_values = []
+                years, loaded_year = collect_years(payload_years, dom_values, page.url if loaded else None)
+                # Cached only once the newest year has actually opened
+                if years and (loaded_year == years[0] or await open_profile(years[0])):
+                    latest_year = years[0]
+                    remember_years(journal_name, years, self.year_cache)
+            if not latest_year:
+                # Discovery failed; fall back to probing year by year
+                for year in probe_years():
+                    instrument.count("year_probes")
+                    if await open_profile(year):
+                        latest_year = year
+                        break
+                if latest_year:
+                    # Cache the probe's answer so the next run doesn't probe again
+                    try:
+                        dom_values = await page.evaluate(YEAR_DOM_JS)
+                    except:
+                        dom_values = []
+                    remember_years(journal_name, probed_year_list(latest_year, dom_values, page.url), self.year_cache)
+            if not latest_year:
+                print(f"Could not find any valid data for '{journal_name}'.", file=sys.stderr)
+                return None
+
+            if self.mode != "dom":
+                phase("capture")
+                try:
+                    await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+                    await page.wait_for_load_state("networkidle", timeout=token.timeout_ms(10000))
+                except:
+                    pass
+                token.check()
+                await asyncio.gather(*pending_reads, return_exceptions=True)
+                data = build_profile(payloads, journal_name, latest_year)
+            else:
+                data = build_profile([], journal_name, latest_year)
+
+            metrics = data["metrics"]
+            metrics.setdefault("history", [])
+            history_source = "capture"
+            if self.mode != "network":
+                if "N/A" in (metrics["jif"], metrics["five_year_jif"]):
+                    phase("metrics_dom")
+                if metrics["jif"] == "N/A":
+                    try:
+                        metrics["jif"] = (await page.locator("div.jif-values p.value").first.inner_text(timeout=token.timeout_ms(2000))).strip()
+                    except:
+                        pass
+                if metrics["five_year_jif"] == "N/A":
+                    try:
+                        metrics["five_year_jif"] = (await page.locator("p.five-yr-impact-factor-value").first.inner_text(timeout=token.timeout_ms(2000))).strip()
+                    except:
+                        pass
+                # As in get_jcr_data, captured rows without years before the
+                # latest one are re-read from the page to get the history
+                for metric, section_title, stopper_title in SECTIONS:
+                    key = "rankings" if metric == "JIF" else "jci_rankings"
+                    rows = [r for cat_rows in data[key].values() for r in cat_rows]
+                    if not _reaches_before(rows, latest_year):
+                        if rows:
+                            print(f"Captured {metric} rankings have no years before {latest_year}; reading the page instead.", file=sys.stderr)
+                            instrument.count("capture_fallbacks")
+                        phase(f"carousel_{metric.lower()}")
+                        data[key] = await self._extract_section(page, metric, section_title, stopper_title, token) or data[key]
+                if not _reaches_before(metrics["history"], latest_year):
+                    phase("jif_history")
+                    try:
+                        history = parse_history_rows(await page.evaluate(KEY_INDICATORS_JS))
+                    except Exception as e:
+                        print(f"Error extracting history: {e}", file=sys.stderr)
+                        history = []
+                    if history:
+                        metrics["history"] = history
+                        history_source = "history"
+
+            if metrics["jif_percentile"] == "N/A" and data["rankings"]:
+                for item in next(iter(data["rankings"].values())):
+                    if item["year"] == latest_year:
+                        metrics["jif_percentile"] = item["percentile"]
+                        break
+
+            if target_year and not answer_target_year(metrics, target_year, metrics["history"], history_source):
+                phase("target_year")
+                instrument.count("target_year_navigations")
+                # A failed target-year page must not lose the profile scraped above
+                try:
+                    await page.goto(profile_url(journal_name, target_year), wait_until="domcontentloaded",
+                                    timeout=token.timeout_ms(45000))
+                    handle = await page.wait_for_function(JIF_VALUE_JS, timeout=token.timeout_ms(10000))
+                    _set_specific_jif(metrics, target_year, await handle.json_value(), "navigation")
+                except Exception as e:
+                    print(f"Failed to extract specific JIF for {target_year}: {e}", file=sys.stderr)
+                    metrics["specific_year_source"] = "missing"
+            # Don't return a partial result for a scrape cancelled along the way
+            token.check()
+            return data
+        finally:
+            for task in pending_reads:
+                task.cancel()
+            await page.close()
+            if export_path:
+                export_jsonl(instrument, export_path)
+
+    async def fetch(self, journal, target_year=None, cancel=None, timeout=None):
+        """
+        Resolves and scrapes one journal, using the profile cache unless
+        refresh is set. cancel (a CancelToken) stops the scrape; timeout
+        (seconds, counted once the journal gets a page) abandons it. Never
+        raises; failures are reported in the record:
+        {"journal", "short_name", "status", "seconds", "cache", "error", "data"}.
+        """
+        async with self._sem:
+            token = CancelToken(timeout, parent=cancel) if timeout else cancel
+            started = time.monotonic()
+            record = {"journal": journal, "short_name": journal, "status": "failed",
+                      "seconds": 0.0, "cache": "", "error": "", "data": None}
+            try:
+                try:
+                    record["short_name"] = await self.resolve(journal, token)
+                except AssertionError as e:
+                    print(f"Resolution failed for '{journal}', using input: {e}", file=sys.stderr)
+                short_name = record["short_name"]
+
+                data = None
+                if not self.refresh:
+                    years = self.year_cache.get(short_name)
+                    entry = self.cache.get(short_name, years[0] if years else None)
+                    if entry and not years:
+                        # The year list expired; a newer year may have been released since
+                        if await self.latest_year(short_name, token or CancelToken()) != entry[0]["metrics"].get("year"):
+                            entry = None
+                    if entry and apply_target_year(entry[0], target_year):
+                        data = entry[0]
+                        record["cache"] = "hit"
+                if data is None:
+                    data = await self.scrape(short_name, target_year=target_year, cancel=token)
+                    record["cache"] = "miss"
+                    if data:
+                        self.cache.put(short_name, data)
+
+                if data:
+                    record["status"] = "ok"
+                    record["data"] = data
+                else:
+                    record["error"] = "No data found"
+            except Exception as e:
+                record["error"] = str(e)
+            record["seconds"] = round(time.monotonic() - started, 1)
+            print(f"{journal}: {record['status']} ({record['seconds']}s)", file=sys.stderr)
+            return record
+
+async def fetch_many(journals, concurrency=8, target_year=None, mode="auto", refresh=False, headless=True,
+                     journal_timeout=None):
+    """Fetches many journals concurrently in one browser. Returns records in input order."""
+    async with AsyncJCR(concurrency=concurrency, headless=headless, mode=mode, refresh=refresh) as jcr:
+        return await asyncio.gather(*(jcr.fetch(j, target_year=target_year, timeout=journal_timeout)
+                                      for j in journals))
+
+def fetch_many_sync(journals, **kwargs):
+    """Blocking wrapper around fetch_many for callers without an event loop."""
+    return asyncio.run(fetch_many(journals, **kwargs))
+
+def main(argv=None):
+    from jcr_batch import read_journal_list
+    parser = argparse.ArgumentParser(description="Scrape JCR rankings for a list of journals on one event loop.")
+    parser.add_argument("journal_list", help="Text file (one journal per line) or CSV of journal names")
+    parser.add_argument("-o", "--output", default="jcr_async.csv", help="Combined rankings CSV")
+    parser.add_argument("-c", "--concurrency", type=int, default=8, help="Journal pages open at once")
+    parser.add_argument("-y", "--year", type=int, default=None, help="Target year for the specific-year JIF")
+    parser.add_argument("--mode", choices=["auto", "network", "dom"], default="auto", help="Extraction mode")
+    parser.add_argument("--refresh", action="store_true", help="Ignore cached profiles and re-scrape")
+    parser.add_argument("--journal-timeout", type=float, default=None, help="Seconds before a journal is abandoned")
+    args = parser.parse_args(argv)
+
+    journals = read_journal_list(args.journal_list)
+    records = fetch_many_sync(journals, concurrency=args.concurrency, target_year=args.year,
+                              mode=args.mode, refresh=args.refresh, journal_timeout=args.journal_timeout)
+    with open(args.output, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_HEADER)
+        for record in records:
+            if record["data"]:
+                writer.writerows(csv_rows(record["data"]))
+    ok = sum(1 for r in records if r["status"] == "ok")
+    print(f"Finished: {ok}/{len(records)} journals OK. Saved to {args.output}", file=sys.stderr)
+    return 0 if ok == len(records) else 2
+
+if __name__ == "__main__":
+    sys.exit(main())
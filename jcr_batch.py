@@ -0,0 +1,396 @@
+
+import sys
+import os
+import csv
+import time
+import random
+import argparse
+import sqlite3
+import threading
+import queue
+from contextlib import contextmanager
+from browser_pool import get_default_pool, close_default_pool
+from extract_jcr_data import get_jcr_data_cached, csv_rows, CSV_HEADER
+from jcr_instrument import Instrumentation, export_jsonl
+from jcr_cancel import CancelToken, Cancelled
+from jcr_cache import get_profile_cache
+from jcr_store import RankingsStore
+from journal_shortname_resolver import get_journal_shortname
+
+MAX_BACKOFF = 600 # Seconds; caps the exponential back-off on long runs
+STATUS_HEADER = ["Journal", "Short Name", "Status", "Attempts", "Seconds", "Cache", "Error"]
+
+def read_journal_list(path):
+    """
+    Reads journal names from a text file (one per line) or a CSV file.
+
+    For CSV files the column named "Journal", "Title" or "Name" is used if
+    present, otherwise the first column. Blank lines, duplicates and lines
+    starting with '#' are skipped.
+    """
+    journals = []
+    with open(path, mode='r', encoding='utf-8-sig') as f:
+        if path.lower().endswith(".csv"):
+            rows = list(csv.reader(f))
+            col = 0
+            if rows:
+                header = [h.strip().lower() for h in rows[0]]
+                for name in ["journal", "title", "name"]:
+                    if name in header:
+                        col = header.index(name)
+                        rows = rows[1:]
+                        break
+            values = [r[col] for r in rows if len(r) > col]
+        else:
+            values = f.read().splitlines()
+
+    seen = set()
+    for v in values:
+        v = v.strip()
+        if not v or v.startswith("#") or v.lower() in seen:
+            continue
+        seen.add(v.lower())
+        journals.append(v)
+    return journals
+
+class RateLimiter:
+    """Spaces out journal starts across all workers to at most `per_minute`."""
+
+    def __init__(self, per_minute):
+        self.interval = 60.0 / per_minute if per_minute else 0.0
+        self._lock = threading.Lock()
+        self._next = time.monotonic()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+def resolve_short_name(journal_name, pool=None, cancel=None):
+    """Resolves a title to its JCR short name, or returns None if it can't be (Cancelled is raised)."""
+    try:
+        return get_journal_shortname(journal_name, pool=pool, cancel=cancel)
+    except Cancelled:
+        raise
+    except AssertionError as e:
+        print(f"Resolution failed for '{journal_name}': {e}", file=sys.stderr)
+    except Exception as e:
+        print(f"Resolution error for '{journal_name}': {e}", file=sys.stderr)
+    return None
+
+class JobJournal:
+    """
+    SQLite record of a batch run: one row per journal with its state
+    (pending, resolved, scraped or failed), short name, attempts, last error
+    and duration, updated as the run progresses so an interrupted run can
+    be resumed with only its unfinished journals.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " journal TEXT PRIMARY KEY,"
+                " position INTEGER NOT NULL,"
+                " state TEXT NOT NULL,"
+                " short_name TEXT,"
+                " attempts INTEGER NOT NULL DEFAULT 0,"
+                " last_error TEXT,"
+                " seconds REAL,"
+                " cache TEXT,"
+                " updated_at REAL NOT NULL)"
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def start(self, journals, resume=False):
+        """
+        Registers the journals of a run. Without resume any previous record
+        is discarded. Returns the journals still to do, in list order.
+        """
+        with self._connect() as conn:
+            if not resume:
+                conn.execute("DELETE FROM jobs")
+            conn.executemany(
+                "INSERT INTO jobs (journal, position, state, updated_at) VALUES (?, ?, 'pending', ?) "
+                "ON CONFLICT(journal) DO UPDATE SET position = excluded.position",
+                [(j, i, time.time()) for i, j in enumerate(journals)])
+            done = {r[0] for r in conn.execute("SELECT journal FROM jobs WHERE state = 'scraped'")}
+        return [j for j in journals if j not in done]
+
+    def get(self, journal):
+        with self._connect() as conn:
+            row = conn.execute("SELECT state, short_name, attempts, last_error FROM jobs WHERE journal = ?",
+                               (journal,)).fetchone()
+        return {"state": row[0], "short_name": row[1], "attempts": row[2], "last_error": row[3]} if row else None
+
+    def update(self, journal, state, **fields):
+        """Sets the state plus any of short_name, last_error, seconds, cache; attempt=True counts an attempt."""
+        attempt = 1 if fields.pop("attempt", False) else 0
+        cols = ["state = ?", "attempts = attempts + ?", "updated_at = ?"]
+        params = [state, attempt, time.time()]
+        for key in ("short_name", "last_error", "seconds", "cache"):
+            if key in fields:
+                cols.append(f"{key} = ?")
+                params.append(fields[key])
+        with self._connect() as conn:
+            conn.execute(f"UPDATE jobs SET {', '.join(cols)} WHERE journal = ?", params + [journal])
+
+    def statuses(self, journals):
+        """Rows in STATUS_HEADER form for the given journals, in list order."""
+        with self._connect() as conn:
+            rows = {r[0]: r for r in conn.execute(
+                "SELECT journal, short_name, state, attempts, seconds, cache, last_error FROM jobs")}
+        out = []
+        for j in journals:
+            r = rows.get(j)
+            if not r:
+                continue
+            out.append({
+                "Journal": r[0],
+                "Short Name": r[1] or "",
+                "Status": "ok" if r[2] == "scraped" else r[2],
+                "Attempts": r[3],
+                "Seconds": r[4] if r[4] is not None else "",
+                "Cache": r[5] or "",
+                "Error": r[6] or ""
+            })
+        return out
+
+class BatchRunner:
+    """
+    Resolves and scrapes a list of journals across `workers` threads, each
+    with its own browser, writing a combined rankings CSV as journals finish
+    and a per-journal status CSV at the end.
+
+    Args:
+        journals: Journal titles or short names.
+        output_csv: Path of the combined rankings CSV.
+        workers: Number of parallel browser workers.
+        target_year: Passed through to get_jcr_data.
+        rate_per_minute: Global cap on journal starts per minute (0 = none).
+        max_attempts: Attempts per journal before it is marked failed,
+            counted across resumed runs.
+        backoff: Base back-off in seconds after a failed attempt; doubles
+            with each further failure of the same worker.
+        mode: Extraction mode passed to get_jcr_data ("auto", "network", "dom").
+        refresh: Ignore the profile cache and re-scrape every journal.
+        incremental: Re-scrape only the latest year of each journal and
+            merge it into its cached profile (implies refresh).
+        store: RankingsStore that every scraped journal is also written to.
+        resume: Continue the run recorded in the job journal
+            (`<output>_jobs.sqlite`): journals already scraped are skipped,
+            resolved short names are reused and rows are appended to the
+            existing output CSV.
+        metrics_jsonl: Append each scrape's per-phase timings and counters
+            (see jcr_instrument) to this JSON-lines file. The batch is the
+            only writer of these records (get_jcr_data doesn't export
+            instrumentation it is given).
+        journal_timeout: Seconds one attempt (resolve plus scrape) may
+            take before it is abandoned and counted as failed (0 = no limit).
+    """
+
+    def __init__(self, journals, output_csv, workers=2, target_year=None,
+                 rate_per_minute=6, max_attempts=3, backoff=30.0, mode="auto", refresh=False,
+                 incremental=False, store=None, resume=False, metrics_jsonl=None, journal_timeout=300):
+        self.journals = journals
+        self.output_csv = output_csv
+        self.status_csv = os.path.splitext(output_csv)[0] + "_status.csv"
+        self.jobs = JobJournal(os.path.splitext(output_csv)[0] + "_jobs.sqlite")
+        self.resume = resume
+        self.workers = max(1, workers)
+        self.target_year = target_year
+        self.rate_limiter = RateLimiter(rate_per_minute)
+        self.max_attempts = max(1, max_attempts)
+        self.backoff = backoff
+        self.mode = mode
+        self.refresh = refresh or incremental
+        self.incremental = incremental
+        self.store = store
+        self.metrics_jsonl = metrics_jsonl
+        self.journal_timeout = journal_timeout
+        self.statuses = []
+        self._write_lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._writer = None
+        self._file = None
+
+    def run(self):
+        todo = self.jobs.start(self.journals, resume=self.resume)
+        for j in todo:
+            self._queue.put(j)
+
+        append = self.resume and os.path.exists(self.output_csv) and os.path.getsize(self.output_csv) > 0
+        if self.resume:
+            print(f"Resuming: {len(self.journals) - len(todo)} of {len(self.journals)} journals already scraped.", file=sys.stderr)
+        print(f"Batch: {len(todo)} journals on {self.workers} workers.", file=sys.stderr)
+        with open(self.output_csv, 'a' if append else 'w', newline='', encoding='utf-8') as f:
+            self._file = f
+            self._writer = csv.writer(f)
+            if not append:
+                self._writer.writerow(CSV_HEADER)
+
+            threads = []
+            for i in range(self.workers):
+                t = threading.Thread(target=self._worker, args=(i,), name=f"jcr-batch-{i}")
+                t.daemon = True
+                t.start()
+                threads.append(t)
+            for t in threads:
+                t.join()
+            self._writer = None
+            self._file = None
+
+        self.statuses = self.jobs.statuses(self.journals)
+        self.save_status()
+        ok = sum(1 for s in self.statuses if s["Status"] == "ok")
+        print(f"Batch finished: {ok}/{len(self.statuses)} journals OK. Status saved to {self.status_csv}", file=sys.stderr)
+        print(f"Profile cache: {get_profile_cache().stats()}", file=sys.stderr)
+        return self.statuses
+
+    def _worker(self, worker_id):
+        pool = get_default_pool()
+        consecutive_failures = 0
+        try:
+            while True:
+                try:
+                    journal = self._queue.get_nowait()
+                except queue.Empty:
+                    return
+                status, consecutive_failures = self._process(journal, pool, worker_id, consecutive_failures)
+                with self._write_lock:
+                    self.statuses.append(status)
+        finally:
+            close_default_pool()
+
+    def _process(self, journal, pool, worker_id, consecutive_failures):
+        """Runs the attempts for one journal. Returns (status row, the worker's updated consecutive_failures)."""
+        started = time.monotonic()
+        job = self.jobs.get(journal) or {}
+        # Only a real resolution is stored; an unresolved title is tried as is
+        short_name = job.get("short_name") or ""
+        state = job.get("state") if job.get("state") == "resolved" else "pending"
+        error = job.get("last_error") or ""
+        # A resumed run continues the journal's attempt count
+        attempts = previous_attempts = job.get("attempts") or 0
+        while attempts < self.max_attempts:
+            attempts += 1
+            self.rate_limiter.wait()
+            cancel = CancelToken(timeout=self.journal_timeout or None)
+            try:
+                print(f"[worker {worker_id}] {journal} (attempt {attempts})", file=sys.stderr)
+                if not short_name:
+                    short_name = resolve_short_name(journal, pool=pool, cancel=cancel) or ""
+                    if short_name:
+                        state = "resolved"
+                        self.jobs.update(journal, state, short_name=short_name)
+                name = short_name or journal
+                instrument = Instrumentation(name)
+                try:
+                    data = get_jcr_data_cached(name, target_year=self.target_year, pool=pool,
+                                               mode=self.mode, refresh=self.refresh,
+                                               incremental=self.incremental, instrument=instrument,
+                                               cancel=cancel)
+                finally:
+                    if self.metrics_jsonl:
+                        with self._write_lock:
+                            export_jsonl(instrument, self.metrics_jsonl)
+                if data:
+                    with self._write_lock:
+                        self._writer.writerows(csv_rows(data))
+                        self._file.flush()
+                    if self.store:
+                        self.store.put(data)
+                    cache = "hit" if data.get("cache", {}).get("hit") else "miss"
+                    status = self._status(journal, name, "ok", attempts, started, "", cache)
+                    self.jobs.update(journal, "scraped", attempt=True, last_error="",
+                                     seconds=status["Seconds"], cache=cache)
+                    return status, 0
+                error = "No data found"
+            except Exception as e:
+                error = str(e)
+            print(f"[worker {worker_id}] {journal} failed: {error}", file=sys.stderr)
+            self.jobs.update(journal, state, attempt=True, last_error=error)
+
+            consecutive_failures += 1
+            if attempts < self.max_attempts:
+                delay = min(self.backoff * (2 ** (consecutive_failures - 1)), MAX_BACKOFF)
+                delay += random.uniform(0, self.backoff / 2)
+                print(f"[worker {worker_id}] Backing off {delay:.0f}s", file=sys.stderr)
+                time.sleep(delay)
+
+        status = self._status(journal, short_name or journal, "failed", attempts, started, error)
+        if attempts > previous_attempts:
+            self.jobs.update(journal, "failed", seconds=status["Seconds"])
+        return status, consecutive_failures
+
+    def _status(self, journal, short_name, status, attempts, started, error, cache=""):
+        return {
+            "Journal": journal,
+            "Short Name": short_name,
+            "Status": status,
+            "Attempts": attempts,
+            "Seconds": round(time.monotonic() - started, 1),
+            "Cache": cache,
+            "Error": error
+        }
+
+    def save_status(self):
+        order = {j: i for i, j in enumerate(self.journals)}
+        rows = sorted(self.statuses, key=lambda s: order.get(s["Journal"], len(order)))
+        with open(self.status_csv, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=STATUS_HEADER)
+            writer.writeheader()
+            writer.writerows(rows)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scrape JCR rankings for a list of journals.")
+    parser.add_argument("journal_list", help="Text file (one journal per line) or CSV of journal names")
+    parser.add_argument("-o", "--output", default="jcr_batch.csv", help="Combined rankings CSV")
+    parser.add_argument("-w", "--workers", type=int, default=2, help="Parallel browser workers")
+    parser.add_argument("-y", "--year", type=int, default=None, help="Target year for the specific-year JIF")
+    parser.add_argument("--rate", type=float, default=6, help="Max journal starts per minute across all workers (0 = unlimited)")
+    parser.add_argument("--max-attempts", type=int, default=3, help="Attempts per journal")
+    parser.add_argument("--backoff", type=float, default=30, help="Base back-off seconds after a failure")
+    parser.add_argument("--mode", choices=["auto", "network", "dom"], default="auto", help="Extraction mode (captured JSON, JSON only, or DOM only)")
+    parser.add_argument("--refresh", action="store_true", help="Ignore cached profiles and re-scrape")
+    parser.add_argument("--incremental", action="store_true", help="Only fetch the latest year and merge it into cached profiles")
+    parser.add_argument("--resume", action="store_true", help="Continue the previous run for this output, skipping journals already scraped")
+    parser.add_argument("--store", nargs="?", const="", default=None, metavar="DB",
+                        help="Also write rankings to the SQLite rankings store (default path if DB is omitted)")
+    parser.add_argument("--journal-timeout", type=float, default=300,
+                        help="Seconds before one journal attempt is abandoned (0 = no limit)")
+    parser.add_argument("--metrics-jsonl", default=os.environ.get("JCR_INSTRUMENT_JSONL"), metavar="PATH",
+                        help="Append per-journal phase timings and counters to this JSON-lines file "
+                             "(default: $JCR_INSTRUMENT_JSONL)")
+    args = parser.parse_args(argv)
+
+    journals = read_journal_list(args.journal_list)
+    if not journals:
+        print("No journals found in list.", file=sys.stderr)
+        return 1
+
+    runner = BatchRunner(journals, args.output, workers=args.workers, target_year=args.year,
+                         rate_per_minute=args.rate, max_attempts=args.max_attempts, backoff=args.backoff, mode=args.mode,
+                         refresh=args.refresh, incremental=args.incremental,
+                         store=RankingsStore(args.store or None) if args.store is not None else None,
+                         resume=args.resume, metrics_jsonl=args.metrics_jsonl,
+                         journal_timeout=args.journal_timeout)
+    statuses = runner.run()
+    return 0 if all(s["Status"] == "ok" for s in statuses) else 2
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,400 @@
+
+import os
+import sys
+import json
+import math
+import time
+import tempfile
+import threading
+import tracemalloc
+import urllib.parse
+from contextlib import contextmanager
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Fixture directory layout (index.json):
+# {
+#   "journals": [{"short_name": "BIOETHICS", "title": "Bioethics"}],
+#   "responses": [
+#     {"url": "https://jcr.clarivate.com/jcr/home", "file": "home.html", "content_type": "text/html"},
+#     {"url": "https://jcr.clarivate.com/api/...?q=...", "file": "search.json", "content_type": "application/json"}
+#   ]
+# }
+# Requests are matched on the full URL, then on the URL without its query.
+# Anything else gets a 404, so runs never touch the network.
+
+def _url_key(url, with_query=True):
+    parts = urllib.parse.urlsplit(url)
+    key = f"{parts.netloc.lower()}{parts.path or '/'}"
+    if with_query and parts.query:
+        key += "?" + urllib.parse.urlencode(sorted(urllib.parse.parse_qsl(parts.query, keep_blank_values=True)))
+    return key
+
+class FixtureServer:
+    """
+    Serves recorded JCR responses from a fixture directory on a local HTTP
+    server. A request for https://host/path?q is expected at
+    http://127.0.0.1:<port>/host/path?q (see ReplayRouter).
+
+    Args:
+        fixture_dir: Directory containing index.json and the response files.
+        latency: Seconds added to every response to mimic a network round trip.
+    """
+
+    def __init__(self, fixture_dir, latency=0.0):
+        self.fixture_dir = fixture_dir
+        self.latency = latency
+        with open(os.path.join(fixture_dir, "index.json"), encoding="utf-8") as f:
+            self.index = json.load(f)
+        self.responses = {}
+        for entry in self.index.get("responses", []):
+            self.responses[_url_key(entry["url"])] = entry
+        self.hits = 0
+        self.misses = 0
+        self._server = None
+        self._thread = None
+
+    @property
+    def journals(self):
+        return self.index.get("journals", [])
+
+    def lookup(self, url):
+        return self.responses.get(_url_key(url)) or self.responses.get(_url_key(url, with_query=False))
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _serve(self):
+                if server.latency:
+                    time.sleep(server.latency)
+                host, _, rest = self.path.lstrip("/").partition("/")
+                entry = server.lookup(f"https://{host}/{rest}")
+                if not entry:
+                    server.misses += 1
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                server.hits += 1
+                with open(os.path.join(server.fixture_dir, entry["file"]), "rb") as f:
+                    body = f.read()
+                self.send_response(entry.get("status", 200))
+                self.send_header("Content-Type", entry.get("content_type", "text/html"))
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = _serve
+            do_POST = _serve
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, name="jcr-fixtures", daemon=True)
+        self._thread.start()
+        return self
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+class ReplayRouter:
+    """
+    Installed on every pooled context: sends each request to the fixture
+    server (or a HAR file) instead of the network, and counts page loads.
+    The page keeps its real jcr.clarivate.com URLs, so the scrapers run
+    unchanged.
+
+    Install it before the pool's ResourceBlocker (BrowserPool's
+    on_new_context does) so the blocker sees requests first; blocked ones
+    never reach the replay.
+    """
+
+    def __init__(self, server=None, har_path=None):
+        self.server = server
+        self.har_path = har_path
+        self.page_loads = 0
+
+    def _route(self, route):
+        parts = urllib.parse.urlsplit(route.request.url)
+        local = f"{self.server.base_url}/{parts.netloc}{parts.path}" + (f"?{parts.query}" if parts.query else "")
+        try:
+            route.fulfill(response=route.fetch(url=local))
+        except Exception:
+            route.abort()
+
+    def _on_request(self, request):
+        if request.resource_type == "document" and request.is_navigation_request():
+            self.page_loads += 1
+
+    def install(self, context):
+        context.on("request", self._on_request)
+        if self.har_path:
+            context.route_from_har(self.har_path, not_found="abort")
+        else:
+            context.route("**/*", self._route)
+
+class RoundTripCounter:
+    """
+    Counts Playwright protocol messages (client -> driver round trips) by
+    wrapping the connection's send methods while active.
+
+    This patches Playwright internals (playwright._impl._connection.Channel)
+    and raises RuntimeError if they don't look as expected.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.count = 0
+        self._patched = []
+
+    def __enter__(self):
+        if not self.enabled:
+            return self
+        try:
+            from playwright._impl._connection import Channel
+        except ImportError as e:
+            raise RuntimeError(f"Can't count round trips with this Playwright version ({e}); "
+                               f"run the benchmark with --no-round-trips.")
+        counter = self
+
+        for name in ("_inner_send", "send"):
+            original = getattr(Channel, name, None)
+            if original is not None:
+                async def counted(self, *args, _original=original, **kwargs):
+                    counter.count += 1
+                    return await _original(self, *args, **kwargs)
+                setattr(Channel, name, counted)
+                self._patched.append((Channel, name, original))
+                break
+
+        original_no_reply = getattr(Channel, "send_no_reply", None)
+        if original_no_reply is not None:
+            def counted_no_reply(self, *args, **kwargs):
+                counter.count += 1
+                return original_no_reply(self, *args, **kwargs)
+            Channel.send_no_reply = counted_no_reply
+            self._patched.append((Channel, "send_no_reply", original_no_reply))
+        if not self._patched:
+            raise RuntimeError("Can't count round trips with this Playwright version (Channel has no send "
+                               "methods); run the benchmark with --no-round-trips.")
+        return self
+
+    def __exit__(self, *exc):
+        for cls, name, original in reversed(self._patched):
+            setattr(cls, name, original)
+        self._patched = []
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+def _browser_rss_mb():
+    """Resident memory of the Chromium process tree in MB, if psutil is installed."""
+    try:
+        import psutil
+    except ImportError:
+        return None
+    try:
+        me = psutil.Process()
+        procs = [p for p in me.children(recursive=True) if "chrom" in p.name().lower()]
+        return round(sum(p.memory_info().rss for p in procs) / 1e6, 1)
+    except Exception:
+        return None
+
+class Benchmark:
+    """
+    Runs the scrape, resolve and search paths against replayed pages and
+    collects per-call latency, page loads, Playwright round trips and peak
+    Python memory (plus Chromium RSS with psutil) for every journal.
+
+    blocker is passed to the BrowserPool (False loads everything), so runs
+    with and without resource blocking can be compared; round_trips=False
+    skips the round-trip counting.
+    """
+
+    OPERATIONS = ("scrape", "resolve", "search")
+
+    def __init__(self, journals, router, iterations=5, operations=OPERATIONS, target_year=None, warm=False,
+                 blocker=None, round_trips=True):
+        self.journals = journals
+        self.router = router
+        self.iterations = iterations
+        self.operations = operations
+        self.target_year = target_year
+        self.warm = warm
+        self.blocker = blocker
+        self.round_trips = round_trips
+        self.samples = {}
+        self._tmp = tempfile.mkdtemp(prefix="jcr_bench_")
+
+    def _fresh_index(self):
+        from jcr_cache import ResolutionIndex
+        fd, path = tempfile.mkstemp(suffix=".sqlite", dir=self._tmp)
+        os.close(fd)
+        os.remove(path)
+        return ResolutionIndex(path)
+
+    @contextmanager
+    def _measure(self, op, journal, counter):
+        loads = self.router.page_loads
+        trips = counter.count
+        tracemalloc.reset_peak()
+        started = time.perf_counter()
+        error = ""
+        try:
+            yield
+        except Exception as e:
+            error = str(e)
+            print(f"{op} {journal}: {error}", file=sys.stderr)
+        seconds = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        sample = self.samples.setdefault((op, journal), {
+            "seconds": [], "page_loads": [], "round_trips": [], "py_peak_kb": [], "browser_rss_mb": [], "errors": 0})
+        sample["seconds"].append(seconds)
+        sample["page_loads"].append(self.router.page_loads - loads)
+        if counter.enabled:
+            sample["round_trips"].append(counter.count - trips)
+        sample["py_peak_kb"].append(round(peak / 1024, 1))
+        rss = _browser_rss_mb()
+        if rss is not None:
+            sample["browser_rss_mb"].append(rss)
+        sample["errors"] += bool(error)
+
+    def run(self):
+        from browser_pool import BrowserPool
+        from extract_jcr_data import get_jcr_data
+        from jcr_cache import get_year_cache
+        from journal_shortname_resolver import get_journal_shortname
+        from jcr_search_cli import JCRBackend
+
+        pool = BrowserPool(size=2, blocker=self.blocker, on_new_context=self.router.install)
+        backend = None
+        tracemalloc.start()
+        try:
+            with RoundTripCounter(enabled=self.round_trips) as counter:
+                if "search" in self.operations:
+                    backend = JCRBackend(pool=pool, index=self._fresh_index())
+                    backend.start_session()
+                for journal in self.journals:
+                    short_name, title = journal["short_name"], journal.get("title") or journal["short_name"]
+                    for i in range(self.iterations):
+                        print(f"[{i + 1}/{self.iterations}] {short_name}", file=sys.stderr)
+                        if "scrape" in self.operations:
+                            if not self.warm:
+                                get_year_cache().invalidate(short_name)
+                            with self._measure("scrape", short_name, counter):
+                                if not get_jcr_data(short_name, target_year=self.target_year, pool=pool):
+                                    raise Exception("No data found")
+                        if "resolve" in self.operations:
+                            with self._measure("resolve", short_name, counter):
+                                get_journal_shortname(title, pool=pool, index=self._fresh_index())
+                        if "search" in self.operations:
+                            with self._measure("search", short_name, counter):
+                                backend.search_journal(title)
+        finally:
+            tracemalloc.stop()
+            if backend:
+                backend.close()
+            pool.close()
+        return self.report()
+
+    def report(self):
+        """One summary dict per (operation, journal)."""
+        rows = []
+        for (op, journal), s in sorted(self.samples.items()):
+            rows.append({
+                "operation": op,
+                "journal": journal,
+                "runs": len(s["seconds"]),
+                "errors": s["errors"],
+                "p50_s": round(percentile(s["seconds"], 50), 3),
+                "p95_s": round(percentile(s["seconds"], 95), 3),
+                "page_loads": round(sum(s["page_loads"]) / len(s["page_loads"]), 1),
+                "round_trips": round(sum(s["round_trips"]) / len(s["round_trips"]), 1) if s["round_trips"] else None,
+                "py_peak_kb": max(s["py_peak_kb"]),
+                "browser_rss_mb": max(s["browser_rss_mb"]) if s["browser_rss_mb"] else None
+            })
+        return rows
+
+def print_report(rows, out=sys.stdout):
+    header = f"{'Operation':<9} | {'Journal':<20} | {'Runs':>4} | {'Err':>3} | {'p50 s':>7} | {'p95 s':>7} | {'Loads':>5} | {'Trips':>7} | {'Py peak KB':>10} | {'Chromium MB':>11}"
+    print(header, file=out)
+    print("-" * len(header), file=out)
+    for r in rows:
+        rss = r["browser_rss_mb"] if r["browser_rss_mb"] is not None else "-"
+        trips = r["round_trips"] if r["round_trips"] is not None else "-"
+        print(f"{r['operation']:<9} | {r['journal']:<20} | {r['runs']:>4} | {r['errors']:>3} | {r['p50_s']:>7} | {r['p95_s']:>7} | "
+              f"{r['page_loads']:>5} | {trips:>7} | {r['py_peak_kb']:>10} | {rss:>11}", file=out)
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Benchmark the scrapers offline against recorded JCR pages.")
+    parser.add_argument("fixtures", help="Fixture directory (with index.json) or a HAR file")
+    parser.add_argument("-j", "--journal", action="append", default=[], metavar="SHORT[=Title]",
+                        help="Journal to run (default: the journals listed in index.json)")
+    parser.add_argument("-n", "--iterations", type=int, default=5, help="Runs per journal and operation")
+    parser.add_argument("--ops", default=",".join(Benchmark.OPERATIONS), help="Comma-separated operations: scrape,resolve,search")
+    parser.add_argument("-y", "--year", type=int, default=None, help="Target year passed to get_jcr_data")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds of simulated latency per response")
+    parser.add_argument("--warm", action="store_true", help="Keep the year cache between scrape runs")
+    parser.add_argument("--no-block", action="store_true", help="Load images, fonts and analytics too (no ResourceBlocker)")
+    parser.add_argument("--no-round-trips", action="store_true",
+                        help="Don't count Playwright round trips (they rely on Playwright internals)")
+    parser.add_argument("--json", default=None, help="Also write the report as JSON")
+    args = parser.parse_args(argv)
+
+    # Keep benchmark runs from reading or polluting the real caches
+    os.environ["JCR_CACHE_DIR"] = tempfile.mkdtemp(prefix="jcr_bench_cache_")
+
+    server = None
+    if os.path.isdir(args.fixtures):
+        server = FixtureServer(args.fixtures, latency=args.latency).start()
+        router = ReplayRouter(server=server)
+        journals = server.journals
+    else:
+        router = ReplayRouter(har_path=args.fixtures)
+        journals = []
+    if args.journal:
+        journals = []
+        for spec in args.journal:
+            short_name, _, title = spec.partition("=")
+            journals.append({"short_name": short_name, "title": title or short_name})
+    if not journals:
+        print("No journals to benchmark (use -j or list them in index.json).", file=sys.stderr)
+        return 1
+
+    from browser_pool import ResourceBlocker
+    blocker = False if args.no_block else (ResourceBlocker.from_env() or False)
+    try:
+        bench = Benchmark(journals, router, iterations=args.iterations,
+                          operations=[o.strip() for o in args.ops.split(",") if o.strip()],
+                          target_year=args.year, warm=args.warm, blocker=blocker,
+                          round_trips=not args.no_round_trips)
+        rows = bench.run()
+    finally:
+        if blocker:
+            print(f"Resource blocking: {blocker.stats()}", file=sys.stderr)
+        if server:
+            server.stop()
+            print(f"Fixture server: {server.hits} served, {server.misses} not found", file=sys.stderr)
+
+    print_report(rows)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(rows, f, indent=2)
+    return 0 if all(r["errors"] == 0 for r in rows) else 2
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,327 @@
+
+import os
+import sys
+import re
+import json
+import time
+import zlib
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+def cache_dir():
+    """Directory for on-disk caches (override with JCR_CACHE_DIR)."""
+    d = os.environ.get("JCR_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".jcr_cache")
+    os.makedirs(d, exist_ok=True)
+    return d
+
+class YearCache:
+    """
+    Remembers which JCR years exist for each journal, so the latest year is
+    known without probing the site. Entries expire after `ttl` seconds
+    (default one day; JCR publishes a new year once a year, in June).
+    """
+
+    def __init__(self, path=None, ttl=86400):
+        self.path = path or os.path.join(cache_dir(), "years.json")
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._data = None
+
+    def _load(self):
+        if self._data is None:
+            try:
+                with open(self.path, mode='r', encoding='utf-8') as f:
+                    self._data = json.load(f)
+            except FileNotFoundError:
+                self._data = {}
+            except Exception as e:
+                print(f"Year cache unreadable, starting empty: {e}", file=sys.stderr)
+                self._data = {}
+        return self._data
+
+    def _save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self._data, f)
+        os.replace(tmp, self.path)
+
+    def get(self, journal):
+        """Returns the cached years (newest first) or None if missing/expired."""
+        with self._lock:
+            entry = self._load().get(journal.upper())
+            if not entry or time.time() - entry.get("ts", 0) > self.ttl:
+                return None
+            return entry.get("years") or None
+
+    def put(self, journal, years):
+        with self._lock:
+            self._load()[journal.upper()] = {"years": sorted(set(years), reverse=True), "ts": time.time()}
+            self._save()
+
+    def invalidate(self, journal):
+        with self._lock:
+            if self._load().pop(journal.upper(), None) is not None:
+                self._save()
+
+_year_cache = None
+
+def get_year_cache():
+    global _year_cache
+    if _year_cache is None:
+        _year_cache = YearCache()
+    return _year_cache
+
+class ProfileCache:
+    """
+    SQLite cache of get_jcr_data results keyed by (short name, JCR year).
+
+    Results are stored as zlib-compressed JSON and served for `ttl` seconds
+    (default 30 days). JCR data for a given year rarely changes after
+    release, so a longer TTL is usually safe; use refresh to force a re-scrape.
+    Hit/miss counters are kept per instance and reported by stats().
+    """
+
+    def __init__(self, path=None, ttl=30 * 86400):
+        self.path = path or os.path.join(cache_dir(), "profiles.sqlite")
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS profiles ("
+                " journal TEXT NOT NULL,"
+                " year INTEGER NOT NULL,"
+                " fetched_at REAL NOT NULL,"
+                " data BLOB NOT NULL,"
+                " PRIMARY KEY (journal, year))"
+            )
+
+    @contextmanager
+    def _connect(self):
+        # One short-lived connection per call keeps the cache usable from any thread
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _count(self, attr):
+        with self._lock:
+            setattr(self, attr, getattr(self, attr) + 1)
+
+    def get(self, journal, year=None, ignore_ttl=False):
+        """
+        Returns (data, fetched_at) for the journal and year, or None.
+
+        With year=None the newest stored year for the journal is used.
+        Expired entries count as misses unless ignore_ttl is set.
+        """
+        with self._connect() as conn:
+            if year is None:
+                row = conn.execute(
+                    "SELECT data, fetched_at FROM profiles WHERE journal = ? ORDER BY year DESC LIMIT 1",
+                    (journal.upper(),)).fetchone()
+            else:
+                row = conn.execute(
+                    "SELECT data, fetched_at FROM profiles WHERE journal = ? AND year = ?",
+                    (journal.upper(), int(year))).fetchone()
+        if not row or (not ignore_ttl and time.time() - row[1] > self.ttl):
+            self._count("misses")
+            return None
+        try:
+            data = json.loads(zlib.decompress(row[0]).decode("utf-8"))
+        except Exception as e:
+            print(f"Corrupt cache entry for {journal} {year}: {e}", file=sys.stderr)
+            self._count("misses")
+            return None
+        self._count("hits")
+        return data, row[1]
+
+    def put(self, journal, data):
+        year = data["metrics"]["year"]
+        blob = zlib.compress(json.dumps(data).encode("utf-8"))
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO profiles (journal, year, fetched_at, data) VALUES (?, ?, ?, ?)",
+                (journal.upper(), int(year), time.time(), blob))
+        self._count("writes")
+
+    def invalidate(self, journal, year=None):
+        with self._connect() as conn:
+            if year is None:
+                conn.execute("DELETE FROM profiles WHERE journal = ?", (journal.upper(),))
+            else:
+                conn.execute("DELETE FROM profiles WHERE journal = ? AND year = ?", (journal.upper(), int(year)))
+
+    def purge_expired(self):
+        """Deletes entries older than the TTL. Returns the number removed."""
+        with self._connect() as conn:
+            cur = conn.execute("DELETE FROM profiles WHERE fetched_at < ?", (time.time() - self.ttl,))
+            return cur.rowcount
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "writes": self.writes,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0
+            }
+
+_profile_cache = None
+
+def get_profile_cache():
+    global _profile_cache
+    if _profile_cache is None:
+        _profile_cache = ProfileCache()
+    return _profile_cache
+
+def normalize_title(text):
+    """Case- and whitespace-insensitive form of a journal title for lookups."""
+    text = text.casefold().replace("&", " and ")
+    text = re.sub(r"[^\w\s]", " ", text)
+    return " ".join(text.split())
+
+def normalize_issn(text):
+    """Returns 'XXXXXXXX' for anything that looks like an ISSN, else None."""
+    compact = re.sub(r"[\s-]", "", text or "").upper()
+    if re.fullmatch(r"\d{7}[\dX]", compact):
+        return compact
+    return None
+
+class ResolutionIndex:
+    """
+    Persistent map from journal title, ISSN/eISSN and short name to the JCR
+    short name, shared by the resolver, the search CLI and the GUI.
+
+    Entries are added as a side effect of every intercepted search response
+    and every successful resolution, so repeat lookups skip the search UI.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(cache_dir(), "journals.sqlite")
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS journals ("
+                " short_name TEXT PRIMARY KEY,"
+                " title TEXT,"
+                " issn TEXT,"
+                " eissn TEXT,"
+                " updated_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS aliases ("
+                " alias TEXT PRIMARY KEY,"
+                " short_name TEXT NOT NULL)"
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def lookup(self, query):
+        """Returns the short name for a title, ISSN or short name, or None."""
+        if not query or not query.strip():
+            return None
+        keys = [normalize_title(query)]
+        issn = normalize_issn(query)
+        if issn:
+            keys.insert(0, "issn:" + issn)
+        with self._connect() as conn:
+            for key in keys:
+                row = conn.execute("SELECT short_name FROM aliases WHERE alias = ?", (key,)).fetchone()
+                if row:
+                    return row[0]
+        return None
+
+    def search_prefix(self, query, limit=10):
+        """
+        Returns up to `limit` known journal titles for type-ahead: titles
+        starting with the query first, then titles with a word starting
+        with it.
+        """
+        key = normalize_title(query or "")
+        if not key:
+            return []
+        pattern = key.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT j.title, MIN(CASE WHEN a.alias LIKE ? ESCAPE '\\' THEN 0 ELSE 1 END) AS score"
+                " FROM aliases a JOIN journals j ON j.short_name = a.short_name"
+                " WHERE j.title IS NOT NULL AND (a.alias LIKE ? ESCAPE '\\' OR a.alias LIKE ? ESCAPE '\\')"
+                " GROUP BY j.short_name ORDER BY score, j.title LIMIT ?",
+                (pattern + "%", pattern + "%", "% " + pattern + "%", int(limit))).fetchall()
+        return [r[0] for r in rows]
+
+    def add(self, short_name, title=None, issn=None, eissn=None, aliases=()):
+        """Records a journal and every way of referring to it."""
+        short_name = short_name.strip()
+        if not short_name:
+            return
+        issn = normalize_issn(issn)
+        eissn = normalize_issn(eissn)
+        keys = {normalize_title(short_name)}
+        if title:
+            keys.add(normalize_title(title))
+        for alias in aliases:
+            if alias and alias.strip():
+                keys.add(normalize_title(alias))
+        for i in (issn, eissn):
+            if i:
+                keys.add("issn:" + i)
+
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO journals (short_name, title, issn, eissn, updated_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(short_name) DO UPDATE SET"
+                " title = COALESCE(excluded.title, title),"
+                " issn = COALESCE(excluded.issn, issn),"
+                " eissn = COALESCE(excluded.eissn, eissn),"
+                " updated_at = excluded.updated_at",
+                (short_name, title.strip() if title else None, issn, eissn, time.time()))
+            conn.executemany(
+                "INSERT OR REPLACE INTO aliases (alias, short_name) VALUES (?, ?)",
+                [(k, short_name) for k in keys if k])
+
+    def add_from_payload(self, payload):
+        """
+        Indexes every journal in a JCR search API response
+        ({"data": {"journals": [{"journalName", "title", "issn", "eissn"}, ...]}}).
+
+        Returns the list of (title, short_name) pairs found.
+        """
+        found = []
+        try:
+            items = payload["data"]["journals"]
+        except (KeyError, TypeError):
+            return found
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            name = item.get("title")
+            key = item.get("journalName")
+            if not name or not key:
+                continue
+            self.add(key, title=name,
+                     issn=item.get("issn"),
+                     eissn=item.get("eissn") or item.get("eIssn"))
+            found.append((name.strip(), key))
+        return found
+
+_resolution_index = None
+
+def get_resolution_index():
+    global _resolution_index
+    if _resolution_index is None:
+        _resolution_index = ResolutionIndex()
+    return _resolution_index
@@ -0,0 +1,119 @@
+
+import time
+import weakref
+import threading
+from contextlib import contextmanager, nullcontext
+
+_local = threading.local()
+
+class Cancelled(Exception):
+    """Raised inside a scrape once its CancelToken is cancelled."""
+
+class DeadlineExceeded(Cancelled):
+    """Raised inside a scrape once its CancelToken's deadline has passed."""
+
+class CancelToken:
+    """
+    Cooperative cancellation plus an optional deadline for one piece of work.
+
+    Any thread may call cancel(). The thread doing the work activates the
+    token (`with token.activate():`); code below it calls the module-level
+    check() between steps, clamps Playwright timeouts with timeout_ms() so
+    no single wait outlives the deadline, and sleeps with sleep(), which
+    returns as soon as the token is cancelled. A Playwright call already in
+    progress can't be interrupted, so cancellation takes effect when it
+    returns or times out.
+
+        token = CancelToken(timeout=300)
+        data = get_jcr_data("BIOETHICS", cancel=token) # token.cancel() from another thread stops it
+    """
+
+    def __init__(self, timeout=None, parent=None):
+        self.started = time.monotonic()
+        self.deadline = time.monotonic() + timeout if timeout else None
+        self.parent = parent
+        self.reason = None
+        self._event = threading.Event()
+        self._children = weakref.WeakSet()
+        if parent:
+            parent._children.add(self)
+            if parent._event.is_set():
+                self.cancel(parent.reason)
+            if parent.deadline and (self.deadline is None or parent.deadline < self.deadline):
+                self.deadline = parent.deadline
+
+    def cancel(self, reason="Cancelled"):
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+        for child in list(self._children):
+            child.cancel(reason)
+
+    @property
+    def cancelled(self):
+        if self._event.is_set():
+            return True
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def remaining(self):
+        """Seconds left before the deadline, or None without one."""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def check(self):
+        """Raises Cancelled (DeadlineExceeded past the deadline) if the work should stop."""
+        if not self.cancelled:
+            return
+        if self._event.is_set():
+            raise Cancelled(self.reason)
+        raise DeadlineExceeded(f"Timed out after {time.monotonic() - self.started:.0f}s")
+
+    def timeout_ms(self, timeout_ms):
+        """timeout_ms, shortened to the time left before the deadline (never 0, which means forever)."""
+        remaining = self.remaining()
+        if remaining is None:
+            return timeout_ms
+        return max(1, int(min(timeout_ms, remaining * 1000)))
+
+    def sleep(self, seconds):
+        """Sleeps up to `seconds`, waking early on cancel() or at the deadline, then check()s."""
+        remaining = self.remaining()
+        if remaining is not None:
+            seconds = min(seconds, remaining)
+        self._event.wait(seconds)
+        self.check()
+
+    @contextmanager
+    def activate(self):
+        """Makes this the token check()/timeout_ms()/sleep() use on this thread."""
+        previous = getattr(_local, "current", None)
+        _local.current = self
+        try:
+            yield self
+        finally:
+            _local.current = previous
+
+_never = CancelToken()
+
+def current():
+    """The token active on this thread, or one that is never cancelled."""
+    return getattr(_local, "current", None) or _never
+
+def scope(token=None, timeout=None):
+    """
+    Activates `token`, or a child of it with its own `timeout` if given.
+    With neither, the current token stays in effect.
+    """
+    if timeout:
+        token = CancelToken(timeout, parent=token or getattr(_local, "current", None))
+    return token.activate() if token else nullcontext(current())
+
+def check():
+    current().check()
+
+def timeout_ms(timeout_ms):
+    return current().timeout_ms(timeout_ms)
+
+def sleep(seconds):
+    current().sleep(seconds)
@@ -0,0 +1,209 @@
+
+import sys
+import time
+import jcr_cancel
+
+# Key spellings seen (or plausible) in the JCR SPA's JSON; compared lower-cased
+YEAR_KEYS = ["year", "jcryear"]
+RANK_KEYS = ["rank", "jifrank", "jcirank", "categoryrank"]
+TOTAL_KEYS = ["total", "totaljournals", "totalcount", "journalcount", "outof"]
+QUARTILE_KEYS = ["quartile", "jifquartile", "jciquartile"]
+PERCENTILE_KEYS = ["percentile", "jifpercentile", "jcipercentile"]
+CATEGORY_KEYS = ["category", "categoryname", "categorydescription", "categorytitle"]
+JIF_KEYS = ["jif", "journalimpactfactor", "impactfactor", "jifvalue"]
+FIVE_YEAR_KEYS = ["fiveyearjif", "jif5years", "fiveyearimpactfactor", "jiffiveyear", "fiveyrimpactfactor"]
+
+def _pick(d, keys):
+    """Returns the first non-empty value in dict `d` whose lower-cased key is in `keys`."""
+    lowered = {k.lower(): v for k, v in d.items() if isinstance(k, str)}
+    for k in keys:
+        v = lowered.get(k)
+        if v not in (None, "", []) and not isinstance(v, (dict, list)):
+            return v
+    return None
+
+def _year(value):
+    try:
+        y = int(value)
+    except (TypeError, ValueError):
+        return None
+    return y if 1900 < y < 2100 else None
+
+def _text(value):
+    if isinstance(value, float):
+        return f"{value:g}"
+    return str(value).strip()
+
+def _ranking_row(d):
+    year = _year(_pick(d, YEAR_KEYS))
+    rank = _pick(d, RANK_KEYS)
+    if not year or rank is None:
+        return None
+    rank = _text(rank)
+    total = _pick(d, TOTAL_KEYS)
+    if total is not None and "/" not in rank:
+        rank = f"{rank}/{_text(total)}"
+    quartile = _pick(d, QUARTILE_KEYS)
+    percentile = _pick(d, PERCENTILE_KEYS)
+    return {
+        "year": year,
+        "rank": rank,
+        "quartile": _text(quartile) if quartile is not None else "N/A",
+        "percentile": _text(percentile) if percentile is not None else "N/A"
+    }
+
+def sorted_history(rows):
+    """Dedupes ranking rows by year (last one wins), newest year first."""
+    unique_history = {h['year']: h for h in rows}
+    return sorted(unique_history.values(), key=lambda x: x['year'], reverse=True)
+
+def build_profile(payloads, journal_name, year):
+    """
+    Builds the get_jcr_data result shape from captured JSON payloads.
+
+    Args:
+        payloads: List of (url, parsed_json) tuples captured from the page.
+        journal_name: Journal short name.
+        year: The JCR year the profile was loaded for.
+
+    Returns:
+        {"metrics", "rankings", "jci_rankings"} with whatever could be
+        found; sections that were not present in the payloads are empty.
+    """
+    rankings = {"JIF": {}, "JCI": {}}
+    jif_history = {}
+    metrics = {
+        "journal": journal_name,
+        "year": year,
+        "jif": "N/A",
+        "five_year_jif": "N/A",
+        "jif_percentile": "N/A"
+    }
+
+    def walk(node, path, category, depth):
+        if depth > 12:
+            return
+        if isinstance(node, dict):
+            cat = _pick(node, CATEGORY_KEYS)
+            if isinstance(cat, str) and cat.strip():
+                category = cat.strip()
+            for k, v in node.items():
+                if isinstance(v, (dict, list)):
+                    walk(v, path + [str(k).lower()], category, depth + 1)
+            return
+        if not isinstance(node, list):
+            return
+
+        metric_type = "JCI" if any("jci" in p for p in path) else "JIF"
+        for item in node:
+            if not isinstance(item, dict):
+                walk(item, path, category, depth + 1)
+                continue
+            row = _ranking_row(item)
+            if row:
+                item_cat = _pick(item, CATEGORY_KEYS)
+                cat_name = item_cat.strip() if isinstance(item_cat, str) and item_cat.strip() else category
+                keys = " ".join(k.lower() for k in item.keys() if isinstance(k, str))
+                row_type = "JCI" if "jci" in keys else metric_type
+                if cat_name:
+                    rankings[row_type].setdefault(cat_name, []).append(row)
+                continue
+            # A year + JIF value without a rank is a JIF history entry
+            y = _year(_pick(item, YEAR_KEYS))
+            jif = _pick(item, JIF_KEYS)
+            if y and jif is not None:
+                jif_history[y] = _text(jif)
+                continue
+            walk(item, path, category, depth + 1)
+
+    # Headline metrics: prefer payloads fetched for the profile year
+    ordered = sorted(payloads, key=lambda p: str(year) not in p[0])
+    for url, payload in ordered:
+        for d in _iter_dicts(payload):
+            if metrics["jif"] == "N/A":
+                jif = _pick(d, JIF_KEYS)
+                if jif is not None and _year(_pick(d, YEAR_KEYS)) in (None, year):
+                    metrics["jif"] = _text(jif)
+            if metrics["five_year_jif"] == "N/A":
+                five = _pick(d, FIVE_YEAR_KEYS)
+                if five is not None:
+                    metrics["five_year_jif"] = _text(five)
+
+    for url, payload in payloads:
+        walk(payload, [url.lower()], None, 0)
+
+    if jif_history:
+        metrics["history"] = [{"year": y, "jif": v} for y, v in sorted(jif_history.items(), reverse=True)]
+
+    return {
+        "metrics": metrics,
+        "rankings": {c: sorted_history(r) for c, r in rankings["JIF"].items()},
+        "jci_rankings": {c: sorted_history(r) for c, r in rankings["JCI"].items()}
+    }
+
+def _iter_dicts(node, depth=0):
+    if depth > 12:
+        return
+    if isinstance(node, dict):
+        yield node
+        for v in node.values():
+            yield from _iter_dicts(v, depth + 1)
+    elif isinstance(node, list):
+        for v in node:
+            yield from _iter_dicts(v, depth + 1)
+
+class ProfileCapture:
+    """
+    Records the JSON the journal-profile SPA fetches, via page.on("response").
+
+    Attach before navigating, call reset() before each navigation to a
+    candidate profile (so year discovery and probes of other years don't
+    leak into the result), then build() once the page has loaded.
+    """
+
+    def __init__(self, page):
+        self.page = page
+        self.payloads = []
+        self._attached = False
+
+    def _on_response(self, response):
+        try:
+            if "json" not in response.headers.get("content-type", "").lower():
+                return
+            if "clarivate" not in response.url:
+                return
+            self.payloads.append((response.url, response.json()))
+        except:
+            pass
+
+    def attach(self):
+        if not self._attached:
+            self.page.on("response", self._on_response)
+            self._attached = True
+        return self
+
+    def reset(self):
+        """Forgets the payloads captured so far (e.g. from another year's page)."""
+        self.payloads = []
+
+    def detach(self):
+        if self._attached:
+            self.page.remove_listener("response", self._on_response)
+            self._attached = False
+
+    def load_lazy_sections(self, timeout=10000):
+        """Scrolls through the page so lazily fetched ranking payloads arrive (timeout clamped to the active CancelToken)."""
+        try:
+            self.page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+            self.page.wait_for_load_state("networkidle", timeout=jcr_cancel.timeout_ms(timeout))
+        except:
+            pass
+        jcr_cancel.check()
+
+    def build(self, journal_name, year):
+        started = time.monotonic()
+        result = build_profile(list(self.payloads), journal_name, year)
+        print(f"Captured {len(self.payloads)} JSON payloads: "
+              f"{len(result['rankings'])} JIF / {len(result['jci_rankings'])} JCI categories "
+              f"({time.monotonic() - started:.2f}s)", file=sys.stderr)
+        return result
@@ -7,6 +7,10 @@ import csv
 import os
 import sys
 import queue
+import collections
+import time
+import logging
+import logging.handlers
 
 # --- CONFIG ---
 ctk.set_appearance_mode("System")
@@ -87,10 +91,24 @@ except Exception as e:
 # ------------------------------------
 
 # Global placeholders for lazy loaded modules
-get_journal_shortname = None
+BackendSession = None
 get_jcr_data = None
 save_jcr_data_csv = None
+load_jcr_data_csv = None
 calculate_category_averages = None
+resolution_index = None
+
+TYPEAHEAD_DELAY_MS = 350 # Pause in typing before JCR is queried
+TYPEAHEAD_MIN_CHARS = 3
+
+DEBUG_BUFFER_LINES = 5000 # Debug lines kept in memory; older ones are only in the log file
+LOG_FLUSH_MS = 200 # How often queued log lines are moved into the UI
+LOG_FLUSH_MAX_LINES = 2000 # Per flush, so a burst never stalls the event loop
+LOG_LEVELS = ["DEBUG", "INFO", "WARNING", "ERROR"]
+
+QUEUE_REFRESH_MS = 500 # Dashboard redraw interval
+JOB_TIMEOUT = 300 # Seconds one journal (resolve + scrape) may take before it is abandoned
+WORKER_CHOICES = ["1", "2", "3", "4"]
 
 class ResultListFrame(ctk.CTkScrollableFrame):
     def __init__(self, master, selection_callback, **kwargs):
@@ -110,32 +128,264 @@ class ResultListFrame(ctk.CTkScrollableFrame):
             self.buttons.append(btn)
 
 class DebugWindow(ctk.CTkToplevel):
-    def __init__(self, master):
+    def __init__(self, master, level="DEBUG", on_level=None):
         super().__init__(master)
         self.title("Debug Log")
         self.geometry("600x400")
+        self.level = level
+        self.on_level = on_level
+        self.level_menu = ctk.CTkOptionMenu(self, values=LOG_LEVELS, command=self.set_level, width=120)
+        self.level_menu.set(level)
+        self.level_menu.pack(anchor="e", padx=10, pady=(10, 0))
         self.text_area = ctk.CTkTextbox(self, wrap="none")
         self.text_area.pack(expand=True, fill="both", padx=10, pady=10)
-        
-    def log(self, text):
+        self.text_area.configure(state="disabled")
+
+    def set_level(self, level):
+        self.level = level
+        if self.on_level:
+            self.on_level(level)
+
+    def shows(self, level):
+        return LOG_LEVELS.index(level) >= LOG_LEVELS.index(self.level)
+
+    def log(self, entries, replace=False):
+        """Appends (level, line) entries at or above the selected level in one insert."""
+        text = "".join(line for level, line in entries if self.shows(level))
+        if not text and not replace:
+            return
         self.text_area.configure(state="normal")
+        if replace:
+            self.text_area.delete("1.0", tk.END)
         self.text_area.insert(tk.END, text)
+        # Keep the widget as bounded as the buffer behind it
+        excess = int(self.text_area.index("end-1c").split(".")[0]) - DEBUG_BUFFER_LINES
+        if excess > 0:
+            self.text_area.delete("1.0", f"{excess + 1}.0")
         self.text_area.see(tk.END)
         self.text_area.configure(state="disabled")
 
+def log_level(line):
+    """Guesses the level of a scraper stderr line from its wording."""
+    head = line.lstrip()[:80].lower()
+    if head.startswith("debug"):
+        return "DEBUG"
+    if "error" in head or "failed" in head or "traceback" in head or "exception" in head:
+        return "ERROR"
+    if "warning" in head or "timeout" in head or "could not" in head or "not found" in head:
+        return "WARNING"
+    return "INFO"
+
 class RedirectedStderr:
-    def __init__(self, app_ref, original_stderr):
+    """
+    Replaces sys.stderr for the GUI. Writes from any thread only split the
+    text into lines and put them on a bounded queue; the UI drains it on a timer
+    (JCRApp.flush_debug_log), so heavy logging costs the Tk event loop one
+    batched insert per tick instead of a callback per write. Every line is
+    also appended to a rotating log file.
+    """
+
+    def __init__(self, app_ref, original_stderr, log_path=None):
         self.app_ref = app_ref
         self.original_stderr = original_stderr
+        # Bounded too: if the UI stalls, the oldest lines are dropped (they are still in the file)
+        self.lines = collections.deque(maxlen=DEBUG_BUFFER_LINES)
+        self._partial = ""
+        self._lock = threading.Lock()
+        self.file_logger = None
+        if log_path:
+            try:
+                handler = logging.handlers.RotatingFileHandler(log_path, maxBytes=2 * 1024 * 1024,
+                                                               backupCount=3, encoding="utf-8")
+                handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+                self.file_logger = logging.getLogger("jcr_gui.stderr")
+                self.file_logger.propagate = False
+                self.file_logger.setLevel(logging.DEBUG)
+                self.file_logger.addHandler(handler)
+            except Exception as e:
+                original_stderr.write(f"Could not open log file {log_path}: {e}\n")
 
     def write(self, message):
-        self.original_stderr.write(message)
-        # Schedule update on UI thread
-        if message:
-            self.app_ref.after(0, lambda: self.app_ref.log_debug(message))
+        if self.original_stderr:
+            self.original_stderr.write(message)
+        if not message:
+            return
+        with self._lock:
+            text = self._partial + message
+            *complete, self._partial = text.split("\n")
+        for line in complete:
+            level = log_level(line)
+            self.lines.append((level, line + "\n"))
+            if self.file_logger:
+                self.file_logger.log(getattr(logging, level), line)
+
+    def drain(self, limit):
+        entries = []
+        try:
+            while len(entries) < limit:
+                entries.append(self.lines.popleft())
+        except IndexError:
+            pass
+        return entries
 
     def flush(self):
-        self.original_stderr.flush()
+        if self.original_stderr:
+            self.original_stderr.flush()
+
+class ScrapeJob:
+    """One journal in the GUI queue. Workers update it; the dashboard only reads it."""
+
+    def __init__(self, journal, start_year, out_dir):
+        self.journal = journal
+        self.start_year = start_year
+        self.out_dir = out_dir
+        self.short_name = ""
+        self.state = "queued" # queued, resolving, scraping, analyzing, done, failed, cancelled
+        self.cache = ""
+        self.error = ""
+        self.averages = None
+        self.started = None
+        self.finished = None
+        self.cancelled = False
+        self.token = None # jcr_cancel.CancelToken while running
+
+    def elapsed(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.monotonic()) - self.started
+
+    @property
+    def active(self):
+        return self.state not in ("done", "failed", "cancelled")
+
+class JournalQueue:
+    """
+    Runs ScrapeJobs on up to `workers` threads, each with its own browser
+    pool (sync Playwright is thread-bound). Name resolution that needs JCR
+    search goes through the app's BackendSession.
+
+    Cancelling a queued job skips it; a running job is stopped at its next
+    wait through its CancelToken, as is one that runs past JOB_TIMEOUT.
+    """
+
+    def __init__(self, process, workers=2):
+        self.process = process # process(job, pool)
+        self.workers = workers
+        self.jobs = []
+        self._pending = queue.Queue()
+        self._threads = []
+        self._lock = threading.Lock()
+
+    def add(self, journals, start_year, out_dir):
+        added = []
+        for journal in journals:
+            job = ScrapeJob(journal, start_year, out_dir)
+            self.jobs.append(job)
+            self._pending.put(job)
+            added.append(job)
+        self._top_up()
+        return added
+
+    def cancel(self, job):
+        job.cancelled = True
+        if job.token:
+            job.token.cancel("Cancelled by user")
+        if job.state == "queued":
+            job.state = "cancelled"
+
+    def set_workers(self, workers):
+        self.workers = max(1, workers)
+        self._top_up()
+
+    def _top_up(self):
+        # _threads holds the workers still taking jobs; one leaves it in the
+        # same critical section in which it decides to exit (_next_job)
+        with self._lock:
+            for _ in range(min(self.workers - len(self._threads), self._pending.qsize())):
+                t = threading.Thread(target=self._worker, name=f"jcr-gui-worker-{len(self._threads)}", daemon=True)
+                t.start()
+                self._threads.append(t)
+
+    def _next_job(self):
+        """The next queued job, or None once this worker should exit (it then no longer counts as one)."""
+        me = threading.current_thread()
+        with self._lock:
+            # Surplus workers exit after their job when parallelism is lowered
+            if len(self._threads) <= self.workers:
+                try:
+                    return self._pending.get_nowait()
+                except queue.Empty:
+                    pass
+            self._threads.remove(me)
+            return None
+
+    def _worker(self):
+        from browser_pool import get_default_pool, close_default_pool
+        from jcr_cancel import CancelToken
+        try:
+            pool = get_default_pool()
+            while True:
+                job = self._next_job()
+                if job is None:
+                    return
+                if job.cancelled:
+                    continue
+                job.token = CancelToken(timeout=JOB_TIMEOUT)
+                if job.cancelled: # Cancelled while the token was being created
+                    job.token.cancel("Cancelled by user")
+                job.started = time.monotonic()
+                try:
+                    self.process(job, pool)
+                    if job.cancelled:
+                        job.state = "cancelled"
+                    elif job.state != "failed":
+                        job.state = "done"
+                except Exception as e:
+                    job.state = "cancelled" if job.cancelled else "failed"
+                    job.error = str(e)
+                    print(f"Process Error ({job.journal}): {e}", file=sys.stderr)
+                finally:
+                    job.finished = time.monotonic()
+                    job.token = None
+        finally:
+            with self._lock:
+                if threading.current_thread() in self._threads: # Left without _next_job (an error)
+                    self._threads.remove(threading.current_thread())
+            close_default_pool()
+
+class QueueFrame(ctk.CTkScrollableFrame):
+    """Dashboard with one row per queued journal: status, elapsed time, cache and a cancel button."""
+
+    def __init__(self, master, on_cancel, **kwargs):
+        super().__init__(master, **kwargs)
+        self.on_cancel = on_cancel
+        self.rows = {}
+        self.grid_columnconfigure(0, weight=1)
+        for col, title in enumerate(["Journal", "Status", "Elapsed", "Cache", ""]):
+            ctk.CTkLabel(self, text=title, anchor="w", font=ctk.CTkFont(weight="bold")).grid(row=0, column=col, padx=4, sticky="w")
+
+    def refresh(self, jobs):
+        for job in jobs:
+            row = self.rows.get(id(job))
+            if row is None:
+                r = len(self.rows) + 1
+                row = {
+                    "name": ctk.CTkLabel(self, text=job.journal, anchor="w"),
+                    "state": ctk.CTkLabel(self, anchor="w", width=90),
+                    "elapsed": ctk.CTkLabel(self, anchor="e", width=60),
+                    "cache": ctk.CTkLabel(self, anchor="w", width=50),
+                    "cancel": ctk.CTkButton(self, text="Cancel", width=60, command=lambda j=job: self.on_cancel(j))
+                }
+                for col, key in enumerate(["name", "state", "elapsed", "cache", "cancel"]):
+                    row[key].grid(row=r, column=col, padx=4, pady=1, sticky="w")
+                self.rows[id(job)] = row
+            name = job.journal if not job.short_name or job.short_name == job.journal else f"{job.journal} ({job.short_name})"
+            row["name"].configure(text=name)
+            state = job.state if not job.error else f"{job.state}: {job.error[:40]}"
+            row["state"].configure(text=state)
+            row["elapsed"].configure(text=f"{job.elapsed():.0f}s" if job.started else "")
+            row["cache"].configure(text=job.cache)
+            row["cancel"].configure(state="normal" if job.active and not job.cancelled else "disabled")
 
 class JCRApp(ctk.CTk):
     def __init__(self):
@@ -145,9 +395,15 @@ class JCRApp(ctk.CTk):
         
         # Setup Debug redirection
         self.debug_window = None
-        self.debug_buffer = [] # Store logs even if window closed
+        self.debug_level = "DEBUG"
+        self.debug_buffer = collections.deque(maxlen=DEBUG_BUFFER_LINES) # Store logs even if window closed
         self.original_stderr = sys.stderr
-        sys.stderr = RedirectedStderr(self, self.original_stderr)
+        sys.stderr = RedirectedStderr(self, self.original_stderr,
+                                      os.path.join(os.path.expanduser("~"), "jcr_gui_stderr.log"))
+        self.after(LOG_FLUSH_MS, self.flush_debug_log)
+        
+        self.session = None # Created once the modules are loaded
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
         
         # Main Layout
         self.grid_columnconfigure(0, weight=1)
@@ -162,6 +418,12 @@ class JCRApp(ctk.CTk):
         ctk.CTkLabel(self.input_frame, text="Journal Name:").grid(row=0, column=0, padx=10, pady=10, sticky="w")
         self.journal_entry = ctk.CTkEntry(self.input_frame, placeholder_text="e.g. Feminist Anthropology")
         self.journal_entry.grid(row=0, column=1, padx=10, pady=10, sticky="ew")
+        self.journal_entry.bind("<KeyRelease>", self.on_journal_typed)
+        self._typeahead_query = ""
+        self._typeahead_job = None
+        self._search_generation = 0
+        self._search_future = None
+        self._search_token = None # jcr_cancel.CancelToken of the current search
         
         self.search_btn = ctk.CTkButton(self.input_frame, text="Search", width=100, command=self.run_search)
         self.search_btn.grid(row=0, column=2, padx=10, pady=10)
@@ -170,54 +432,89 @@ class JCRApp(ctk.CTk):
         self.result_list = ResultListFrame(self.input_frame, selection_callback=self.on_list_select, height=100)
         self.result_list.grid(row=1, column=1, columnspan=2, padx=10, pady=(0, 10), sticky="ew")
         
+        # Journal list (one per line) for queueing many at once
+        ctk.CTkLabel(self.input_frame, text="Journal List:").grid(row=2, column=0, padx=10, pady=10, sticky="nw")
+        self.journal_list_text = ctk.CTkTextbox(self.input_frame, height=70)
+        self.journal_list_text.grid(row=2, column=1, padx=10, pady=10, sticky="ew")
+        self.import_btn = ctk.CTkButton(self.input_frame, text="Import...", width=100, command=self.import_journal_list)
+        self.import_btn.grid(row=2, column=2, padx=10, pady=10, sticky="n")
+
         # Start Year
-        ctk.CTkLabel(self.input_frame, text="Start Year:").grid(row=2, column=0, padx=10, pady=10, sticky="w")
+        ctk.CTkLabel(self.input_frame, text="Start Year:").grid(row=3, column=0, padx=10, pady=10, sticky="w")
         self.year_entry = ctk.CTkEntry(self.input_frame)
         self.year_entry.insert(0, "2024")
-        self.year_entry.grid(row=2, column=1, padx=10, pady=10, sticky="ew")
+        self.year_entry.grid(row=3, column=1, padx=10, pady=10, sticky="w")
+
+        # Parallel workers for the journal queue
+        self.workers_menu = ctk.CTkOptionMenu(self.input_frame, values=WORKER_CHOICES, width=100,
+                                              command=lambda v: self.journal_queue.set_workers(int(v)))
+        self.workers_menu.set("2")
+        self.workers_menu.grid(row=3, column=2, padx=10, pady=10)
+        ctk.CTkLabel(self.input_frame, text="Workers:").grid(row=3, column=1, padx=10, pady=10, sticky="e")
         
         # Output Directory
-        ctk.CTkLabel(self.input_frame, text="Output Dir:").grid(row=3, column=0, padx=10, pady=10, sticky="w")
+        ctk.CTkLabel(self.input_frame, text="Output Dir:").grid(row=4, column=0, padx=10, pady=10, sticky="w")
         self.out_dir_entry = ctk.CTkEntry(self.input_frame)
         default_dir = os.path.join(os.path.expanduser("~"), "Documents", "JCR_Output")
         self.out_dir_entry.insert(0, default_dir)
-        self.out_dir_entry.grid(row=3, column=1, padx=10, pady=10, sticky="ew")
+        self.out_dir_entry.grid(row=4, column=1, padx=10, pady=10, sticky="ew")
         
         self.browse_btn = ctk.CTkButton(self.input_frame, text="Browse", width=100, command=self.browse_dir)
-        self.browse_btn.grid(row=3, column=2, padx=10, pady=10)
+        self.browse_btn.grid(row=4, column=2, padx=10, pady=10)
         
         # Run Button & Debug
         self.run_btn = ctk.CTkButton(self.input_frame, text="Get Data & Analyze", command=self.start_process, fg_color="#2CC985", hover_color="#229966") # Greenish
-        self.run_btn.grid(row=4, column=0, columnspan=2, padx=(20, 5), pady=20, sticky="ew")
+        self.run_btn.grid(row=5, column=0, columnspan=2, padx=(20, 5), pady=20, sticky="ew")
         
         self.debug_btn = ctk.CTkButton(self.input_frame, text="Show Debug Log", width=120, command=self.open_debug_window)
-        self.debug_btn.grid(row=4, column=2, padx=(5, 20), pady=20)
+        self.debug_btn.grid(row=5, column=2, padx=(5, 20), pady=20)
         
         # --- OUTPUT FRAME ---
         self.output_frame = ctk.CTkFrame(self)
         self.output_frame.grid(row=1, column=0, padx=20, pady=(0, 20), sticky="nsew")
-        self.output_frame.grid_rowconfigure(0, weight=1)
+        self.output_frame.grid_rowconfigure(1, weight=1)
         self.output_frame.grid_columnconfigure(0, weight=1)
+        self.output_frame.grid_columnconfigure(1, weight=1)
+        
+        # Queue dashboard and the combined averages of finished journals
+        self.journal_queue = JournalQueue(self.process_logic, workers=int(self.workers_menu.get()))
+        self.queue_frame = QueueFrame(self.output_frame, on_cancel=self.journal_queue.cancel, height=160)
+        self.queue_frame.grid(row=0, column=0, padx=10, pady=(10, 0), sticky="nsew")
+        self.combined_text = ctk.CTkTextbox(self.output_frame, state="disabled", wrap="none", font=("Courier", 12), height=160)
+        self.combined_text.grid(row=0, column=1, padx=10, pady=(10, 0), sticky="nsew")
+        self._combined_shown = 0
         
         self.result_text = ctk.CTkTextbox(self.output_frame, state="disabled", wrap="none", font=("Courier", 12))
-        self.result_text.grid(row=0, column=0, padx=10, pady=10, sticky="nsew")
+        self.result_text.grid(row=1, column=0, columnspan=2, padx=10, pady=10, sticky="nsew")
         
         # Status Bar
         self.status_label = ctk.CTkLabel(self, text="Ready", anchor="w")
         self.status_label.grid(row=2, column=0, padx=20, pady=(0, 10), sticky="ew")
+        self.after(QUEUE_REFRESH_MS, self.refresh_queue)
 
     def open_debug_window(self):
         if self.debug_window is None or not self.debug_window.winfo_exists():
-            self.debug_window = DebugWindow(self)
+            self.debug_window = DebugWindow(self, self.debug_level, on_level=self.set_debug_level)
             # Re-populate
-            self.debug_window.log("".join(self.debug_buffer))
+            self.debug_window.log(self.debug_buffer, replace=True)
         else:
             self.debug_window.focus()
 
-    def log_debug(self, msg):
-        self.debug_buffer.append(msg)
+    def set_debug_level(self, level):
+        self.debug_level = level
         if self.debug_window and self.debug_window.winfo_exists():
-            self.debug_window.log(msg)
+            self.debug_window.log(self.debug_buffer, replace=True)
+
+    def flush_debug_log(self):
+        """Moves queued stderr lines into the buffer and the debug window, then re-arms itself."""
+        try:
+            entries = sys.stderr.drain(LOG_FLUSH_MAX_LINES) if isinstance(sys.stderr, RedirectedStderr) else []
+            if entries:
+                self.debug_buffer.extend(entries)
+                if self.debug_window and self.debug_window.winfo_exists():
+                    self.debug_window.log(entries)
+        finally:
+            self.after(LOG_FLUSH_MS, self.flush_debug_log)
 
     def browse_dir(self):
         d = filedialog.askdirectory(initialdir=self.out_dir_entry.get())
@@ -225,57 +522,91 @@ class JCRApp(ctk.CTk):
             self.out_dir_entry.delete(0, tk.END)
             self.out_dir_entry.insert(0, d)
 
+    def on_journal_typed(self, event=None):
+        """Debounced type-ahead: known titles at once, JCR suggestions after a pause."""
+        query = self.journal_entry.get().strip()
+        if query == self._typeahead_query:
+            return
+        self._typeahead_query = query
+        self.cancel_search()
+        if len(query) < TYPEAHEAD_MIN_CHARS:
+            self.result_list.populate([])
+            return
+
+        if resolution_index:
+            self.result_list.populate(resolution_index.search_prefix(query))
+        generation = self._search_generation
+        self._typeahead_job = self.after(TYPEAHEAD_DELAY_MS, lambda: self.start_search(query, generation))
+
+    def cancel_search(self):
+        """Drops the pending debounce and any queued or running search."""
+        self._search_generation += 1
+        if self._typeahead_job:
+            self.after_cancel(self._typeahead_job)
+            self._typeahead_job = None
+        if self._search_token:
+            # Stops a running search at its next wait
+            self._search_token.cancel("Superseded by a newer search")
+            self._search_token = None
+        if self._search_future:
+            self._search_future.cancel()
+            self._search_future = None
+
     def run_search(self):
         query = self.journal_entry.get().strip()
         if not query:
             return
-            
-        self.search_btn.configure(state="disabled")
-        self.result_list.populate([]) # Clear
+        self._typeahead_query = query
+        self.cancel_search()
+        self.start_search(query, self._search_generation)
+
+    def start_search(self, query, generation):
+        self._typeahead_job = None
+        if generation != self._search_generation or not self.session:
+            return
+        from jcr_cancel import CancelToken
         self.update_status(f"Searching for '{query}'...")
-        
-        t = threading.Thread(target=self.search_logic, args=(query,))
-        t.daemon = True
-        t.start()
+        token = self._search_token = CancelToken()
+        future = self.session.submit(lambda backend: backend.search_journal(query, cancel=token))
+        self._search_future = future
+        future.add_done_callback(lambda f: self.after(0, lambda: self.show_suggestions(query, generation, f)))
 
-    def search_logic(self, query):
-        global get_journal_shortname
-        backend = None
+    def show_suggestions(self, query, generation, future):
+        if generation != self._search_generation or future.cancelled():
+            return
+        self._search_future = None
+        self._search_token = None
         try:
-            backend = get_journal_shortname()
-            backend.start_session()
-            results = backend.search_journal(query)
-            
-            def _update_ui():
-                self.result_list.populate(results)
-                self.search_btn.configure(state="normal")
-                if not results:
-                     self.update_status("No results found.")
-                else:
-                     self.update_status(f"Found {len(results)} results. Select one.")
-                     
-            self.after(0, _update_ui)
-            
+            results = future.result()
         except Exception as e:
-            err_msg = str(e)
-            def _err():
-                self.update_status(f"Search error: {err_msg}")
-                self.search_btn.configure(state="normal")
-            self.after(0, _err)
-        finally:
-             if backend:
-                 backend.close()
+            self.update_status(f"Search error: {e}")
+            return
+
+        # Keep known titles the search didn't return at the end of the list
+        if resolution_index:
+            results = results + [t for t in resolution_index.search_prefix(query) if t not in results]
+        self.result_list.populate(results)
+        if not results:
+             self.update_status("No results found.")
+        else:
+             self.update_status(f"Found {len(results)} results. Select one.")
 
     def on_list_select(self, val):
+        self.cancel_search()
+        self._typeahead_query = val
         self.journal_entry.delete(0, tk.END)
         self.journal_entry.insert(0, val)
 
     def start_process(self):
-        journal = self.journal_entry.get().strip()
+        # The journal list if one was entered, otherwise the single journal
+        journals = [line.strip() for line in self.journal_list_text.get("1.0", tk.END).splitlines()]
+        journals = list(dict.fromkeys(j for j in journals if j and not j.startswith("#")))
+        if not journals and self.journal_entry.get().strip():
+            journals = [self.journal_entry.get().strip()]
         year_str = self.year_entry.get().strip()
         out_dir = self.out_dir_entry.get().strip()
         
-        if not journal:
+        if not journals:
             return
 
         if not out_dir:
@@ -286,89 +617,150 @@ class JCRApp(ctk.CTk):
         except ValueError:
             return
 
-        self.run_btn.configure(state="disabled")
-        self.result_text.configure(state="normal")
-        self.result_text.delete("1.0", tk.END)
-        self.result_text.configure(state="disabled")
-        
-        t = threading.Thread(target=self.process_logic, args=(journal, start_year, out_dir))
-        t.daemon = True
-        t.start()
-        
-    def process_logic(self, journal_input, start_year, out_dir):
-        global get_journal_shortname, get_jcr_data, save_jcr_data_csv, calculate_category_averages
+        if not any(job.active for job in self.journal_queue.jobs):
+            self.result_text.configure(state="normal")
+            self.result_text.delete("1.0", tk.END)
+            self.result_text.configure(state="disabled")
         
+        self.journal_list_text.delete("1.0", tk.END)
+        self.journal_queue.add(journals, start_year, out_dir)
+        self.update_status(f"Queued {len(journals)} journal(s).")
+
+    def import_journal_list(self):
+        path = filedialog.askopenfilename(filetypes=[("Journal lists", "*.txt *.csv"), ("All files", "*.*")])
+        if not path:
+            return
+        from jcr_batch import read_journal_list
         try:
-            if not os.path.exists(out_dir):
-                os.makedirs(out_dir, exist_ok=True)
+            journals = read_journal_list(path)
+        except Exception as e:
+            messagebox.showerror("Import failed", str(e))
+            return
+        self.journal_list_text.insert(tk.END, "\n".join(journals) + "\n")
+        self.update_status(f"Imported {len(journals)} journals from {os.path.basename(path)}.")
 
-            # 1. Resolve Name
-            self.update_status("Resolving journal name...")
-            self.log_main(f"Starting analysis for: {journal_input}\n")
-            
-            backend = None
+    def refresh_queue(self):
+        """Redraws the dashboard and, when journals have finished since last time, the combined table."""
+        try:
+            jobs = list(self.journal_queue.jobs)
+            self.queue_frame.refresh(jobs)
+            finished = [job for job in jobs if job.state == "done" and job.averages is not None]
+            if len(finished) != self._combined_shown:
+                self._combined_shown = len(finished)
+                self.show_combined(finished)
+                self.save_combined_csv(finished)
+            running = sum(1 for job in jobs if job.active)
+            if jobs and running:
+                self.status_label.configure(text=f"{len(jobs) - running}/{len(jobs)} journals finished, {running} in progress...")
+        finally:
+            self.after(QUEUE_REFRESH_MS, self.refresh_queue)
+
+    def show_combined(self, jobs):
+        lines = [f"{'Journal':<20} | {'Metric':<6} | {'Category':<40} | {'Avg Pct':<8}"]
+        lines.append("-" * len(lines[0]))
+        for job in jobs:
+            for metric, cats in job.averages.items():
+                for cat, val in cats.items():
+                    lines.append(f"{job.short_name[:20]:<20} | {metric:<6} | {cat[:40]:<40} | {val:<8}")
+        self.combined_text.configure(state="normal")
+        self.combined_text.delete("1.0", tk.END)
+        self.combined_text.insert(tk.END, "\n".join(lines) + "\n")
+        self.combined_text.configure(state="disabled")
+
+    def save_combined_csv(self, jobs):
+        """Writes the combined averages of each output dir's finished journals next to their CSVs."""
+        by_dir = {}
+        for job in jobs:
+            by_dir.setdefault((job.out_dir, job.start_year), []).append(job)
+        for (out_dir, start_year), dir_jobs in by_dir.items():
+            filename = os.path.join(out_dir, f"combined_averages_{start_year}.csv")
             try:
-                backend = get_journal_shortname() 
-                backend.start_session()
-                results = backend.search_journal(journal_input)
-                if not results:
-                     raise Exception("No suggestions found.")
-                     
-                target_journal = None
-                for res in results:
-                    if res.lower().strip() == journal_input.lower().strip():
-                        target_journal = res
-                        break
-                
-                if not target_journal:
-                     target_journal = results[0]
-                     self.log_main(f"No exact match. Using: '{target_journal}'\n")
-                
-                short_name = backend.select_and_resolve(target_journal)
-                self.log_main(f"Resolved '{journal_input}' -> '{short_name}'\n")
-                
+                with open(filename, 'w', newline='', encoding='utf-8') as f:
+                    writer = csv.writer(f)
+                    writer.writerow(["Journal", "Metric", "Category", "5-Year Average Percentile"])
+                    for job in dir_jobs:
+                        for metric, cats in job.averages.items():
+                            for cat, val in cats.items():
+                                writer.writerow([job.short_name, metric, cat, val])
             except Exception as e:
-                self.log_main(f"Could not resolve shortname (using input): {e}\n")
-                short_name = journal_input
-            finally:
-                if backend:
-                    backend.close()
-                
-            # 2. Scrape Data
-            self.update_status(f"Scraping JCR data for '{short_name}'...")
-            data = get_jcr_data(short_name, target_year=start_year)
-            
-            if not data:
-                self.update_status("Error: No data found.")
-                self.enable_btn()
-                return
-                
-            # 3. Save Scraped CSV
-            csv_filename = os.path.join(out_dir, f"{short_name}_jcr_data.csv")
-            save_jcr_data_csv(data, csv_filename)
-            self.log_main(f"Saved raw data to {csv_filename}\n")
-            
-            # 4. Analyze
-            self.update_status("Analyzing data...")
-            averages = calculate_category_averages(csv_filename, start_year)
-            
-            # 5. Output Table (with stats)
-            year_stats = self.extract_year_stats(data, start_year)
-            self.display_results(averages, short_name, start_year, year_stats)
+                print(f"Could not save {filename}: {e}", file=sys.stderr)
+        
+    def resolve_with_backend(self, backend, journal_input, cancel=None):
+        """Runs on the session thread: search JCR and resolve the best match."""
+        results = backend.search_journal(journal_input, cancel=cancel)
+        if not results:
+             raise Exception("No suggestions found.")
+         
+        target_journal = None
+        for res in results:
+            if res.lower().strip() == journal_input.lower().strip():
+                target_journal = res
+                break
+    
+        if not target_journal:
+             target_journal = results[0]
+             self.log_main(f"No exact match. Using: '{target_journal}'\n")
+    
+        return backend.select_and_resolve(target_journal, cancel=cancel)
+
+    def process_logic(self, job, pool):
+        """Runs one queued journal on a JournalQueue worker thread, using that worker's browser pool."""
+        global get_jcr_data, save_jcr_data_csv, calculate_category_averages
+        journal_input, start_year, out_dir = job.journal, job.start_year, job.out_dir
+        
+        if not os.path.exists(out_dir):
+            os.makedirs(out_dir, exist_ok=True)
+
+        # 1. Resolve Name
+        job.state = "resolving"
+        self.log_main(f"Starting analysis for: {journal_input}\n")
+        
+        try:
+            short_name = resolution_index.lookup(journal_input)
+            if short_name:
+                self.log_main(f"Resolved '{journal_input}' -> '{short_name}' (from index)\n")
+            else:
+                short_name = self.session.run(self.resolve_with_backend, journal_input, job.token)
+                self.log_main(f"Resolved '{journal_input}' -> '{short_name}'\n")
             
-            # 6. Save Analysis CSV
-            out_filename = os.path.join(out_dir, f"{short_name}_averages_{start_year}.csv")
-            self.save_analysis_csv(averages, out_filename)
-            # Ensure newline before this log to avoid same-line print
-            self.log_main(f"\n> Saved averages to {out_filename}\n")
+        except Exception as e:
+            job.token.check()
+            self.log_main(f"Could not resolve shortname (using input): {e}\n")
+            short_name = journal_input
+        job.short_name = short_name
             
-            self.update_status("Done.")
+        # 2. Scrape Data (merging into a previous run's CSV if there is one)
+        job.state = "scraping"
+        csv_filename = os.path.join(out_dir, f"{short_name}_jcr_data.csv")
+        known_data = load_jcr_data_csv(csv_filename)
+        data = get_jcr_data(short_name, target_year=start_year, pool=pool,
+                            incremental=known_data is not None, known_data=known_data, cancel=job.token)
+        
+        if not data:
+            job.state = "failed"
+            job.error = "No data found"
+            return
+        job.cache = "hit" if data.get("cache", {}).get("hit") else "miss"
+        job.token.check()
             
-        except Exception as e:
-            self.update_status(f"Error: {e}")
-            print(f"Process Error: {e}", file=sys.stderr)
-        finally:
-            self.enable_btn()
+        # 3. Save Scraped CSV
+        save_jcr_data_csv(data, csv_filename)
+        self.log_main(f"Saved raw data to {csv_filename}\n")
+        
+        # 4. Analyze
+        job.state = "analyzing"
+        averages = calculate_category_averages(csv_filename, start_year)
+        
+        # 5. Output Table (with stats)
+        year_stats = self.extract_year_stats(data, start_year)
+        self.display_results(averages, short_name, start_year, year_stats)
+        
+        # 6. Save Analysis CSV
+        out_filename = os.path.join(out_dir, f"{short_name}_averages_{start_year}.csv")
+        self.save_analysis_csv(averages, out_filename)
+        # Ensure newline before this log to avoid same-line print
+        self.log_main(f"\n> Saved averages to {out_filename}\n")
+        job.averages = averages
 
     def result_to_table_str(self, results):
         lines = []
@@ -428,7 +820,7 @@ class JCRApp(ctk.CTk):
     def display_results(self, results, journal, year, stats=None):
         table_str = self.result_to_table_str(results)
         
-        stats_str = ""
+        stats_str = f"== {journal} ==\n"
         if stats:
             stats_str += f"JIF ({stats['jif_year']}): {stats['jif']}\n"
             stats_str += f"\nCategory Stats for {year}:\n"
@@ -468,21 +860,33 @@ class JCRApp(ctk.CTk):
             self.result_text.configure(state="disabled")
         self.after(0, _log)
 
-    def enable_btn(self):
-        self.after(0, lambda: self.run_btn.configure(state="normal"))
+    def on_close(self):
+        for job in self.journal_queue.jobs:
+            self.journal_queue.cancel(job)
+        if self.session:
+            self.session.close()
+        sys.stderr = self.original_stderr
+        self.destroy()
 
 def load_modules(app_instance, loading_label, loading_win):
-    global get_journal_shortname, get_jcr_data, save_jcr_data_csv, calculate_category_averages
+    global BackendSession, get_jcr_data, save_jcr_data_csv, load_jcr_data_csv, calculate_category_averages, resolution_index
     
     try:
-        from jcr_search_cli import JCRBackend
-        from extract_jcr_data import get_jcr_data as _get_data, save_csv as _save_csv
+        from jcr_session import BackendSession as _BackendSession
+        from extract_jcr_data import get_jcr_data_cached as _get_data, save_csv as _save_csv, load_csv as _load_csv
         from jcr_analysis import calculate_category_averages as _calc_avg
+        from jcr_cache import get_resolution_index
         
-        get_journal_shortname = JCRBackend
+        BackendSession = _BackendSession
         get_jcr_data = _get_data
         save_jcr_data_csv = _save_csv
+        load_jcr_data_csv = _load_csv
         calculate_category_averages = _calc_avg
+        resolution_index = get_resolution_index()
+        
+        # One warm browser session for every search, resolve and scrape
+        app_instance.session = BackendSession()
+        app_instance.session.warm_up()
         
         if log_file:
             with open(log_file, "a") as f: f.write("Lazy imports successful.\n")
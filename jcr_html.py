@@ -0,0 +1,382 @@
+
+import re
+import sys
+from html.parser import HTMLParser
+from jcr_capture import sorted_history
+
+# Parses the serialized HTML of a rendered journal-profile page (e.g.
+# page.content(), or dom.html in a jcr_replay archive) into the same
+# {"metrics", "rankings", "jci_rankings"} dict as get_jcr_data, without a
+# browser. It mirrors the DOM extraction in extract_jcr_data: the same
+# section headers, ".category-value" names, "scroll-it" ranking tables, JCI
+# sibling text and Key Indicators table.
+
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta",
+             "param", "source", "track", "wbr"}
+SKIP_TAGS = {"script", "style", "template", "noscript"}
+# Elements whose innerText starts on a new line
+BLOCK_TAGS = {"address", "article", "aside", "blockquote", "dd", "div", "dl", "dt", "fieldset",
+              "figcaption", "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6", "header",
+              "li", "main", "mat-card", "nav", "ol", "p", "section", "table", "tbody", "thead",
+              "tfoot", "tr", "ul", "br"}
+CELL_TAGS = {"td", "th"}
+
+JIF_SECTION = ("Rank by Journal Impact Factor", "Rank by Journal Citation Indicator (JCI)")
+JCI_SECTION = ("Rank by Journal Citation Indicator (JCI)", "Contributions by Organization")
+
+def parse_jci_text(jci_text):
+    """Parses the 'JCR YEAR / JCI RANK / QUARTILE / PERCENTILE' block text into ranking rows."""
+    rows = []
+    for m in re.findall(r"(\d{4})\s+(\S+)\s+(\S+)\s+(\S+)", jci_text or ""):
+        rows.append({
+            "year": int(m[0]),
+            "rank": m[1],
+            "quartile": m[2],
+            "percentile": m[3]
+        })
+    return rows
+
+def parse_history_rows(rows):
+    """
+    JIF history from the cell texts of the Key Indicators table rows
+    (year in the first column, JIF in the third).
+    """
+    history = []
+    for cells in rows:
+        if len(cells) < 2:
+            continue
+        y_text = cells[0].strip()
+        if y_text.isdigit():
+            history.append({
+                "year": int(y_text),
+                "jif": cells[2].strip() if len(cells) >= 3 else "N/A"
+            })
+    return history
+
+class Node:
+    """Element of the parsed tree; `order` is its position in document order."""
+
+    __slots__ = ("tag", "attrs", "parent", "children", "order", "end")
+
+    def __init__(self, tag, attrs, parent, order):
+        self.tag = tag
+        self.attrs = attrs
+        self.parent = parent
+        self.children = [] # Nodes and text strings
+        self.order = order
+        self.end = order # Order of the last node inside this one
+
+    @property
+    def classes(self):
+        return (self.attrs.get("class") or "").split()
+
+    def has_class(self, name):
+        return name in self.classes
+
+    def elements(self):
+        return [c for c in self.children if isinstance(c, Node)]
+
+    def iter(self):
+        """This element and every element below it, in document order."""
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(reversed(node.elements()))
+
+    def find_all(self, tag=None, cls=None, cls_contains=None):
+        for node in self.iter():
+            if node is self:
+                continue
+            if tag and node.tag != tag:
+                continue
+            if cls and not node.has_class(cls):
+                continue
+            if cls_contains and cls_contains not in (node.attrs.get("class") or ""):
+                continue
+            yield node
+
+    def find(self, tag=None, cls=None, cls_contains=None):
+        return next(self.find_all(tag, cls, cls_contains), None)
+
+    def own_text(self):
+        return "".join(c for c in self.children if isinstance(c, str))
+
+    def text_content(self):
+        parts = []
+
+        def walk(node):
+            for c in node.children:
+                if isinstance(c, str):
+                    parts.append(c)
+                else:
+                    walk(c)
+        walk(self)
+        return "".join(parts)
+
+    def inner_text(self):
+        """Approximates innerText: block elements on their own lines, table cells tab-separated."""
+        parts = []
+
+        def walk(node):
+            for c in node.children:
+                if isinstance(c, str):
+                    parts.append(re.sub(r"\s+", " ", c))
+                    continue
+                if c.tag in BLOCK_TAGS:
+                    parts.append("\n")
+                elif c.tag in CELL_TAGS:
+                    parts.append("\t")
+                walk(c)
+                if c.tag in BLOCK_TAGS:
+                    parts.append("\n")
+        walk(self)
+        text = "".join(parts)
+        text = re.sub(r"[ \t]*\n[ \t\n]*", "\n", text)
+        return re.sub(r" {2,}", " ", text).strip()
+
+    def follows(self, other):
+        """True if `other` starts after this element (compareDocumentPosition FOLLOWING: descendants count)."""
+        return other.order > self.order
+
+    def precedes(self, other):
+        """True if `other` is on this element's XPath following:: axis (after it, not inside it)."""
+        return other.order > self.end
+
+    def next_element_sibling(self):
+        if not self.parent:
+            return None
+        siblings = self.parent.elements()
+        i = siblings.index(self)
+        return siblings[i + 1] if i + 1 < len(siblings) else None
+
+    def ancestor(self, tag):
+        node = self.parent
+        while node is not None and node.tag != tag:
+            node = node.parent
+        return node
+
+class _TreeBuilder(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = Node("#document", {}, None, 0)
+        self.nodes = [self.root]
+        self._stack = [self.root]
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if self._skip:
+            if tag in SKIP_TAGS:
+                self._skip += 1
+            return
+        if tag in SKIP_TAGS:
+            self._skip = 1
+            return
+        parent = self._stack[-1]
+        node = Node(tag, {k: v or "" for k, v in attrs}, parent, len(self.nodes))
+        self.nodes.append(node)
+        parent.children.append(node)
+        if tag not in VOID_TAGS:
+            self._stack.append(node)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS and not self._skip and self._stack[-1].tag == tag:
+            self._close(len(self._stack) - 1)
+
+    def handle_endtag(self, tag):
+        if self._skip:
+            if tag in SKIP_TAGS:
+                self._skip -= 1
+            return
+        # Close up to the matching open element; stray end tags are ignored
+        for i in range(len(self._stack) - 1, 0, -1):
+            if self._stack[i].tag == tag:
+                self._close(i)
+                return
+
+    def _close(self, i):
+        last = len(self.nodes) - 1
+        for node in self._stack[i:]:
+            node.end = last
+        del self._stack[i:]
+
+    def handle_data(self, data):
+        if not self._skip:
+            self._stack[-1].children.append(data)
+
+    def close(self):
+        super().close()
+        self._close(1)
+        self.root.end = len(self.nodes) - 1
+
+def parse_document(html):
+    """Builds the element tree of an HTML document. Returns (root, elements in document order)."""
+    builder = _TreeBuilder()
+    builder.feed(html)
+    builder.close()
+    return builder.root, builder.nodes
+
+def _by_text(nodes, text):
+    """First element with a direct text node containing `text` (like //*[contains(text(), ...)])."""
+    for node in nodes:
+        if text in node.own_text():
+            return node
+    return None
+
+def _table_rows(table):
+    rows = []
+    for tr in table.find_all("tr"):
+        tds = list(tr.find_all("td"))
+        if len(tds) < 4:
+            continue
+        year = tds[0].text_content().strip()
+        if not (year.isdigit() and len(year) == 4):
+            continue
+        rows.append({
+            "year": int(year),
+            "rank": tds[1].text_content().strip(),
+            "quartile": tds[2].text_content().strip(),
+            "percentile": tds[3].text_content().strip()
+        })
+    return rows
+
+def extract_section(root, nodes, section_title, stopper_title, metric_name):
+    """
+    Ranking categories of one section, as extract_carousel_data returns
+    them: {category: rows newest first}. Only categories present in the
+    HTML are found, so carousel pages that weren't rendered are missing.
+    """
+    header = _by_text(nodes, section_title)
+    if header is None:
+        print(f"Header '{section_title}' not found.", file=sys.stderr)
+        return {}
+    stopper = _by_text(nodes, stopper_title) if stopper_title else None
+
+    cats = list(root.find_all(cls="category-value"))
+    tables = list(root.find_all("div", cls_contains="scroll-it"))
+    rankings = {}
+    for idx, el in enumerate(cats):
+        name = el.inner_text().strip()
+        if not name or name in rankings or not header.follows(el):
+            continue
+        if stopper and stopper.follows(el):
+            continue
+        nxt = cats[idx + 1] if idx + 1 < len(cats) else None
+
+        rows = []
+        if metric_name == "JCI":
+            sib = el.next_element_sibling()
+            for _ in range(3):
+                if sib is None:
+                    break
+                text = sib.inner_text()
+                if "JCR YEAR" in text or "JCI PERCENTILE" in text:
+                    rows = parse_jci_text(text)
+                    break
+                sib = sib.next_element_sibling()
+        if not rows:
+            for tbl in [t for t in tables if el.follows(t)][:5]:
+                if stopper and stopper.follows(tbl):
+                    break
+                if nxt and nxt.follows(tbl):
+                    break
+                rows.extend(_table_rows(tbl))
+        if rows:
+            rankings[name] = sorted_history(rows)
+    return rankings
+
+def extract_history(nodes):
+    """JIF history from the Key Indicators table, as get_jcr_data's DOM fallback reads it."""
+    for text in ["Key Indicators", "Journal Impact Factor"]:
+        el = _by_text(nodes, text)
+        if el is None:
+            continue
+        if el.tag.upper() in ("TH", "TD", "TR", "THEAD"):
+            table = el.ancestor("table")
+        else:
+            table = next((n for n in nodes if n.tag == "table" and el.precedes(n)), None)
+        if table is None:
+            continue
+        body = table.find("tbody") or table
+        return parse_history_rows([[td.inner_text() for td in tr.find_all("td")] for tr in body.find_all("tr")])
+    return []
+
+def parse_profile_html(html, journal_name, year=None):
+    """
+    Parses a rendered journal-profile page.
+
+    Args:
+        html: Serialized page HTML.
+        journal_name: JCR short name, copied into the metrics.
+        year: JCR year the page shows; if not given, the newest year in
+            its ranking rows.
+
+    Returns:
+        {"metrics", "rankings", "jci_rankings"} like get_jcr_data (without
+        the target-year fields).
+    """
+    root, nodes = parse_document(html)
+    rankings = extract_section(root, nodes, *JIF_SECTION, "JIF")
+    jci_rankings = extract_section(root, nodes, *JCI_SECTION, "JCI")
+
+    if year is None:
+        years = [r["year"] for rows in list(rankings.values()) + list(jci_rankings.values()) for r in rows]
+        year = max(years) if years else None
+
+    metrics = {
+        "journal": journal_name,
+        "year": year,
+        "jif": "N/A",
+        "five_year_jif": "N/A",
+        "jif_percentile": "N/A"
+    }
+    jif_values = root.find("div", cls="jif-values")
+    value = jif_values.find("p", cls="value") if jif_values else None
+    if value is not None and value.inner_text():
+        metrics["jif"] = value.inner_text().strip()
+    five_year = root.find("p", cls="five-yr-impact-factor-value")
+    if five_year is not None and five_year.inner_text():
+        metrics["five_year_jif"] = five_year.inner_text().strip()
+
+    if rankings:
+        for item in next(iter(rankings.values())):
+            if item["year"] == year:
+                metrics["jif_percentile"] = item["percentile"]
+                break
+    metrics["history"] = extract_history(nodes)
+
+    return {
+        "metrics": metrics,
+        "rankings": rankings,
+        "jci_rankings": jci_rankings
+    }
+
+def parse_profile_file(path, journal_name, year=None):
+    with open(path, encoding="utf-8") as f:
+        return parse_profile_html(f.read(), journal_name, year)
+
+def _parse_job(job):
+    path, journal_name, year = job
+    try:
+        return journal_name, parse_profile_file(path, journal_name, year), ""
+    except Exception as e:
+        return journal_name, None, str(e)
+
+def parse_many(jobs, workers=None, chunksize=8):
+    """
+    Parses many saved pages in a process pool. `jobs` is an iterable of
+    (html_path, journal_name, year); yields (journal_name, data, error) in
+    the same order.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(_parse_job, jobs, chunksize=chunksize)
+
+if __name__ == "__main__":
+    import json
+    if len(sys.argv) < 3:
+        print("Usage: python jcr_html.py <page.html> <SHORT_NAME> [year]")
+        sys.exit(1)
+    year_arg = int(sys.argv[3]) if len(sys.argv) > 3 else None
+    print(json.dumps(parse_profile_file(sys.argv[1], sys.argv[2], year_arg), indent=2))
@@ -0,0 +1,229 @@
+
+import os
+import sys
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+_local = threading.local()
+
+class Instrumentation:
+    """
+    Span timings and counters for one scrape.
+
+    Activate it around the work (`with instr.activate():`) and code on the
+    same thread reports into it through the module-level span() and
+    count(); attach(page) also counts navigations, evaluate calls, sleeps,
+    requests and bytes received on a page. record() returns everything as a
+    plain dict, to_otel() as OpenTelemetry-style span dicts.
+    """
+
+    def __init__(self, journal=None):
+        self.journal = journal
+        self.started = time.time()
+        self._t0 = time.perf_counter()
+        self.spans = []
+        self.counters = {}
+        self._stack = []
+        self._phase = None
+        self._lock = threading.Lock()
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def _open(self, name, attrs):
+        span = {
+            "name": name,
+            "id": len(self.spans) + 1,
+            "parent": self._stack[-1]["id"] if self._stack else None,
+            "start": round(time.perf_counter() - self._t0, 4),
+            "attrs": attrs
+        }
+        self.spans.append(span)
+        self._stack.append(span)
+        return span
+
+    def _close(self, span):
+        while self._stack:
+            top = self._stack.pop()
+            top["seconds"] = round(time.perf_counter() - self._t0 - top["start"], 4)
+            if top is span:
+                break
+
+    @contextmanager
+    def span(self, name, **attrs):
+        span = self._open(name, attrs)
+        try:
+            yield span
+        except BaseException as e:
+            span["error"] = str(e) or type(e).__name__
+            raise
+        finally:
+            self._close(span)
+
+    def phase(self, name, **attrs):
+        """
+        Ends the current phase and starts the next one, for long functions
+        that run through their phases in sequence. Spans opened meanwhile
+        nest under the phase.
+        """
+        self.end_phase()
+        self._phase = self._open(name, attrs)
+
+    def end_phase(self):
+        if self._phase is not None:
+            self._close(self._phase)
+            self._phase = None
+
+    @contextmanager
+    def activate(self):
+        """Makes this the instrumentation span()/count() report to on this thread."""
+        previous = getattr(_local, "current", None)
+        _local.current = self
+        try:
+            yield self
+        finally:
+            _local.current = previous
+
+    def attach(self, page):
+        """Counts navigations, evaluate calls, sleeps, requests and bytes on a page."""
+        instr = self
+
+        def wrap(name, counter):
+            original = getattr(page, name)
+            def wrapper(*args, **kwargs):
+                instr.count(counter)
+                return original(*args, **kwargs)
+            setattr(page, name, wrapper)
+
+        wrap("goto", "navigations")
+        wrap("evaluate", "evaluate_calls")
+        wrap("wait_for_function", "condition_waits")
+        wrap("wait_for_selector", "condition_waits")
+
+        original_wait = page.wait_for_timeout
+        def wait_for_timeout(timeout):
+            instr.count("sleeps")
+            instr.count("sleep_seconds", timeout / 1000.0)
+            return original_wait(timeout)
+        page.wait_for_timeout = wait_for_timeout
+
+        def on_response(response):
+            instr.count("responses")
+            try:
+                instr.count("bytes_received", int(response.headers.get("content-length", 0)))
+            except Exception:
+                pass
+
+        page.on("request", lambda request: instr.count("requests"))
+        page.on("response", on_response)
+        page.on("requestfailed", lambda request: instr.count("failed_requests"))
+        return page
+
+    def phases(self):
+        """Total seconds per span name (finished spans only)."""
+        totals = {}
+        for span in self.spans:
+            if "seconds" in span:
+                totals[span["name"]] = round(totals.get(span["name"], 0.0) + span["seconds"], 4)
+        return totals
+
+    def record(self):
+        self.end_phase()
+        return {
+            "journal": self.journal,
+            "started": self.started,
+            "total_seconds": round(time.perf_counter() - self._t0, 4),
+            "phases": self.phases(),
+            "counters": {k: round(v, 4) if isinstance(v, float) else v for k, v in self.counters.items()},
+            "spans": [dict(s) for s in self.spans]
+        }
+
+    def to_otel(self, trace_id=None):
+        """Spans in the shape of OTLP/JSON span objects (times in unix nanoseconds)."""
+        trace_id = trace_id or os.urandom(16).hex()
+        base = int(self.started * 1e9)
+        out = []
+        for s in self.spans:
+            start = base + int(s["start"] * 1e9)
+            out.append({
+                "traceId": trace_id,
+                "spanId": f"{s['id']:016x}",
+                "parentSpanId": f"{s['parent']:016x}" if s["parent"] else "",
+                "name": s["name"],
+                "startTimeUnixNano": start,
+                "endTimeUnixNano": start + int(s.get("seconds", 0) * 1e9),
+                "attributes": dict(s["attrs"], journal=self.journal),
+                "status": {"code": "ERROR", "message": s["error"]} if "error" in s else {"code": "OK"}
+            })
+        return out
+
+class _Null:
+    """Stand-in used when no instrumentation is active."""
+
+    def count(self, name, n=1):
+        pass
+
+    @contextmanager
+    def span(self, name, **attrs):
+        yield None
+
+    def phase(self, name, **attrs):
+        pass
+
+    def end_phase(self):
+        pass
+
+_null = _Null()
+
+def current():
+    """The instrumentation active on this thread, or a no-op stand-in."""
+    return getattr(_local, "current", None) or _null
+
+def span(name, **attrs):
+    return current().span(name, **attrs)
+
+def count(name, n=1):
+    current().count(name, n)
+
+def sleep(seconds):
+    """Sleep that shows up in the sleep counters and wakes early if the active CancelToken is cancelled."""
+    import jcr_cancel
+    count("sleeps")
+    count("sleep_seconds", seconds)
+    jcr_cancel.sleep(seconds)
+
+def export_jsonl(record, path, otel=False):
+    """Appends one record (or, with otel=True, its spans) to a JSON-lines file."""
+    with open(path, 'a', encoding='utf-8') as f:
+        if otel and isinstance(record, Instrumentation):
+            for s in record.to_otel():
+                f.write(json.dumps(s) + "\n")
+        else:
+            if isinstance(record, Instrumentation):
+                record = record.record()
+            f.write(json.dumps(record) + "\n")
+
+def summarize(records):
+    """Sums phases and counters over many records, e.g. a whole batch read back from JSONL."""
+    phases = {}
+    counters = {}
+    for r in records:
+        for k, v in r.get("phases", {}).items():
+            phases[k] = round(phases.get(k, 0.0) + v, 4)
+        for k, v in r.get("counters", {}).items():
+            counters[k] = counters.get(k, 0) + v
+    return {"journals": len(records),
+            "phases": dict(sorted(phases.items(), key=lambda kv: kv[1], reverse=True)),
+            "counters": counters}
+
+if __name__ == "__main__":
+    # python jcr_instrument.py metrics.jsonl -> where did the time go across a batch
+    if len(sys.argv) < 2:
+        print("Usage: python jcr_instrument.py <metrics.jsonl>")
+        sys.exit(1)
+    with open(sys.argv[1], encoding='utf-8') as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    print(json.dumps(summarize(records), indent=2))
@@ -0,0 +1,307 @@
+
+import os
+import sys
+import csv
+import json
+import time
+import queue
+import shutil
+import tempfile
+import threading
+import mimetypes
+from jcr_bench import FixtureServer, ReplayRouter, _url_key
+
+# Snapshot archive layout: one directory per journal, each a fixture
+# directory for jcr_bench.FixtureServer plus what the recording produced:
+#
+#   <archive>/<SHORT>/index.json   journals, responses, year, year_cache, target_year
+#   <archive>/<SHORT>/r0000.html   recorded responses (documents, scripts, JSON, ...)
+#   <archive>/<SHORT>/dom.html     rendered DOM of the latest-year profile
+#   <archive>/<SHORT>/result.json  what get_jcr_data returned when recorded
+
+def _extension(content_type):
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    if "json" in content_type:
+        return ".json"
+    return mimetypes.guess_extension(content_type) or ".bin"
+
+class Recorder:
+    """
+    Saves every response a scrape receives, plus the rendered profile DOM,
+    into a snapshot archive that replay() can later serve offline.
+
+    Install it on a pool (BrowserPool(on_new_context=recorder.install)),
+    then wrap each journal in begin()/end() and pass on_page=recorder.on_page
+    to get_jcr_data. Requests the pool's ResourceBlocker blocks are not
+    recorded, and are blocked again on replay.
+    """
+
+    def __init__(self, archive_dir):
+        self.archive_dir = archive_dir
+        self.dir = None
+        self.entries = []
+        self._seen = set()
+        self._index = {}
+
+    def install(self, context):
+        context.on("response", self._on_response)
+
+    def begin(self, short_name, title=None, target_year=None):
+        from jcr_cache import get_year_cache
+        self.dir = os.path.join(self.archive_dir, short_name)
+        if os.path.isdir(self.dir):
+            shutil.rmtree(self.dir)
+        os.makedirs(self.dir)
+        self.entries = []
+        self._seen = set()
+        # The year cache decides which URLs the scrape opens; replay restores it
+        self._index = {
+            "journals": [{"short_name": short_name, "title": title or short_name}],
+            "target_year": target_year,
+            "year_cache": get_year_cache().get(short_name),
+            "recorded_at": time.time()
+        }
+
+    def _on_response(self, response):
+        if self.dir is None or not response.url.startswith("http"):
+            return
+        key = _url_key(response.url)
+        if key in self._seen or 300 <= response.status < 400:
+            return
+        try:
+            body = response.body()
+        except Exception:
+            return # Redirected, aborted or already discarded
+        self._seen.add(key)
+        content_type = response.headers.get("content-type", "")
+        name = f"r{len(self.entries):04d}{_extension(content_type)}"
+        with open(os.path.join(self.dir, name), "wb") as f:
+            f.write(body)
+        self.entries.append({"url": response.url, "file": name, "content_type": content_type,
+                             "status": response.status})
+
+    def on_page(self, page, metrics):
+        """get_jcr_data on_page hook: saves the rendered latest-year profile."""
+        with open(os.path.join(self.dir, "dom.html"), "w", encoding="utf-8") as f:
+            f.write(page.content())
+        self._index["year"] = metrics["year"]
+
+    def end(self, data):
+        self._index["responses"] = self.entries
+        with open(os.path.join(self.dir, "index.json"), "w", encoding="utf-8") as f:
+            json.dump(self._index, f, indent=1)
+        with open(os.path.join(self.dir, "result.json"), "w", encoding="utf-8") as f:
+            json.dump(_comparable(data), f, indent=1)
+        print(f"Recorded {len(self.entries)} responses to {self.dir}", file=sys.stderr)
+        self.dir = None
+
+def _comparable(data):
+    """A result without the parts that differ between runs of the same page."""
+    if not data:
+        return None
+    return {k: v for k, v in data.items() if k != "cache"}
+
+def record(journals, archive_dir, target_year=None, mode="auto", headless=True):
+    """Scrapes each journal live and stores it in the snapshot archive. Returns {short_name: ok}."""
+    from browser_pool import BrowserPool
+    from extract_jcr_data import get_jcr_data
+    recorder = Recorder(archive_dir)
+    pool = BrowserPool(size=1, headless=headless, on_new_context=recorder.install)
+    outcome = {}
+    try:
+        for short_name in journals:
+            recorder.begin(short_name, target_year=target_year)
+            data = None
+            try:
+                data = get_jcr_data(short_name, target_year=target_year, pool=pool, mode=mode,
+                                    on_page=recorder.on_page)
+            except Exception as e:
+                print(f"Recording {short_name} failed: {e}", file=sys.stderr)
+            recorder.end(data)
+            outcome[short_name] = bool(data)
+    finally:
+        pool.close()
+    return outcome
+
+def archived_journals(archive_dir):
+    """Journal directories in an archive (those with an index.json), sorted."""
+    return sorted(d for d in os.listdir(archive_dir)
+                  if os.path.isfile(os.path.join(archive_dir, d, "index.json")))
+
+def replay_one(journal_dir, pool, router, mode="auto", target_year=None):
+    """
+    Re-runs get_jcr_data on one recorded journal, served by a FixtureServer
+    through `router` (a ReplayRouter installed on `pool`).
+
+    Returns:
+        {"journal", "status" ("same", "changed", "failed"), "seconds",
+        "error", "data", "not_recorded"}: status compares against the
+        recorded result.json; not_recorded counts requests the archive
+        had no response for.
+    """
+    from extract_jcr_data import get_jcr_data
+    from jcr_cache import get_year_cache
+    server = FixtureServer(journal_dir).start()
+    router.server = server
+    index = server.index
+    short_name = index["journals"][0]["short_name"]
+    year_cache = get_year_cache()
+    if index.get("year_cache"):
+        year_cache.put(short_name, index["year_cache"])
+    else:
+        year_cache.invalidate(short_name)
+
+    started = time.monotonic()
+    error = ""
+    data = None
+    try:
+        data = get_jcr_data(short_name, target_year=target_year or index.get("target_year"), pool=pool, mode=mode)
+        if not data:
+            error = "No data found"
+    except Exception as e:
+        error = str(e)
+    finally:
+        server.stop()
+
+    expected = None
+    result_path = os.path.join(journal_dir, "result.json")
+    if os.path.exists(result_path):
+        with open(result_path, encoding="utf-8") as f:
+            expected = json.load(f)
+    status = "failed" if error else ("same" if _comparable(data) == expected else "changed")
+    return {"journal": short_name, "status": status, "seconds": round(time.monotonic() - started, 2),
+            "error": error, "data": data, "not_recorded": server.misses}
+
+def replay(archive_dir, journals=None, workers=4, mode="auto", target_year=None, on_result=None):
+    """
+    Re-extracts every journal in the archive offline, on `workers` threads
+    with one browser each. Nothing is fetched from the network: requests
+    that weren't recorded get a 404.
+
+    Uses the year cache of the current JCR_CACHE_DIR; point it at a scratch
+    directory (as main() does) to keep replays away from the real caches.
+
+    Returns the replay_one() results in archive order; on_result is also
+    called with each as it completes (from a worker thread).
+    """
+    from browser_pool import BrowserPool
+    journals = journals or archived_journals(archive_dir)
+    todo = queue.Queue()
+    for j in journals:
+        todo.put(j)
+    results = {}
+    lock = threading.Lock()
+
+    def worker():
+        router = ReplayRouter()
+        pool = BrowserPool(size=1, on_new_context=router.install)
+        try:
+            while True:
+                try:
+                    journal = todo.get_nowait()
+                except queue.Empty:
+                    return
+                result = replay_one(os.path.join(archive_dir, journal), pool, router, mode=mode,
+                                    target_year=target_year)
+                with lock:
+                    results[journal] = result
+                if on_result:
+                    on_result(result)
+        finally:
+            pool.close()
+
+    threads = [threading.Thread(target=worker, name=f"jcr-replay-{i}", daemon=True)
+               for i in range(max(1, min(workers, len(journals))))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return [results[j] for j in journals if j in results]
+
+def parse_archive(archive_dir, journals=None, workers=None):
+    """
+    Re-parses each journal's saved dom.html with jcr_html (no browser) in a
+    process pool. Yields {"journal", "status", "error", "data"}, where
+    status compares the rankings with the recorded result.json: "same",
+    "changed" or "failed".
+    """
+    from jcr_html import parse_many
+    jobs = []
+    for journal in journals or archived_journals(archive_dir):
+        journal_dir = os.path.join(archive_dir, journal)
+        if not os.path.exists(os.path.join(journal_dir, "dom.html")):
+            continue
+        with open(os.path.join(journal_dir, "index.json"), encoding="utf-8") as f:
+            year = json.load(f).get("year")
+        jobs.append((os.path.join(journal_dir, "dom.html"), journal, year))
+
+    for (path, journal, _), (_, data, error) in zip(jobs, parse_many(jobs, workers=workers)):
+        expected = None
+        result_path = os.path.join(os.path.dirname(path), "result.json")
+        if os.path.exists(result_path):
+            with open(result_path, encoding="utf-8") as f:
+                expected = json.load(f)
+        if error or not data:
+            status = "failed"
+        elif expected and all(data[k] == expected.get(k) for k in ("rankings", "jci_rankings")):
+            status = "same"
+        else:
+            status = "changed"
+        yield {"journal": journal, "status": status, "error": error, "data": data}
+
+def main(argv=None):
+    import argparse
+    from jcr_batch import read_journal_list
+    parser = argparse.ArgumentParser(description="Record JCR journal profiles and re-extract them offline.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_record = sub.add_parser("record", help="Scrape journals live and save their pages")
+    p_record.add_argument("archive", help="Snapshot archive directory")
+    p_record.add_argument("journals", nargs="+", help="Short names, or a journal list file")
+    p_record.add_argument("-y", "--year", type=int, default=None, help="Target year for the specific-year JIF")
+    p_record.add_argument("--mode", choices=["auto", "network", "dom"], default="auto")
+    p_record.add_argument("--headed", action="store_true", help="Show the browser while recording")
+    p_replay = sub.add_parser("replay", help="Re-run the extraction against saved pages")
+    p_replay.add_argument("archive", help="Snapshot archive directory")
+    p_replay.add_argument("-j", "--journal", action="append", default=None, help="Only these journals")
+    p_replay.add_argument("-w", "--workers", type=int, default=4, help="Parallel browsers")
+    p_replay.add_argument("--mode", choices=["auto", "network", "dom"], default="auto")
+    p_replay.add_argument("-o", "--output", default=None, help="Write the re-extracted rankings to this CSV")
+    p_replay.add_argument("--html", action="store_true",
+                          help="Parse the saved DOMs with jcr_html in a process pool instead of replaying in a browser")
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        journals = args.journals
+        if len(journals) == 1 and os.path.isfile(journals[0]):
+            journals = read_journal_list(journals[0])
+        os.makedirs(args.archive, exist_ok=True)
+        outcome = record(journals, args.archive, target_year=args.year, mode=args.mode, headless=not args.headed)
+        print(f"Recorded {sum(outcome.values())}/{len(outcome)} journals into {args.archive}", file=sys.stderr)
+        return 0 if all(outcome.values()) else 2
+
+    from extract_jcr_data import csv_rows, CSV_HEADER
+    # Replays must neither read nor pollute the real caches
+    os.environ["JCR_CACHE_DIR"] = tempfile.mkdtemp(prefix="jcr_replay_cache_")
+    started = time.monotonic()
+    if args.html:
+        results = list(parse_archive(args.archive, journals=args.journal, workers=args.workers))
+        for r in results:
+            print(f"{r['journal']}: {r['status']}" + (f" {r['error']}" if r["error"] else ""), file=sys.stderr)
+    else:
+        results = replay(args.archive, journals=args.journal, workers=args.workers, mode=args.mode,
+                         on_result=lambda r: print(f"{r['journal']}: {r['status']} ({r['seconds']}s)"
+                                                   + (f" {r['error']}" if r["error"] else ""), file=sys.stderr))
+    if args.output:
+        with open(args.output, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(CSV_HEADER)
+            for r in results:
+                if r["data"]:
+                    writer.writerows(csv_rows(r["data"]))
+    counts = {s: sum(1 for r in results if r["status"] == s) for s in ("same", "changed", "failed")}
+    print(f"Replayed {len(results)} journals in {time.monotonic() - started:.1f}s: "
+          f"{counts['same']} same, {counts['changed']} changed, {counts['failed']} failed", file=sys.stderr)
+    return 0 if counts["failed"] == 0 else 2
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,211 @@
+
+import sys
+import csv
+import warnings
+import statistics
+from jcr_store import typed_row
+
+STATS = ("mean", "median", "min", "max", "count")
+
+def _require_numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("The rolling analysis engine requires numpy (pip install numpy).")
+    return numpy
+
+def rows_from_csv(paths):
+    """Yields (journal, metric, category, year, percentile) from save_csv files."""
+    for path in paths:
+        with open(path, mode='r', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                journal = (row.get("Journal") or "").strip()
+                if not journal:
+                    continue
+                typed = typed_row(journal, row.get("Metric Type"), row.get("Category"), row.get("Year"),
+                                  row.get("Rank"), row.get("Quartile"), row.get("Percentile"))
+                if typed and typed[7] is not None:
+                    yield typed[0], typed[1], typed[2], typed[3], typed[7]
+
+def rows_from_store(store=None):
+    """Yields (journal, metric, category, year, percentile) from the rankings store."""
+    from jcr_store import get_rankings_store
+    store = store or get_rankings_store()
+    for r in store.rows():
+        if r["percentile"] is not None:
+            yield r["journal"], r["metric"], r["category"], r["year"], r["percentile"]
+
+class RankingArrays:
+    """
+    Every (journal, metric, category) percentile series as one row of a
+    series x year matrix, NaN where a year is missing, so windowed
+    statistics over all journals are computed in one vectorized pass.
+
+    Windows follow calculate_category_averages: the window for year Y
+    covers Y and the window - 1 years before it, missing years are
+    ignored, and a window with no values has no result. Values are rounded
+    with Python's round() so they match it exactly.
+
+    Args:
+        rows: Iterable of (journal, metric, category, year, percentile).
+            A repeated (journal, metric, category, year) keeps the last value.
+    """
+
+    def __init__(self, rows):
+        np = _require_numpy()
+        values = {}
+        for journal, metric, category, year, percentile in rows:
+            values[(journal, metric, category, int(year))] = float(percentile)
+
+        index = {}
+        for journal, metric, category, _ in values:
+            index.setdefault((journal, metric, category), len(index))
+        self.keys = list(index)
+        years = sorted({k[3] for k in values})
+        self.years = list(range(years[0], years[-1] + 1)) if years else []
+
+        self.matrix = np.full((len(self.keys), len(self.years)), np.nan)
+        if values:
+            first = self.years[0]
+            r = np.fromiter((index[k[:3]] for k in values), dtype=np.intp, count=len(values))
+            c = np.fromiter((k[3] - first for k in values), dtype=np.intp, count=len(values))
+            self.matrix[r, c] = np.fromiter(values.values(), dtype=float, count=len(values))
+
+    @classmethod
+    def from_store(cls, store=None):
+        return cls(rows_from_store(store))
+
+    @classmethod
+    def from_csv(cls, paths):
+        return cls(rows_from_csv(paths))
+
+    def end_years(self, through=None):
+        """Window end years covered by rolling(through=...)."""
+        last = max(self.years[-1], through or 0) if self.years else None
+        return list(range(self.years[0], last + 1)) if self.years else []
+
+    def rolling(self, window=5, stats=STATS, through=None):
+        """
+        Returns {stat: series x year array}; column j is the window ending in
+        end_years(through)[j], so windows can end after the newest data year.
+        Windows without values are NaN ("count" is 0).
+        """
+        np = _require_numpy()
+        window = max(1, int(window))
+        n = len(self.keys)
+        y = len(self.end_years(through))
+        if not n or not y:
+            return {stat: np.zeros((n, y), dtype=int) if stat == "count" else np.full((n, y), np.nan) for stat in stats}
+        padded = np.concatenate([np.full((n, window - 1), np.nan), self.matrix,
+                                 np.full((n, y - self.matrix.shape[1]), np.nan)], axis=1)
+        windows = np.lib.stride_tricks.sliding_window_view(padded, window, axis=1) # (n, y, window)
+        valid = ~np.isnan(windows)
+        count = valid.sum(axis=-1)
+        empty = count == 0
+
+        out = {}
+        for stat in stats:
+            if stat == "count":
+                out[stat] = count
+            elif stat == "mean":
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    out[stat] = np.where(empty, np.nan, np.where(valid, windows, 0.0).sum(axis=-1) / count)
+            elif stat == "median":
+                with warnings.catch_warnings():
+                    warnings.simplefilter("ignore", RuntimeWarning) # all-NaN windows
+                    out[stat] = np.nanmedian(windows, axis=-1)
+            elif stat == "min":
+                out[stat] = np.where(empty, np.nan, np.where(valid, windows, np.inf).min(axis=-1, initial=np.inf))
+            elif stat == "max":
+                out[stat] = np.where(empty, np.nan, np.where(valid, windows, -np.inf).max(axis=-1, initial=-np.inf))
+            else:
+                raise ValueError(f"Unknown statistic: {stat}")
+        return out
+
+    def table(self, window=5, stats=STATS, years=None, decimals=2):
+        """
+        Rolling statistics as a list of dicts with journal, metric, category,
+        year and one key per statistic, for every non-empty window (only
+        the given end years if `years` is set).
+        """
+        np = _require_numpy()
+        through = max(years) if years else None
+        result = self.rolling(window, stats=tuple(dict.fromkeys(tuple(stats) + ("count",))), through=through)
+        end_years = self.end_years(through)
+        cols = np.arange(len(end_years), dtype=np.intp)
+        if years is not None:
+            wanted = set(years)
+            cols = cols[[y in wanted for y in end_years]]
+        # A float sum can land either side of a rounding tie that the exact
+        # mean (statistics.mean, as in calculate_category_averages) sits on;
+        # those few windows are recomputed exactly.
+        near_tie = np.zeros(result["count"].shape, dtype=bool)
+        if "mean" in stats:
+            with np.errstate(invalid="ignore"):
+                frac = np.abs(result["mean"] * 10 ** decimals) % 1
+                near_tie = np.abs(frac - 0.5) < 1e-6
+        rows = []
+        for i, k in zip(*np.nonzero(result["count"][:, cols])):
+            j = cols[k]
+            journal, metric, category = self.keys[i]
+            row = {"journal": journal, "metric": metric, "category": category, "year": end_years[j]}
+            for stat in stats:
+                v = result[stat][i, j]
+                if stat == "count":
+                    row[stat] = int(v)
+                elif stat == "mean" and near_tie[i, j]:
+                    row[stat] = round(self._exact_mean(i, end_years[j], window), decimals)
+                else:
+                    row[stat] = round(float(v), decimals)
+            rows.append(row)
+        return rows
+
+    def _exact_mean(self, i, end_year, window):
+        first = self.years[0]
+        cols = range(max(0, end_year - window + 1 - first), min(len(self.years), end_year - first + 1))
+        return statistics.mean(v for v in (float(self.matrix[i, c]) for c in cols) if v == v)
+
+    def averages(self, start_year, window=5):
+        """
+        calculate_category_averages for every journal at once:
+        {journal: {"JIF": {category: mean}, "JCI": {...}}}.
+        """
+        out = {}
+        for row in self.table(window, stats=("mean",), years=[start_year]):
+            out.setdefault(row["journal"], {"JIF": {}, "JCI": {}})[row["metric"]][row["category"]] = row["mean"]
+        return out
+
+    def to_dataframe(self, window=5, stats=STATS, years=None):
+        """table() as a pandas DataFrame. Requires pandas."""
+        try:
+            import pandas as pd
+        except ImportError:
+            raise ImportError("to_dataframe requires pandas (pip install pandas).")
+        return pd.DataFrame(self.table(window, stats=stats, years=years),
+                            columns=["journal", "metric", "category", "year"] + list(stats))
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Rolling percentile statistics for every journal and category.")
+    parser.add_argument("csv_files", nargs="*", help="save_csv files (default: read the rankings store)")
+    parser.add_argument("--db", default=None, help="Rankings store path")
+    parser.add_argument("-w", "--window", type=int, default=5, help="Window size in years")
+    parser.add_argument("-y", "--year", type=int, action="append", help="Only windows ending in this year (repeatable)")
+    parser.add_argument("-o", "--output", default="jcr_rolling.csv", help="Output CSV")
+    args = parser.parse_args(argv)
+
+    if args.csv_files:
+        arrays = RankingArrays.from_csv(args.csv_files)
+    else:
+        from jcr_store import RankingsStore
+        arrays = RankingArrays.from_store(RankingsStore(args.db))
+    rows = arrays.table(args.window, years=args.year)
+    with open(args.output, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=["journal", "metric", "category", "year"] + list(STATS))
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"{len(arrays.keys)} series, {len(rows)} windows saved to {args.output}", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,16 +1,37 @@
 
+import re
 import sys
 import time
 import urllib.parse
-from playwright.sync_api import sync_playwright
+import jcr_cancel
+from browser_pool import BrowserPool
+from jcr_cache import get_resolution_index
+
+def _normalize_query(text):
+    return " ".join(text.lower().split())
+
+def _answers(response, query):
+    """True if the search request behind `response` was sent for `query` (in its URL or post data)."""
+    try:
+        request = response.request
+        sent = urllib.parse.unquote_plus(request.url) + " " + (request.post_data or "")
+    except Exception:
+        return False
+    pattern = r"(?<!\w)" + re.escape(_normalize_query(query)) + r"(?!\w)"
+    return re.search(pattern, _normalize_query(sent)) is not None
 
 class JCRBackend:
-    def __init__(self):
-        self.playwright = None
-        self.browser = None
+    def __init__(self, pool=None, index=None):
+        # A shared pool is borrowed from and left running on close();
+        # without one the backend owns a private single-context pool.
+        self.pool = pool
+        self._owns_pool = pool is None
         self.context = None
         self.page = None
         self.known_journals = {} # Cache for "Full Name" -> "Short Key"
+        self.last_search_results = None # Titles from the latest intercepted search response
+        self.pending_query = None # Query last_search_results must answer
+        self.index = index or get_resolution_index() # Persistent, shared with resolver/GUI
 
     def _handle_response(self, response):
         """Background listener to intercept search API results."""
@@ -29,20 +50,13 @@ class JCRBackend:
                     # Actual structure from testing:
                     # { "data": { "journals": [ { "journalName": "FEM ANTHROPOL", "title": "Feminist Anthropology", ... } ] } }
 
-                    items = []
-                    if "data" in data and "journals" in data["data"]:
-                        items = data["data"]["journals"]
-                    
-                    for item in items:
-                        if isinstance(item, dict):
-                            # Try to identify name and key
-                            name = item.get("title")
-                            key = item.get("journalName") # This is the short key!
-                            
-                            if name and key:
-                                self.known_journals[name.strip()] = key
-                                # Also map normalized upper/lower for easier lookup
-                                self.known_journals[name.strip().lower()] = key
+                    found = self.index.add_from_payload(data)
+                    for name, key in found:
+                        self.known_journals[name] = key
+                        # Also map normalized upper/lower for easier lookup
+                        self.known_journals[name.lower()] = key
+                    if found and self.pending_query and _answers(response, self.pending_query):
+                        self.last_search_results = [name for name, _ in found]
                 except:
                     pass
         except:
@@ -74,22 +88,9 @@ class JCRBackend:
     def start_session(self):
         """Launches the browser and navigates to JCR home."""
         print("Initializing JCR Session (headless browser)...", file=sys.stderr)
-        self.playwright = sync_playwright().start()
-        
-        launch_args = {
-            "args": ["--no-sandbox", "--disable-blink-features=AutomationControlled"]
-        }
-        
-        import os
-        exec_path = os.environ.get("PLAYWRIGHT_CHROMIUM_EXECUTABLE_PATH")
-        if exec_path and os.path.exists(exec_path):
-            launch_args["executable_path"] = exec_path
-            
-        self.browser = self.playwright.chromium.launch(**launch_args)
-        self.context = self.browser.new_context(
-            user_agent="Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            viewport={"width": 1280, "height": 720}
-        )
+        if self.pool is None:
+            self.pool = BrowserPool(size=1)
+        self.context = self.pool.acquire()
         self.page = self.context.new_page()
         # Hook up the listener
         self.page.on("response", self._handle_response)
@@ -101,8 +102,15 @@ class JCRBackend:
         except Exception as e:
             raise Exception(f"Failed to load JCR home: {e}")
 
-    def search_journal(self, query):
-        """Enters query and returns a list of suggested journal names."""
+    def search_journal(self, query, cancel=None):
+        """
+        Enters query and returns a list of suggested journal names.
+        cancel (a jcr_cancel.CancelToken) stops the search at its next wait.
+        """
+        with jcr_cancel.scope(cancel):
+            return self._search_journal(query)
+
+    def _search_journal(self, query):
         # Try to find search input immediately on current page
         search_input_sel = "input[placeholder*='journal'], input[placeholder*='Journal'], input[type='text'].mat-input-element"
         search_input = self.page.locator(search_input_sel).first
@@ -110,9 +118,9 @@ class JCRBackend:
         if not search_input.is_visible():
             # If not found, then go home
             print("Search bar not found, navigating to home...", file=sys.stderr)
-            self.page.goto("https://jcr.clarivate.com/jcr/home", wait_until="domcontentloaded", timeout=30000)
+            self.page.goto("https://jcr.clarivate.com/jcr/home", wait_until="domcontentloaded", timeout=jcr_cancel.timeout_ms(30000))
             try:
-                self.page.wait_for_selector(search_input_sel, state="visible", timeout=10000)
+                self.page.wait_for_selector(search_input_sel, state="visible", timeout=jcr_cancel.timeout_ms(10000))
             except:
                 pass # search_input.is_visible check below will handle failure
             search_input = self.page.locator(search_input_sel).first
@@ -129,13 +137,32 @@ class JCRBackend:
             search_input.click(force=True)
 
         search_input.fill("")
+        # Responses to an earlier query can still arrive; only one whose
+        # request carries this query may answer it
+        self.pending_query = query
+        self.last_search_results = None
         search_input.fill(query)
+
+        # Prefer the titles from the search API response the page fires;
+        # wait_for_timeout lets the response listener run meanwhile. Stop
+        # early if the dropdown renders without a recognised response.
+        options_sel = ".journal-title, mat-option span"
+        deadline = time.monotonic() + 5
+        while self.last_search_results is None and time.monotonic() < deadline:
+            jcr_cancel.check()
+            self.page.wait_for_timeout(50)
+            if self.last_search_results is None and self.page.locator(options_sel).first.is_visible():
+                self.page.wait_for_timeout(100)
+                break
+        if self.last_search_results:
+            return list(dict.fromkeys(self.last_search_results))
         
         # Wait specifically for the specific autocomplete dropdown items
         try:
-            self.page.wait_for_selector(".journal-title, mat-option span", timeout=5000)
+            self.page.wait_for_selector(".journal-title, mat-option span", timeout=jcr_cancel.timeout_ms(5000))
         except:
             # If no suggestions appear, return empty
+            jcr_cancel.check()
             return []
             
         options = self.page.locator(".journal-title, mat-option span.highlight-text, mat-option span").all()
@@ -149,8 +176,12 @@ class JCRBackend:
                 seen.add(txt)
         return results
 
-    def select_and_resolve(self, journal_name):
+    def select_and_resolve(self, journal_name, cancel=None):
         """Clicks the exact journal name and extracts short name from URL."""
+        with jcr_cancel.scope(cancel):
+            return self._select_and_resolve(journal_name)
+
+    def _select_and_resolve(self, journal_name):
         print(f"Resolving short name for '{journal_name}'...", file=sys.stderr)
         
         # FAST TRACK: Check if we already intercepted the key
@@ -160,6 +191,10 @@ class JCRBackend:
         if journal_name.strip().lower() in self.known_journals:
             print(" -> Found in API cache! Instant resolve.", file=sys.stderr)
             return self.known_journals[journal_name.strip().lower()]
+        indexed = self.index.lookup(journal_name)
+        if indexed:
+            print(" -> Found in resolution index! Instant resolve.", file=sys.stderr)
+            return indexed
             
         print(" -> Not in cache, falling back to UI navigation...", file=sys.stderr)
         
@@ -173,9 +208,10 @@ class JCRBackend:
 
         # Wait for navigation to profile
         try:
-            self.page.wait_for_url(lambda u: "journal-profile" in u, timeout=20000)
+            self.page.wait_for_url(lambda u: "journal-profile" in u, timeout=jcr_cancel.timeout_ms(20000))
         except:
              # Just in case we are already there or something went wrong
+             jcr_cancel.check()
              if "journal-profile" not in self.page.url:
                  raise Exception("Navigation to journal profile failed after clicking result.")
             
@@ -185,15 +221,27 @@ class JCRBackend:
         params = urllib.parse.parse_qs(parsed.query)
         
         if "journal" in params:
-            return params["journal"][0]
+            short_name = params["journal"][0]
+            self.index.add(short_name, title=journal_name)
+            return short_name
         else:
             raise Exception("Could not find 'journal' parameter in URL.")
 
+    def is_alive(self):
+        """True if the session page and its browser are still usable."""
+        try:
+            return bool(self.page) and not self.page.is_closed() and self.pool.is_healthy()
+        except Exception:
+            return False
+
     def close(self):
-        if self.browser:
-            self.browser.close()
-        if self.playwright:
-            self.playwright.stop()
+        if self.context and self.pool:
+            self.pool.release(self.context)
+        self.context = None
+        self.page = None
+        if self._owns_pool and self.pool:
+            self.pool.close()
+            self.pool = None
 
 def main():
     backend = JCRBackend()
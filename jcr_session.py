@@ -0,0 +1,125 @@
+
+import sys
+import time
+import queue
+import threading
+from concurrent.futures import Future
+from browser_pool import BrowserPool
+from jcr_search_cli import JCRBackend
+
+class BackendSession:
+    """
+    One warm JCRBackend kept alive for the life of an app.
+
+    Playwright's sync API is bound to the thread that started it, so the
+    backend, its BrowserPool and everything that touches them run on one
+    dedicated worker thread. Other threads hand work to it with run(), which
+    blocks until the result is ready.
+
+    The browser is started lazily (or by warm_up()), restarted if it crashed
+    and shut down after `idle_timeout` seconds without work; the next call
+    relaunches it. known_journals survives restarts.
+
+        session = BackendSession()
+        results = session.search("Feminist Anthropology")
+        short_name = session.resolve(results[0])
+        session.close()
+    """
+
+    def __init__(self, idle_timeout=600, pool_size=2):
+        self.idle_timeout = idle_timeout
+        self.pool_size = pool_size
+        self.pool = None
+        self.backend = None
+        self._tasks = queue.Queue()
+        self._closed = False
+        self._last_used = time.monotonic()
+        self._thread = threading.Thread(target=self._loop, name="jcr-session", daemon=True)
+        self._thread.start()
+
+    def _loop(self):
+        # The pool must be created on the thread that will use it
+        self.pool = BrowserPool(size=self.pool_size, idle_timeout=self.idle_timeout)
+        self.backend = JCRBackend(pool=self.pool)
+        try:
+            while True:
+                try:
+                    task = self._tasks.get(timeout=min(30, self.idle_timeout))
+                except queue.Empty:
+                    self._reap_idle()
+                    self.pool.reap_idle()
+                    continue
+                if task is None:
+                    return
+                future, fn, args, kwargs = task
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    future.set_result(self._call(fn, args, kwargs))
+                except BaseException as e:
+                    future.set_exception(e)
+                self._last_used = time.monotonic()
+        finally:
+            self._shutdown()
+            self.pool.close()
+
+    def _ensure_started(self):
+        if self.backend.page is not None and self.backend.is_alive():
+            return
+        if self.backend.page is not None:
+            print("JCR session lost, reconnecting...", file=sys.stderr)
+        self._shutdown()
+        self.backend.start_session()
+
+    def _call(self, fn, args, kwargs):
+        self._ensure_started()
+        try:
+            return fn(self.backend, *args, **kwargs)
+        except Exception:
+            if self.backend.is_alive():
+                raise
+            # The browser died under us; reconnect and try once more
+            print("JCR session crashed during a call, retrying on a new session...", file=sys.stderr)
+            self._ensure_started()
+            return fn(self.backend, *args, **kwargs)
+
+    def _reap_idle(self):
+        if self.backend.page is not None and time.monotonic() - self._last_used > self.idle_timeout:
+            print("JCR session idle, closing browser.", file=sys.stderr)
+            self._shutdown()
+            self.pool.close()
+
+    def _shutdown(self):
+        try:
+            self.backend.close()
+        except Exception:
+            pass
+
+    def submit(self, fn, *args, **kwargs):
+        """Queues fn(backend, *args, **kwargs) on the session thread. Returns a Future."""
+        if self._closed:
+            raise RuntimeError("BackendSession is closed.")
+        future = Future()
+        self._tasks.put((future, fn, args, kwargs))
+        return future
+
+    def run(self, fn, *args, **kwargs):
+        """Runs fn(backend, *args, **kwargs) on the session thread and returns its result."""
+        return self.submit(fn, *args, **kwargs).result()
+
+    def warm_up(self):
+        """Starts the browser and loads JCR home in the background."""
+        return self.submit(lambda backend: None)
+
+    def search(self, query, cancel=None):
+        return self.run(lambda backend: backend.search_journal(query, cancel=cancel))
+
+    def resolve(self, journal_name):
+        return self.run(lambda backend: backend.select_and_resolve(journal_name))
+
+    def close(self, timeout=10):
+        if self._closed:
+            return
+        self._closed = True
+        self._tasks.put(None)
+        self._thread.join(timeout)
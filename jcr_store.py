@@ -0,0 +1,210 @@
+
+import os
+import sys
+import csv
+import sqlite3
+from contextlib import contextmanager
+from jcr_cache import cache_dir
+
+COLUMNS = ["journal", "metric", "category", "year", "rank", "total", "quartile", "percentile"]
+
+def _int_or_none(value):
+    try:
+        return int(str(value).strip())
+    except (TypeError, ValueError):
+        return None
+
+def _float_or_none(value):
+    try:
+        return float(str(value).strip())
+    except (TypeError, ValueError):
+        return None
+
+def parse_rank(rank):
+    """'12/150' -> (12, 150); a bare or unparseable rank gives None for the missing part."""
+    head, _, tail = str(rank or "").partition("/")
+    return _int_or_none(head), _int_or_none(tail)
+
+def typed_row(journal, metric, category, year, rank, quartile, percentile):
+    """One save_csv row as a typed store row, or None if it has no usable year."""
+    year = _int_or_none(year)
+    if year is None or not category or metric not in ("JIF", "JCI"):
+        return None
+    rank_no, total = parse_rank(rank)
+    quartile = (quartile or "").strip()
+    return (journal.upper(), metric, category, year, rank_no, total,
+            quartile if quartile and quartile != "N/A" else None, _float_or_none(percentile))
+
+class RankingsStore:
+    """
+    SQLite table of ranking rows for every journal scraped, with typed
+    columns and one row per (journal, metric, category, year).
+
+    It holds the same rows as the per-journal save_csv files, so analyses
+    across many journals are one query instead of opening a CSV per journal.
+    Existing CSV archives can be loaded with import_csv(), and
+    export_parquet() writes a Parquet dataset if pyarrow is installed.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(cache_dir(), "rankings.sqlite")
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rankings ("
+                " journal TEXT NOT NULL,"
+                " metric TEXT NOT NULL,"
+                " category TEXT NOT NULL,"
+                " year INTEGER NOT NULL,"
+                " rank INTEGER,"
+                " total INTEGER,"
+                " quartile TEXT,"
+                " percentile REAL,"
+                " PRIMARY KEY (journal, metric, category, year))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS rankings_by_year ON rankings (metric, year)")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _replace(self, journal, rows):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM rankings WHERE journal = ?", (journal.upper(),))
+            conn.executemany(
+                "INSERT OR REPLACE INTO rankings (journal, metric, category, year, rank, total, quartile, percentile)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        return len(rows)
+
+    def put(self, data):
+        """Replaces the stored rows of a journal with a get_jcr_data result. Returns the row count."""
+        from extract_jcr_data import csv_rows
+        journal = data["metrics"]["journal"]
+        rows = [r for r in (typed_row(*row) for row in csv_rows(data)) if r]
+        return self._replace(journal, rows)
+
+    def put_category(self, journal, metric, category, rows):
+        """Replaces one category's rows ({"year", "rank", "quartile", "percentile"} dicts)."""
+        typed = [r for r in (typed_row(journal, metric, category, row["year"], row["rank"],
+                                       row["quartile"], row["percentile"]) for row in rows) if r]
+        with self._connect() as conn:
+            conn.execute("DELETE FROM rankings WHERE journal = ? AND metric = ? AND category = ?",
+                         (journal.upper(), metric, category))
+            conn.executemany(
+                "INSERT OR REPLACE INTO rankings (journal, metric, category, year, rank, total, quartile, percentile)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)", typed)
+        return len(typed)
+
+    def import_csv(self, path):
+        """Loads a save_csv file, replacing that journal's rows. Returns the row count."""
+        by_journal = {}
+        with open(path, mode='r', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                journal = (row.get("Journal") or "").strip()
+                if not journal:
+                    continue
+                typed = typed_row(journal, row.get("Metric Type"), row.get("Category"), row.get("Year"),
+                                  row.get("Rank"), row.get("Quartile"), row.get("Percentile"))
+                if typed:
+                    by_journal.setdefault(journal, []).append(typed)
+        return sum(self._replace(j, rows) for j, rows in by_journal.items())
+
+    def journals(self):
+        with self._connect() as conn:
+            return [r[0] for r in conn.execute("SELECT DISTINCT journal FROM rankings ORDER BY journal")]
+
+    def percentiles(self, journal=None, years=None):
+        """
+        Returns {journal: {metric: {category: {year: percentile}}}} for rows
+        with a percentile, optionally for one journal and a set of years.
+        """
+        sql = "SELECT journal, metric, category, year, percentile FROM rankings WHERE percentile IS NOT NULL"
+        params = []
+        if journal:
+            sql += " AND journal = ?"
+            params.append(journal.upper())
+        if years:
+            years = sorted(set(years))
+            sql += f" AND year IN ({', '.join('?' * len(years))})"
+            params.extend(years)
+        out = {}
+        with self._connect() as conn:
+            for j, metric, category, year, percentile in conn.execute(sql, params):
+                out.setdefault(j, {"JIF": {}, "JCI": {}})[metric].setdefault(category, {})[year] = percentile
+        return out
+
+    def rows(self, journal=None):
+        """Yields stored rows as dicts keyed by COLUMNS."""
+        sql = f"SELECT {', '.join(COLUMNS)} FROM rankings"
+        params = ()
+        if journal:
+            sql += " WHERE journal = ?"
+            params = (journal.upper(),)
+        sql += " ORDER BY journal, metric, category, year DESC"
+        with self._connect() as conn:
+            for row in conn.execute(sql, params):
+                yield dict(zip(COLUMNS, row))
+
+    def export_parquet(self, root):
+        """
+        Writes the store as a Parquet dataset under `root`, partitioned by
+        metric. Requires pyarrow.
+        """
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Parquet export requires pyarrow (pip install pyarrow).")
+        rows = list(self.rows())
+        schema = pa.schema([
+            ("journal", pa.string()), ("metric", pa.string()), ("category", pa.string()),
+            ("year", pa.int32()), ("rank", pa.int32()), ("total", pa.int32()),
+            ("quartile", pa.string()), ("percentile", pa.float64())
+        ])
+        table = pa.Table.from_pydict({c: [r[c] for r in rows] for c in COLUMNS}, schema=schema)
+        pq.write_to_dataset(table, root_path=root, partition_cols=["metric"])
+        return len(rows)
+
+_rankings_store = None
+
+def get_rankings_store():
+    global _rankings_store
+    if _rankings_store is None:
+        _rankings_store = RankingsStore()
+    return _rankings_store
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Manage the SQLite rankings store.")
+    parser.add_argument("--db", default=None, help="Store path (default: rankings.sqlite in the cache dir)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_import = sub.add_parser("import", help="Load save_csv files into the store")
+    p_import.add_argument("csv_files", nargs="+")
+    p_export = sub.add_parser("export-parquet", help="Write the store as a Parquet dataset")
+    p_export.add_argument("root")
+    args = parser.parse_args(argv)
+
+    store = RankingsStore(args.db)
+    if args.command == "import":
+        total = 0
+        for path in args.csv_files:
+            try:
+                total += store.import_csv(path)
+            except Exception as e:
+                print(f"Skipping {path}: {e}", file=sys.stderr)
+        print(f"Imported {total} rows from {len(args.csv_files)} files into {store.path}", file=sys.stderr)
+    else:
+        try:
+            n = store.export_parquet(args.root)
+        except ImportError as e:
+            print(e, file=sys.stderr)
+            return 1
+        print(f"Exported {n} rows to {args.root}", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+
+import os
+import sys
+import csv
+import json
+import queue
+import threading
+from extract_jcr_data import get_jcr_data_cached, CSV_HEADER
+from jcr_cancel import CancelToken
+
+class CsvSink:
+    """
+    Appends each "category" event to a save_csv-format file as it arrives,
+    writing the header only if the file is new, and flushing every event so
+    a crash keeps everything already scraped.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = open(path, 'a', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._file)
+        if is_new:
+            self._writer.writerow(CSV_HEADER)
+            self._file.flush()
+
+    def __call__(self, event):
+        if event["type"] != "category":
+            return
+        for row in event["rows"]:
+            self._writer.writerow([event["journal"], event["metric"], event["category"],
+                                   row["year"], row["rank"], row["quartile"], row["percentile"]])
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+class JsonlSink:
+    """Appends every event as one JSON line, flushed as it arrives."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def __call__(self, event):
+        self._file.write(json.dumps(event) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+class StoreSink:
+    """Writes each "category" event into the RankingsStore, replacing that category's rows."""
+
+    def __init__(self, store=None):
+        from jcr_store import get_rankings_store
+        self.store = store or get_rankings_store()
+
+    def __call__(self, event):
+        if event["type"] == "category":
+            self.store.put_category(event["journal"], event["metric"], event["category"], event["rows"])
+
+    def close(self):
+        pass
+
+class FanOut:
+    """Sends every event to several sinks; close() closes them all."""
+
+    def __init__(self, *sinks):
+        self.sinks = [s for s in sinks if s]
+
+    def __call__(self, event):
+        for sink in self.sinks:
+            sink(event)
+
+    def close(self):
+        for sink in self.sinks:
+            try:
+                sink.close()
+            except Exception as e:
+                print(f"Error closing sink: {e}", file=sys.stderr)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+_DONE = object()
+
+def iter_jcr_data(journals, target_year=None, mode="auto", refresh=False, incremental=False, buffer=100,
+                  journal_timeout=None):
+    """
+    Scrapes journals one after another and yields each event as soon as it
+    is extracted (see get_jcr_data's on_event), followed by
+    {"type": "done", "journal", "ok", "error"} per journal.
+
+    Scraping runs on a worker thread with its own browser, since sync
+    Playwright can't be driven from inside a generator. At most `buffer`
+    events are queued; the worker waits when the consumer falls behind, so
+    memory stays flat however many journals are scraped. Closing the
+    generator early cancels the journal in progress at its next wait.
+    journal_timeout (seconds) abandons a journal that takes longer.
+
+    Args:
+        journals: A JCR short name or a list of them.
+    """
+    if isinstance(journals, str):
+        journals = [journals]
+    events = queue.Queue(maxsize=buffer)
+    stop = threading.Event()
+    cancel = CancelToken()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                events.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                pass
+
+    def worker():
+        from browser_pool import get_default_pool, close_default_pool
+        pool = get_default_pool()
+        try:
+            for journal in journals:
+                if stop.is_set():
+                    break
+                error = ""
+                data = None
+                try:
+                    data = get_jcr_data_cached(journal, target_year=target_year, pool=pool, mode=mode,
+                                               refresh=refresh, incremental=incremental, on_event=put,
+                                               cancel=cancel, timeout=journal_timeout)
+                    if not data:
+                        error = "No data found"
+                except Exception as e:
+                    error = str(e)
+                put({"type": "done", "journal": journal, "ok": bool(data), "error": error})
+        finally:
+            close_default_pool()
+            put(_DONE)
+
+    thread = threading.Thread(target=worker, name="jcr-stream", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = events.get()
+            if item is _DONE:
+                return
+            yield item
+    finally:
+        stop.set()
+        cancel.cancel("Stream closed")
+
+def main(argv=None):
+    import argparse
+    from jcr_batch import read_journal_list
+    parser = argparse.ArgumentParser(description="Stream JCR rankings to CSV / JSONL / the rankings store as they are scraped.")
+    parser.add_argument("journal_list", help="Text file (one short name per line) or CSV")
+    parser.add_argument("--csv", default=None, help="Append rankings to this CSV")
+    parser.add_argument("--jsonl", default=None, help="Append every event to this JSONL file")
+    parser.add_argument("--store", nargs="?", const="", default=None, metavar="DB", help="Write rankings to the rankings store")
+    parser.add_argument("-y", "--year", type=int, default=None, help="Target year for the specific-year JIF")
+    parser.add_argument("--mode", choices=["auto", "network", "dom"], default="auto")
+    parser.add_argument("--refresh", action="store_true")
+    parser.add_argument("--journal-timeout", type=float, default=None, help="Seconds before a journal is abandoned")
+    args = parser.parse_args(argv)
+
+    store_sink = None
+    if args.store is not None:
+        from jcr_store import RankingsStore
+        store_sink = StoreSink(RankingsStore(args.store or None))
+    with FanOut(CsvSink(args.csv) if args.csv else None,
+                JsonlSink(args.jsonl) if args.jsonl else None,
+                store_sink) as sink:
+        failed = 0
+        for event in iter_jcr_data(read_journal_list(args.journal_list), target_year=args.year,
+                                   mode=args.mode, refresh=args.refresh, journal_timeout=args.journal_timeout):
+            sink(event)
+            if event["type"] == "done":
+                failed += not event["ok"]
+                print(f"{event['journal']}: {'ok' if event['ok'] else 'failed: ' + event['error']}", file=sys.stderr)
+    return 2 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
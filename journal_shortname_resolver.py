@@ -1,47 +1,60 @@
 
 import sys
-import time
 import urllib.parse
-from playwright.sync_api import sync_playwright
+import jcr_cancel
+from browser_pool import get_default_pool
+from jcr_cache import get_resolution_index
 
-def get_journal_shortname(journal_name):
+def _index_search_response(index, response):
+    """Feeds intercepted search API results into the resolution index."""
+    try:
+        if "search" in response.url.lower() and "json" in response.headers.get("content-type", "").lower():
+            index.add_from_payload(response.json())
+    except:
+        pass
+
+def get_journal_shortname(journal_name, pool=None, index=None, cancel=None, timeout=None):
     """
     Navigates to the JCR homepage, searches for the given journal name,
     clicks the exact match, and returns the journal short name from the URL.
 
+    The page is borrowed from `pool` (the calling thread's default
+    BrowserPool if not given), so repeated lookups reuse a warm browser.
+    Titles, ISSNs and short names already in the persistent resolution
+    index are answered without opening a page at all.
+
+    cancel (a jcr_cancel.CancelToken) and timeout (seconds) bound the
+    lookup the same way as for get_jcr_data.
+
     Raises:
         AssertionError: If no exact match is found or navigation fails.
+        jcr_cancel.Cancelled: If cancelled or past the timeout.
     """
     print(f"Resolving short name for '{journal_name}'...", file=sys.stderr)
     
-    with sync_playwright() as p:
-        # Launch browser with explicit path check
-        import os
-        launch_args = {
-            "headless": True,
-            "args": ["--no-sandbox", "--disable-blink-features=AutomationControlled"]
-        }
-        exec_path = os.environ.get("PLAYWRIGHT_CHROMIUM_EXECUTABLE_PATH")
-        if exec_path and os.path.exists(exec_path):
-            launch_args["executable_path"] = exec_path
+    if index is None:
+        index = get_resolution_index()
+    indexed = index.lookup(journal_name)
+    if indexed:
+        print(f"Found in resolution index: '{indexed}'", file=sys.stderr)
+        return indexed
 
-        browser = p.chromium.launch(**launch_args)
-        context = browser.new_context(
-            user_agent="Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            viewport={"width": 1280, "height": 720}
-        )
+    if pool is None:
+        pool = get_default_pool()
+    with jcr_cancel.scope(cancel, timeout), pool.context() as context:
         page = context.new_page()
+        page.on("response", lambda response: _index_search_response(index, response))
         
         try:
             # Navigate to JCR home
-            page.goto("https://jcr.clarivate.com/jcr/home", wait_until="networkidle", timeout=45000)
+            page.goto("https://jcr.clarivate.com/jcr/home", wait_until="networkidle", timeout=jcr_cancel.timeout_ms(45000))
             
             # Handle cookies (optional but good practice)
             try:
                 cookie_btn = page.locator("button#onetrust-accept-btn-handler, button:has-text('Accept All'), button:has-text('Allow all')").first
-                if cookie_btn.is_visible(timeout=5000):
+                if cookie_btn.is_visible(timeout=jcr_cancel.timeout_ms(5000)):
                     cookie_btn.click()
-                    time.sleep(1)
+                    jcr_cancel.sleep(1)
             except:
                 pass
             
@@ -57,14 +70,14 @@ def get_journal_shortname(journal_name):
             
             # Wait for autocomplete suggestions
             # We assume a slight delay is needed for the list to populate
-            time.sleep(3)
+            jcr_cancel.sleep(3)
             
             # Find the option with EXACT match
             # Confirmed HTML: <p class="pop-content journal-title"><span class="highlight-text">Feminist Anthropology</span></p>
             # The container is likely .pop-content.journal-title or just .journal-title
             
             try:
-                page.wait_for_selector(".journal-title", timeout=10000)
+                page.wait_for_selector(".journal-title", timeout=jcr_cancel.timeout_ms(10000))
             except:
                 pass
 
@@ -76,6 +89,7 @@ def get_journal_shortname(journal_name):
             print(f"DEBUG: Found {len(options)} potential options.", file=sys.stderr)
 
             for opt in options:
+                jcr_cancel.check()
                 # Visibility check might be tricky if it's hidden/overlapped, but usually works
                 # if not opt.is_visible(): continue 
                 
@@ -98,13 +112,13 @@ def get_journal_shortname(journal_name):
             # Try clicking the parent p tag if we have the span, or just the element itself
             try:
                 # Ensure we click the interactive part. The p tag had tabindex=0
-                target_option.click(timeout=2000)
+                target_option.click(timeout=jcr_cancel.timeout_ms(2000))
             except:
                 print("Standard click failed, trying force click...", file=sys.stderr)
                 target_option.click(force=True)
             
             # Wait for navigation to start
-            time.sleep(2)
+            jcr_cancel.sleep(2)
             
             # Fallback: if URL hasn't changed to include 'journal-profile', try keyboard navigation
             if "journal-profile" not in page.url:
@@ -112,13 +126,14 @@ def get_journal_shortname(journal_name):
                  # Focus input again just in case
                  search_input.focus()
                  page.keyboard.press("ArrowDown")
-                 time.sleep(0.5)
+                 jcr_cancel.sleep(0.5)
                  page.keyboard.press("Enter")
             
             # Wait for navigation to journal profile OR search results
             try:
-                page.wait_for_url(lambda u: "journal-profile" in u or "search-results" in u, timeout=30000)
+                page.wait_for_url(lambda u: "journal-profile" in u or "search-results" in u, timeout=jcr_cancel.timeout_ms(30000))
             except:
+                 jcr_cancel.check()
                  raise AssertionError(f"Navigation failed or timed out. Current URL: {page.url}")
 
             # Check if we are on search results
@@ -126,7 +141,7 @@ def get_journal_shortname(journal_name):
                 print("Landed on Search Results page. Finding journal link...", file=sys.stderr)
                 try:
                     # Wait for results to load
-                    page.wait_for_selector(".table-cell-journalName", timeout=15000)
+                    page.wait_for_selector(".table-cell-journalName", timeout=jcr_cancel.timeout_ms(15000))
                     
                     # Find link using text match
                     # The result item is a span with class table-cell-journalName
@@ -142,7 +157,7 @@ def get_journal_shortname(journal_name):
                         print(f"Found result link. Clicking...", file=sys.stderr)
                         
                         # Handle potential new tab
-                        with context.expect_page(timeout=10000) as new_page_info:
+                        with context.expect_page(timeout=jcr_cancel.timeout_ms(10000)) as new_page_info:
                              target_link.click()
                         
                         try:
@@ -153,12 +168,15 @@ def get_journal_shortname(journal_name):
                         except:
                             # No new page, assume SPA navigation
                             print("No new tab, assuming SPA navigation...", file=sys.stderr)
-                            page.wait_for_url(lambda u: "journal-profile" in u, timeout=30000)
+                            page.wait_for_url(lambda u: "journal-profile" in u, timeout=jcr_cancel.timeout_ms(30000))
 
                     else:
                         raise AssertionError(f"Journal '{journal_name}' not found on search results page.")
 
+                except jcr_cancel.Cancelled:
+                    raise
                 except Exception as e:
+                    jcr_cancel.check()
                     raise AssertionError(f"Error handling search results: {e}")
 
             current_url = page.url
@@ -167,17 +185,16 @@ def get_journal_shortname(journal_name):
             
             if "journal" in params:
                 short_name = params["journal"][0]
+                index.add(short_name, title=found_text, aliases=[journal_name])
                 return short_name
             else:
                 raise AssertionError(f"Could not extract 'journal' parameter (short name) from URL: {current_url}")
                 
         except Exception as e:
-            # Re-raise AssertionErrors directly, wrap others
-            if isinstance(e, AssertionError):
+            # Re-raise AssertionErrors and cancellation directly, wrap others
+            if isinstance(e, (AssertionError, jcr_cancel.Cancelled)):
                 raise e
             raise AssertionError(f"An unexpected error occurred: {e}")
-        finally:
-            browser.close()
 
 if __name__ == "__main__":
     if len(sys.argv) > 1:
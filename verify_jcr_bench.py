@@ -0,0 +1,81 @@
+import os
+import tempfile
+import unittest
+import urllib.error
+import urllib.request
+from jcr_bench import FixtureServer, ReplayRouter, Benchmark
+from jcr_html import parse_profile_file
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_fixtures", "BIOETHICS")
+
+def _chromium_available():
+    try:
+        from playwright.sync_api import sync_playwright
+    except ImportError:
+        return False
+    p = sync_playwright().start()
+    try:
+        p.chromium.launch().close()
+        return True
+    except Exception:
+        return False
+    finally:
+        p.stop()
+
+class TestFixtures(unittest.TestCase):
+    def test_server_serves_recorded_pages(self):
+        server = FixtureServer(FIXTURES).start()
+        try:
+            url = f"{server.base_url}/jcr.clarivate.com/jcr-jp/journal-profile?journal=BIOETHICS&year=2024"
+            with urllib.request.urlopen(url) as r:
+                self.assertIn(b"Rank by Journal Impact Factor", r.read())
+            with self.assertRaises(urllib.error.HTTPError) as cm:
+                urllib.request.urlopen(f"{server.base_url}/jcr.clarivate.com/not-recorded")
+            self.assertEqual(cm.exception.code, 404)
+            self.assertEqual((server.hits, server.misses), (1, 1))
+        finally:
+            server.stop()
+
+    def test_profile_fixture_parses(self):
+        data = parse_profile_file(os.path.join(FIXTURES, "profile.html"), "BIOETHICS")
+        self.assertEqual(data["metrics"]["year"], 2024)
+        self.assertEqual(list(data["rankings"]), ["ETHICS", "MEDICAL ETHICS"])
+        self.assertEqual(len(data["rankings"]["ETHICS"]), 3)
+        self.assertEqual(len(data["metrics"]["history"]), 3)
+
+@unittest.skipUnless(_chromium_available(), "Chromium for Playwright not installed")
+class TestBenchmark(unittest.TestCase):
+    def setUp(self):
+        self._cache_dir = os.environ.get("JCR_CACHE_DIR")
+        os.environ["JCR_CACHE_DIR"] = tempfile.mkdtemp(prefix="jcr_bench_cache_")
+
+    def tearDown(self):
+        if self._cache_dir is None:
+            os.environ.pop("JCR_CACHE_DIR", None)
+        else:
+            os.environ["JCR_CACHE_DIR"] = self._cache_dir
+
+    def _run(self, blocker):
+        server = FixtureServer(FIXTURES).start()
+        try:
+            bench = Benchmark(server.journals, ReplayRouter(server=server), iterations=1,
+                              operations=("scrape",), blocker=blocker, round_trips=False)
+            rows = bench.run()
+        finally:
+            server.stop()
+        return rows, server
+
+    def test_scrape_blocked_and_unblocked(self):
+        from browser_pool import ResourceBlocker
+        blocker = ResourceBlocker()
+        rows, blocked = self._run(blocker)
+        self.assertEqual([(r["operation"], r["errors"]) for r in rows], [("scrape", 0)])
+        self.assertGreaterEqual(blocker.blocked_by_reason.get("image", 0), 1)
+
+        rows, unblocked = self._run(False)
+        self.assertEqual(rows[0]["errors"], 0)
+        # The logo only reaches the replay server when nothing blocks it
+        self.assertGreater(unblocked.hits, blocked.hits)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+
+import unittest
+from jcr_html import parse_profile_html
+
+# Trimmed-down rendered profile: headline metrics, one JIF category with a
+# history table, one JCI category with its sibling text block, and the Key
+# Indicators table.
+PROFILE_HTML = """<html><head><script>var x = "<div class='category-value'>NOT A CATEGORY</div>";</script></head>
+<body>
+<div class="jif-values"><p class="title">JOURNAL IMPACT FACTOR</p><p class="value">1.7</p></div>
+<p class="five-yr-impact-factor-value">2.1</p>
+<h3>Rank by Journal Impact Factor</h3>
+<div class="carousel">
+  <div class="category-value">ETHICS</div>
+  <div class="jif-rank-table scroll-it"><table><tbody>
+    <tr><th>JCR YEAR</th><th>JIF RANK</th><th>JIF QUARTILE</th><th>JIF PERCENTILE</th></tr>
+    <tr><td>2024</td><td>16/62</td><td>Q2</td><td>75.0</td></tr>
+    <tr><td>2023</td><td>22/60</td><td>Q2</td><td>64.2</td></tr>
+  </tbody></table></div>
+  <div class="category-value">MEDICAL ETHICS</div>
+  <div class="scroll-it"><table><tbody>
+    <tr><td>2024</td><td>14/37</td><td>Q2</td><td>63.5</td></tr>
+  </tbody></table></div>
+</div>
+<h3>Rank by Journal Citation Indicator (JCI)</h3>
+<div>
+  <div class="category-value">ETHICS</div>
+  <div class="jci-block"><p>JCR YEAR</p><p>JCI RANK</p><p>JCI QUARTILE</p><p>JCI PERCENTILE</p>
+    <span>2024</span> <span>20/140</span> <span>Q1</span> <span>86.07</span>
+    <span>2023</span> <span>25/135</span> <span>Q1</span> <span>81.85</span></div>
+</div>
+<h3>Contributions by Organization</h3>
+<h3>Key Indicators</h3>
+<table><thead><tr><th>Year</th><th>Total Citations</th><th>JIF</th></tr></thead>
+<tbody><tr><td>2024</td><td>2,500</td><td>1.7</td></tr><tr><td>2023</td><td>2,400</td><td>1.5</td></tr></tbody></table>
+</body></html>"""
+
+class TestParseProfileHtml(unittest.TestCase):
+    def test_profile(self):
+        data = parse_profile_html(PROFILE_HTML, "BIOETHICS")
+        self.assertEqual(data["metrics"], {
+            "journal": "BIOETHICS", "year": 2024, "jif": "1.7", "five_year_jif": "2.1",
+            "jif_percentile": "75.0",
+            "history": [{"year": 2024, "jif": "1.7"}, {"year": 2023, "jif": "1.5"}]
+        })
+        self.assertEqual(list(data["rankings"]), ["ETHICS", "MEDICAL ETHICS"])
+        self.assertEqual(data["rankings"]["ETHICS"], [
+            {"year": 2024, "rank": "16/62", "quartile": "Q2", "percentile": "75.0"},
+            {"year": 2023, "rank": "22/60", "quartile": "Q2", "percentile": "64.2"}
+        ])
+        self.assertEqual(data["rankings"]["MEDICAL ETHICS"], [
+            {"year": 2024, "rank": "14/37", "quartile": "Q2", "percentile": "63.5"}
+        ])
+        self.assertEqual(data["jci_rankings"], {"ETHICS": [
+            {"year": 2024, "rank": "20/140", "quartile": "Q1", "percentile": "86.07"},
+            {"year": 2023, "rank": "25/135", "quartile": "Q1", "percentile": "81.85"}
+        ]})
+
+    def test_missing_sections(self):
+        data = parse_profile_html("<html><body><p>Nothing here</p></body></html>", "X", 2024)
+        self.assertEqual(data["rankings"], {})
+        self.assertEqual(data["jci_rankings"], {})
+        self.assertEqual(data["metrics"]["jif"], "N/A")
+        self.assertEqual(data["metrics"]["history"], [])
+
+if __name__ == "__main__":
+    unittest.main()
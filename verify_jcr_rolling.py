@@ -0,0 +1,51 @@
+
+import os
+import csv
+import random
+import tempfile
+import unittest
+from jcr_analysis import calculate_category_averages
+
+# numpy is a requirement (requirements.txt); a missing install should fail here, not skip
+import numpy
+
+class TestRankingArrays(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        rnd = random.Random(7)
+        self.paths = []
+        for j in range(20):
+            path = os.path.join(self.tmp.name, f"J{j}_jcr_data.csv")
+            with open(path, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                writer.writerow(["Journal", "Metric Type", "Category", "Year", "Rank", "Quartile", "Percentile"])
+                for metric in ["JIF", "JCI"]:
+                    for c in range(3):
+                        for year in range(2010, 2025):
+                            if rnd.random() < 0.3:
+                                continue # Missing year
+                            pct = rnd.choice([f"{rnd.uniform(0, 100):.2f}", f"{rnd.uniform(0, 100):.1f}", "N/A"])
+                            writer.writerow([f"J{j}", metric, f"CAT {c}", year, "1/10", "Q1", pct])
+            self.paths.append(path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_matches_calculate_category_averages(self):
+        from jcr_rolling import RankingArrays
+        arrays = RankingArrays.from_csv(self.paths)
+        for start_year in range(2008, 2028):
+            averages = arrays.averages(start_year)
+            for j, path in enumerate(self.paths):
+                expected = calculate_category_averages(path, start_year)
+                self.assertEqual(averages.get(f"J{j}", {"JIF": {}, "JCI": {}}), expected, (path, start_year))
+
+    def test_window_stats(self):
+        from jcr_rolling import RankingArrays
+        rows = [("J", "JIF", "ETHICS", 2020, 10.0), ("J", "JIF", "ETHICS", 2022, 30.0), ("J", "JIF", "ETHICS", 2023, 50.0)]
+        table = RankingArrays(rows).table(window=3, years=[2023])
+        self.assertEqual(table, [{"journal": "J", "metric": "JIF", "category": "ETHICS", "year": 2023,
+                                  "mean": 40.0, "median": 40.0, "min": 30.0, "max": 50.0, "count": 2}])
+
+if __name__ == "__main__":
+    unittest.main()